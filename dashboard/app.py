@@ -82,9 +82,12 @@ def create_app(config_manager: Optional[ConfigManager] = None, bot = None):
         if not app.bot or not app.bot.bot.is_ready():
             return jsonify([])
         
+        guilds = app.bot.bot.guilds
+        server_configs = app.config_manager.get_server_configs(str(guild.id) for guild in guilds)
+        
         servers = []
-        for guild in app.bot.bot.guilds:
-            server_config = app.config_manager.get_server_config(str(guild.id))
+        for guild in guilds:
+            server_config = server_configs[str(guild.id)]
             servers.append({
                 'id': str(guild.id),
                 'name': guild.name,
@@ -340,8 +343,12 @@ def create_app(config_manager: Optional[ConfigManager] = None, bot = None):
                         try:
                             loop = asyncio.new_event_loop()
                             asyncio.set_event_loop(loop)
-                            models = loop.run_until_complete(provider.fetch_models_from_api())
-                            loop.close()
+                            try:
+                                models = loop.run_until_complete(provider.fetch_models_from_api())
+                            finally:
+                                # Release the provider's HTTP session before its loop goes away
+                                loop.run_until_complete(provider.close())
+                                loop.close()
                         except:
                             models = provider.get_available_models()
                     else:
@@ -723,7 +730,11 @@ def create_app(config_manager: Optional[ConfigManager] = None, bot = None):
                 enhanced_prompt = str(response.content).strip()
                 return jsonify({'success': True, 'prompt': enhanced_prompt})
             finally:
-                loop.close()
+                # Release the provider's HTTP session before its loop goes away
+                try:
+                    loop.run_until_complete(provider.close())
+                finally:
+                    loop.close()
                 
         except Exception as e:
             import traceback
@@ -889,6 +900,7 @@ def create_app(config_manager: Optional[ConfigManager] = None, bot = None):
                         """, (','.join(tool_names), server_id))
                     
                     conn.commit()
+                app.config_manager.invalidate_server_config()
                 
                 print(f"Updated server configs with tools: {tool_names}")
             
@@ -974,6 +986,7 @@ def create_app(config_manager: Optional[ConfigManager] = None, bot = None):
                     updated_count += 1
                 
                 conn.commit()
+            app.config_manager.invalidate_server_config()
             
             return jsonify({
                 'success': True,
@@ -1092,6 +1105,7 @@ def create_app(config_manager: Optional[ConfigManager] = None, bot = None):
                     """, (','.join(enabled_tools), server_id))
                 
                 conn.commit()
+            app.config_manager.invalidate_server_config()
             
             return jsonify({
                 'success': True,
@@ -3,9 +3,12 @@ Main Discord bot implementation.
 """
 import discord
 from discord.ext import commands
+import orjson
 import os
+import re
 import asyncio
-from typing import Optional, Dict, List
+from collections import OrderedDict
+from typing import Optional, Dict, List, Tuple
 from pathlib import Path
 
 from src.config.manager import ConfigManager
@@ -17,6 +20,9 @@ from src.utils.conversation_manager import ConversationManager
 
 logger = setup_logger(__name__)
 
+# Maximum number of characters of a tool result stored in the tool_calls log
+TOOL_RESULT_LOG_LIMIT = 1000
+
 
 class DiscordLLMBot:
     """Main Discord bot class."""
@@ -43,12 +49,20 @@ class DiscordLLMBot:
         # LLM providers cache
         self.llm_providers: Dict[str, BaseLLMProvider] = {}
         
-        # Tools
+        # Tools (loaded in setup(), overlapping the Discord login)
         self.tools: Dict[str, BaseTool] = {}
-        self._load_tools()
         
-        # Conversation history (server_id -> channel_id -> messages)
-        self.conversations: Dict[str, Dict[str, List[Message]]] = {}
+        # Conversation history (server_id -> convo_key -> messages), kept in LRU order
+        # and trimmed periodically so long-running bots don't grow without bound
+        self.conversations: OrderedDict[str, OrderedDict[str, List[Message]]] = OrderedDict()
+        self._max_guild_cache = self.config_manager.get('bot.max_guild_cache', 1000)
+        self._max_conversations_per_guild = self.config_manager.get('bot.max_conversations_per_guild', 100)
+        self._conversation_eviction_task: Optional[asyncio.Task] = None
+        
+        self._log_flush_task: Optional[asyncio.Task] = None
+        
+        # Matches both <@ID> and <@!ID> mentions of the bot (compiled in on_ready)
+        self._mention_re: Optional[re.Pattern] = None
         
         # Token-efficient conversation manager
         self.conversation_manager = ConversationManager(
@@ -64,16 +78,46 @@ class DiscordLLMBot:
     
     def _load_tools(self):
         """Load enabled tools and plugins."""
-        # Load plugins (including built-in web_search)
+        plugin_dirs, enabled_plugins = self._discover_plugins()
+        
+        for plugin_dir in plugin_dirs:
+            self._register_plugin_tools(self._load_one_plugin(plugin_dir, enabled_plugins))
+        
+        # Log total tools loaded
+        logger.info(f"Total tools loaded: {len(self.tools)} - {list(self.tools.keys())}")
+    
+    async def _load_tools_async(self):
+        """Load enabled tools and plugins, importing each plugin in a worker thread."""
+        plugin_dirs, enabled_plugins = await asyncio.to_thread(self._discover_plugins)
+        
+        results = await asyncio.gather(*[
+            asyncio.to_thread(self._load_one_plugin, plugin_dir, enabled_plugins)
+            for plugin_dir in plugin_dirs
+        ])
+        
+        # Register on the event loop thread, in directory order
+        for loaded in results:
+            self._register_plugin_tools(loaded)
+        
+        # Log total tools loaded
+        logger.info(f"Total tools loaded: {len(self.tools)} - {list(self.tools.keys())}")
+    
+    def _discover_plugins(self) -> Tuple[List[Path], Dict[str, bool]]:
+        """
+        Find plugin directories and the enabled state of each plugin.
+        
+        Built-in plugins missing from the database are auto-installed.
+        
+        Returns:
+            (plugin directories, plugin name -> enabled)
+        """
         import sqlite3
-        from pathlib import Path
-        import importlib.util
         import json
         
         plugins_dir = Path('plugins')
         if not plugins_dir.exists():
             logger.warning("Plugins directory not found")
-            return
+            return [], {}
         
         # Get enabled plugins from database
         with sqlite3.connect(self.config_manager.db_path) as conn:
@@ -84,10 +128,12 @@ class DiscordLLMBot:
         logger.info(f"Found {len(enabled_plugins)} plugins in database: {list(enabled_plugins.keys())}")
         
         # Ensure built-in plugins are installed
+        plugin_dirs = []
         builtin_plugins = []
         for plugin_dir in plugins_dir.iterdir():
             if not plugin_dir.is_dir():
                 continue
+            plugin_dirs.append(plugin_dir)
             manifest_path = plugin_dir / 'manifest.json'
             if manifest_path.exists():
                 try:
@@ -118,56 +164,70 @@ class DiscordLLMBot:
                         logger.info(f"Auto-installed built-in plugin: {plugin_name}")
                 conn.commit()
         
-        # Load each plugin
-        for plugin_dir in plugins_dir.iterdir():
-            if not plugin_dir.is_dir():
-                continue
+        return plugin_dirs, enabled_plugins
+    
+    def _load_one_plugin(self, plugin_dir: Path, enabled_plugins: Dict[str, bool]) -> List[Tuple[str, BaseTool]]:
+        """
+        Import a single plugin and instantiate its tools.
+        
+        Safe to call from a worker thread: it does not touch ``self.tools``.
+        
+        Args:
+            plugin_dir: Directory containing manifest.json and plugin.py
+            enabled_plugins: Plugin name -> enabled state
+        
+        Returns:
+            List of (plugin_name, tool) pairs, empty if skipped or failed
+        """
+        import importlib.util
+        import json
+        
+        manifest_path = plugin_dir / 'manifest.json'
+        plugin_file = plugin_dir / 'plugin.py'
+        
+        if not manifest_path.exists() or not plugin_file.exists():
+            return []
+        
+        try:
+            # Load manifest
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                content = f.read().strip()
+                if not content:
+                    logger.warning(f"Skipping plugin {plugin_dir.name}: Empty manifest.json")
+                    return []
+                manifest = json.loads(content)
             
-            manifest_path = plugin_dir / 'manifest.json'
-            plugin_file = plugin_dir / 'plugin.py'
+            plugin_name = manifest.get('name')
+            if not plugin_name:
+                logger.warning(f"Skipping plugin {plugin_dir.name}: No 'name' field in manifest")
+                return []
             
-            if not manifest_path.exists() or not plugin_file.exists():
-                continue
+            # Check if plugin is enabled
+            if plugin_name not in enabled_plugins or not enabled_plugins[plugin_name]:
+                logger.debug(f"Plugin '{plugin_name}' is not enabled, skipping")
+                return []
             
-            try:
-                # Load manifest
-                with open(manifest_path, 'r', encoding='utf-8') as f:
-                    content = f.read().strip()
-                    if not content:
-                        logger.warning(f"Skipping plugin {plugin_dir.name}: Empty manifest.json")
-                        continue
-                    manifest = json.loads(content)
-                
-                plugin_name = manifest.get('name')
-                if not plugin_name:
-                    logger.warning(f"Skipping plugin {plugin_dir.name}: No 'name' field in manifest")
-                    continue
-                
-                # Check if plugin is enabled
-                if plugin_name not in enabled_plugins or not enabled_plugins[plugin_name]:
-                    logger.debug(f"Plugin '{plugin_name}' is not enabled, skipping")
-                    continue
-                
-                # Load plugin module
-                spec = importlib.util.spec_from_file_location(f"plugin_{plugin_dir.name}", plugin_file)
-                if spec and spec.loader:
-                    module = importlib.util.module_from_spec(spec)
-                    spec.loader.exec_module(module)
-                    
-                    # Instantiate plugin
-                    plugin = module.Plugin()
-                    
-                    # Register plugin tools
-                    for tool in plugin.get_tools():
-                        tool_def = tool.get_definition()
-                        self.tools[tool_def.name] = tool
-                        logger.info(f"Loaded tool '{tool_def.name}' from plugin '{plugin_name}'")
-                
-            except Exception as e:
-                logger.error(f"Error loading plugin from {plugin_dir.name}: {e}", exc_info=True)
+            # Load plugin module
+            spec = importlib.util.spec_from_file_location(f"plugin_{plugin_dir.name}", plugin_file)
+            if not spec or not spec.loader:
+                return []
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            
+            # Instantiate plugin
+            plugin = module.Plugin()
+            return [(plugin_name, tool) for tool in plugin.get_tools()]
         
-        # Log total tools loaded
-        logger.info(f"Total tools loaded: {len(self.tools)} - {list(self.tools.keys())}")
+        except Exception as e:
+            logger.error(f"Error loading plugin from {plugin_dir.name}: {e}", exc_info=True)
+            return []
+    
+    def _register_plugin_tools(self, loaded: List[Tuple[str, BaseTool]]):
+        """Register tools returned by _load_one_plugin."""
+        for plugin_name, tool in loaded:
+            tool_def = tool.get_definition()
+            self.tools[tool_def.name] = tool
+            logger.info(f"Loaded tool '{tool_def.name}' from plugin '{plugin_name}'")
     
     def _register_events(self):
         """Register Discord event handlers."""
@@ -175,11 +235,18 @@ class DiscordLLMBot:
         @self.bot.event
         async def on_ready():
             logger.info(f'Bot logged in as {self.bot.user}')
+            self._mention_re = re.compile(rf'<@!?{self.bot.user.id}>')
             
             # Initialize server configs for all guilds
             for guild in self.bot.guilds:
                 await self._ensure_server_config(str(guild.id))
             
+            # Periodically trim cached conversations (on_ready fires again on reconnect)
+            if self._conversation_eviction_task is None or self._conversation_eviction_task.done():
+                self._conversation_eviction_task = asyncio.create_task(self._conversation_eviction_loop())
+            if self._log_flush_task is None or self._log_flush_task.done():
+                self._log_flush_task = asyncio.create_task(self.config_manager.run_log_flusher())
+            
             # Set status
             activity_text = self.config_manager.get('bot.activity', 'Chatting with AI')
             activity = discord.Game(name=activity_text)
@@ -244,8 +311,9 @@ class DiscordLLMBot:
                 # Clean message content
                 content = message.content
                 # Remove bot mention (handle both <@ID> and <@!ID> formats)
-                content = content.replace(f'<@{self.bot.user.id}>', '').strip()
-                content = content.replace(f'<@!{self.bot.user.id}>', '').strip()
+                if self.bot.user in message.mentions:
+                    content = self._strip_bot_mention(content)
+                content = content.strip()
                 # Remove prefix if present
                 prefix = self.config_manager.get('bot.prefix', '!')
                 if content.startswith(prefix):
@@ -254,8 +322,7 @@ class DiscordLLMBot:
                 # Determine conversation root: use the replied-to message id if this
                 # message is a reply; otherwise treat this message as a fresh root.
                 # This scopes context to reply chains instead of the whole channel.
-                if server_id not in self.conversations:
-                    self.conversations[server_id] = {}
+                guild_conversations = self._get_guild_conversations(server_id)
 
                 # message.reference may be None or may have message_id attribute
                 referenced_id = None
@@ -271,14 +338,16 @@ class DiscordLLMBot:
                 root_id = referenced_id if referenced_id else str(message.id)
                 convo_key = f"{message.channel.id}:{root_id}"
 
-                if convo_key not in self.conversations[server_id]:
+                if convo_key not in guild_conversations:
                     # Create a fresh conversation container for this reply chain
-                    self.conversations[server_id][convo_key] = []
+                    guild_conversations[convo_key] = []
+                else:
+                    guild_conversations.move_to_end(convo_key)
 
                 # Build conversation context. If this message is a reply chain, walk
                 # the reply references up to 5 messages and include them as context
                 # (oldest -> newest). Otherwise, this is a fresh conversation.
-                conversation = self.conversations[server_id][convo_key]
+                conversation = guild_conversations[convo_key]
 
                 # If this is a reply to another message, traverse up the reply chain
                 # to collect up to 5 prior messages as context.
@@ -319,7 +388,7 @@ class DiscordLLMBot:
                     for cm in chain_msgs:
                         try:
                             role = 'assistant' if cm.author and self.bot and cm.author.id == self.bot.user.id else 'user'
-                            text = (cm.content or '').replace(f'<@{self.bot.user.id}>', '').replace(f'<@!{self.bot.user.id}>', '').strip()
+                            text = self._strip_bot_mention(cm.content or '').strip()
                             conversation = self.conversation_manager.add_message(
                                 conversation,
                                 Message(role=role, content=text),
@@ -352,7 +421,7 @@ class DiscordLLMBot:
                     )
 
                 # Persist conversation under the convo_key
-                self.conversations[server_id][convo_key] = conversation
+                guild_conversations[convo_key] = conversation
                 
                 # Get LLM provider
                 provider = self._get_llm_provider(
@@ -414,7 +483,7 @@ class DiscordLLMBot:
                 )
                 
                 # Update conversation in storage
-                self.conversations[server_id][str(message.channel.id)] = conversation
+                guild_conversations[str(message.channel.id)] = conversation
                 
                 # Send response
                 await self._send_response(message, response.content)
@@ -459,81 +528,44 @@ class DiscordLLMBot:
 
         tool_results: List[tuple[str, str]] = []
 
-        # Execute each tool call
-        for tool_call in response.tool_calls:
-            # Tool calls are now always in dict format (converted by providers)
-            tool_name = tool_call['function']['name']
-            tool_args_str = tool_call['function']['arguments']
-            tool_call_id = tool_call['id']
-            
-            # Parse arguments robustly: providers may supply a dict already or a JSON/string
-            import json
-            tool_args = {}
-            try:
-                if isinstance(tool_args_str, dict):
-                    tool_args = tool_args_str
-                elif isinstance(tool_args_str, (bytes, bytearray)):
-                    try:
-                        tool_args = json.loads(tool_args_str.decode('utf-8'))
-                    except Exception:
-                        tool_args = {}
-                elif isinstance(tool_args_str, str):
-                    # Try JSON first (most common), then as Python literal
-                    try:
-                        tool_args = json.loads(tool_args_str)
-                    except Exception:
-                        try:
-                            # Safer eval: only allow literal structures
-                            from ast import literal_eval
-                            tool_args = literal_eval(tool_args_str)
-                        except Exception:
-                            tool_args = {}
-                else:
-                    # Unknown type, leave empty
-                    tool_args = {}
-            except Exception as e:
-                logger.error(f"Failed to parse tool arguments (type={type(tool_args_str)}): {e}")
-                tool_args = {}
-            
-            result = None
-            success = False
-            error_message = None
-            
-            if tool_name in self.tools:
-                try:
-                    result = await self.tools[tool_name].execute(**tool_args)
-                    success = True
-                    tool_results.append((tool_name, str(result)))
-                except Exception as e:
-                    result = f"Error: {str(e)}"
-                    error_message = str(e)
-                    logger.error(f"Tool execution error: {e}", exc_info=True)
-                    tool_results.append((tool_name, result))
-                
-                                    # Add tool result to conversation (with token management)
+        # Execute the tool calls concurrently; results come back in request order
+        outcomes = await asyncio.gather(
+            *[self._run_one_tool(tool_call) for tool_call in response.tool_calls],
+            return_exceptions=True
+        )
+
+        for tool_call, outcome in zip(response.tool_calls, outcomes):
+            if isinstance(outcome, BaseException):
+                # _run_one_tool handles tool errors itself; this is a malformed tool call
+                logger.error(f"Tool call failed: {outcome}", exc_info=outcome)
+                tool_name = (tool_call.get('function') or {}).get('name') or 'unknown'
+                tool_args, success, error_message = {}, False, str(outcome)
+                result = f"Error: {outcome}"
+                tool_content = result
+            else:
+                tool_name, tool_args, result, success, error_message = outcome
                 # Prefix result with tool name so LLMs reliably see which tool produced it
                 tool_content = f"[{tool_name}] {result}"
-                conversation = self.conversation_manager.add_message(
-                    conversation,
-                    Message(
-                        role='tool',
-                        content=tool_content,
-                        tool_call_id=tool_call_id
-                    ),
-                    server_config.get('llm_model')
-                )
-            else:
-                result = f"Tool {tool_name} not found"
-                error_message = f"Tool {tool_name} not found"
-                tool_results.append((tool_name, result))
+            tool_results.append((tool_name, str(result)))
+
+            # Every tool call needs a result message, or providers reject the follow-up request
+            conversation = self.conversation_manager.add_message(
+                conversation,
+                Message(
+                    role='tool',
+                    content=tool_content,
+                    tool_call_id=tool_call.get('id')
+                ),
+                server_config.get('llm_model')
+            )
             
             # Log tool call to database
             self._log_tool_call(
                 server_id=server_id,
                 user_id=user_id,
                 tool_name=tool_name,
-                parameters=json.dumps(tool_args),
-                result=str(result)[:1000] if result else "",
+                parameters=self._format_tool_args_for_log(tool_args),
+                result=self._format_tool_result_for_log(result),
                 success=success,
                 error_message=error_message
             )
@@ -580,6 +612,62 @@ class DiscordLLMBot:
         
         return final_response
     
+    @staticmethod
+    def _parse_tool_args(tool_args_str) -> Dict:
+        """Parse tool arguments robustly: providers may supply a dict already or a JSON/string."""
+        import json
+        tool_args = {}
+        try:
+            if isinstance(tool_args_str, dict):
+                tool_args = tool_args_str
+            elif isinstance(tool_args_str, (bytes, bytearray)):
+                try:
+                    tool_args = json.loads(tool_args_str.decode('utf-8'))
+                except Exception:
+                    tool_args = {}
+            elif isinstance(tool_args_str, str):
+                # Try JSON first (most common), then as Python literal
+                try:
+                    tool_args = json.loads(tool_args_str)
+                except Exception:
+                    try:
+                        # Safer eval: only allow literal structures
+                        from ast import literal_eval
+                        tool_args = literal_eval(tool_args_str)
+                    except Exception:
+                        tool_args = {}
+            else:
+                # Unknown type, leave empty
+                tool_args = {}
+        except Exception as e:
+            logger.error(f"Failed to parse tool arguments (type={type(tool_args_str)}): {e}")
+            tool_args = {}
+        return tool_args
+    
+    async def _run_one_tool(self, tool_call: Dict) -> Tuple[str, Dict, Optional[str], bool, Optional[str]]:
+        """
+        Execute a single tool call.
+        
+        Args:
+            tool_call: Tool call in dict format (converted by providers)
+        
+        Returns:
+            (tool_name, tool_args, result, success, error_message)
+        """
+        tool_name = tool_call['function']['name']
+        tool_args = self._parse_tool_args(tool_call['function']['arguments'])
+        
+        if tool_name not in self.tools:
+            result = f"Tool {tool_name} not found"
+            return tool_name, tool_args, result, False, result
+        
+        try:
+            result = await self.tools[tool_name].execute(**tool_args)
+            return tool_name, tool_args, result, True, None
+        except Exception as e:
+            logger.error(f"Tool execution error: {e}", exc_info=True)
+            return tool_name, tool_args, f"Error: {str(e)}", False, str(e)
+    
     async def _ensure_server_config(self, server_id: str):
         """Ensure a server has a configuration entry in the database."""
         import sqlite3
@@ -605,8 +693,45 @@ class DiscordLLMBot:
                     tool_names
                 ))
                 conn.commit()
+                self.config_manager.invalidate_server_config(server_id)
                 logger.info(f"Created server config for {server_id} with tools: {tool_names}")
 
+    def _strip_bot_mention(self, text: str) -> str:
+        """Remove mentions of the bot (<@ID> or <@!ID>) from text in a single pass."""
+        if self._mention_re is None:
+            self._mention_re = re.compile(rf'<@!?{self.bot.user.id}>')
+        return self._mention_re.sub('', text)
+    
+    def _get_guild_conversations(self, server_id: str) -> OrderedDict[str, List[Message]]:
+        """Get (or create) a server's conversation cache and mark it most recently used."""
+        guild_conversations = self.conversations.get(server_id)
+        if guild_conversations is None:
+            guild_conversations = self.conversations[server_id] = OrderedDict()
+        else:
+            self.conversations.move_to_end(server_id)
+        return guild_conversations
+    
+    def _evict_conversations(self):
+        """Drop least recently used servers and conversations beyond the configured limits."""
+        evicted = 0
+        while len(self.conversations) > self._max_guild_cache:
+            _, guild_conversations = self.conversations.popitem(last=False)
+            evicted += len(guild_conversations)
+        
+        for guild_conversations in self.conversations.values():
+            while len(guild_conversations) > self._max_conversations_per_guild:
+                guild_conversations.popitem(last=False)
+                evicted += 1
+        
+        if evicted:
+            logger.debug(f"Evicted {evicted} cached conversations")
+    
+    async def _conversation_eviction_loop(self, interval: float = 300):
+        """Trim the conversation cache every `interval` seconds."""
+        while True:
+            await asyncio.sleep(interval)
+            self._evict_conversations()
+    
     def refresh_server_config(self, server_id: str):
         """
         Refresh in-memory structures for a server when its configuration changes.
@@ -651,7 +776,7 @@ class DiscordLLMBot:
         cache_key = f"{server_id}:{provider_name}"
         
         if cache_key not in self.llm_providers:
-            self.llm_providers[cache_key] = LLMProviderFactory.create_provider(provider_name)
+            self.llm_providers[cache_key] = LLMProviderFactory.get_or_create_provider(provider_name)
         
         return self.llm_providers[cache_key]
     
@@ -680,51 +805,54 @@ class DiscordLLMBot:
                 await message.channel.send(chunk)
     
     def _log_usage(self, server_id: str, user_id: str, config: Dict, response):
-        """Log usage statistics to database."""
-        import sqlite3
-        
+        """Queue usage statistics for the database."""
         cost = self._get_llm_provider(
             config.get('llm_provider'),
             server_id
         ).estimate_cost(response.usage, config.get('llm_model'))
         
-        with sqlite3.connect(self.config_manager.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO usage_stats 
-                (server_id, user_id, provider, model, tokens_used, cost_usd)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (
-                server_id,
-                user_id,
-                config.get('llm_provider'),
-                config.get('llm_model'),
-                response.usage.get('total_tokens', 0),
-                cost
-            ))
-            conn.commit()
+        self.config_manager.log_usage(
+            server_id,
+            user_id,
+            config.get('llm_provider'),
+            config.get('llm_model'),
+            response.usage.get('total_tokens', 0),
+            cost
+        )
+    
+    @staticmethod
+    def _format_tool_args_for_log(tool_args) -> str:
+        """Serialize tool arguments for the tool_calls log."""
+        try:
+            # Arguments parsed with literal_eval may have non-str keys
+            return orjson.dumps(tool_args, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+        except TypeError:
+            return str(tool_args)
+    
+    @staticmethod
+    def _format_tool_result_for_log(result) -> str:
+        """Stringify a tool result for the tool_calls log, capped at TOOL_RESULT_LOG_LIMIT."""
+        if not result:
+            return ""
+        if isinstance(result, str):
+            return result[:TOOL_RESULT_LOG_LIMIT]
+        try:
+            return orjson.dumps(result, default=str, option=orjson.OPT_NON_STR_KEYS)[:TOOL_RESULT_LOG_LIMIT].decode('utf-8', 'ignore')
+        except TypeError:
+            return str(result)[:TOOL_RESULT_LOG_LIMIT]
     
     def _log_tool_call(self, server_id: str, user_id: str, tool_name: str, 
                        parameters: str, result: str, success: bool, error_message: Optional[str] = None):
-        """Log tool call to database."""
-        import sqlite3
-        
-        with sqlite3.connect(self.config_manager.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO tool_calls 
-                (server_id, user_id, tool_name, parameters, result, success, error_message)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (
-                server_id,
-                user_id,
-                tool_name,
-                parameters,
-                result,
-                1 if success else 0,
-                error_message
-            ))
-            conn.commit()
+        """Queue a tool call for the database."""
+        self.config_manager.log_tool_call(
+            server_id,
+            user_id,
+            tool_name,
+            parameters,
+            result,
+            success,
+            error_message
+        )
     
     async def _start_dashboard(self):
         """Start the web dashboard."""
@@ -761,6 +889,15 @@ class DiscordLLMBot:
         except Exception as e:
             logger.error(f"Failed to start dashboard: {e}")
     
+    async def setup(self, token: str):
+        """
+        Log in to Discord and load plugins concurrently.
+        
+        Args:
+            token: Discord bot token
+        """
+        await asyncio.gather(self.bot.login(token), self._load_tools_async())
+    
     async def start(self):
         """Start the bot."""
         token = os.getenv('DISCORD_TOKEN')
@@ -769,6 +906,10 @@ class DiscordLLMBot:
             raise ValueError("DISCORD_TOKEN not found in environment variables")
         
         try:
-            await self.bot.start(token)
+            await self.setup(token)
+            await self.bot.connect()
         except KeyboardInterrupt:
             await self.bot.close()
+        finally:
+            await LLMProviderFactory.close_providers()
+            self.config_manager.close()
@@ -3,17 +3,199 @@ Configuration manager for the bot.
 Handles loading, saving, and runtime updates of configuration.
 """
 import os
+import asyncio
 import yaml
 import sqlite3
-import json
+import orjson
+import pickle
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 from dotenv import load_dotenv
 
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:  # libyaml not available
+    from yaml import SafeLoader, SafeDumper
+
 from src.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+_MISSING = object()
+
+# Parsed YAML files for this process: path -> ((mtime_ns, size), pickled content).
+# Content is kept pickled so every caller gets its own mutable copy.
+_yaml_cache: Dict[str, Tuple[Tuple[int, int], bytes]] = {}
+
+# Process-wide SQLite connections: resolved db path -> [connection, lock, number of users]
+_connections: Dict[str, List[Any]] = {}
+_connections_lock = threading.Lock()
+
+# Environment variables holding LLM provider API keys, and their .env.example placeholders
+_PROVIDER_ENV = ('GEMINI_API_KEY', 'OPENAI_API_KEY', 'ANTHROPIC_API_KEY', 'OPENROUTER_API_KEY')
+_PLACEHOLDERS = frozenset(f'your_{p.lower()}' for p in _PROVIDER_ENV)
+_DISCORD_TOKEN_PLACEHOLDER = 'your_discord_bot_token_here'
+
+# Maximum number of server configurations kept in ConfigManager's in-memory cache
+SERVER_CONFIG_CACHE_SIZE = 1024
+
+# Server config fields with a dedicated server_config column (mention_users only lives in config_json)
+_SERVER_CONFIG_KEYS = (
+    'llm_provider', 'llm_model', 'temperature', 'max_tokens', 'system_prompt',
+    'enabled_tools', 'enforce_char_limit', 'mention_users'
+)
+
+# For each key: its JSON type in config_json (NULL when absent) and the value to use,
+# taken from config_json when the key is present there and from the column otherwise.
+# The last column holds any remaining config_json keys.
+_SERVER_CONFIG_COLUMNS = ",\n".join(
+    [
+        f"json_type(config_json, '$.{key}'), "
+        f"CASE WHEN json_type(config_json, '$.{key}') IS NULL "
+        f"THEN {'NULL' if key == 'mention_users' else key} "
+        f"ELSE json_extract(config_json, '$.{key}') END"
+        for key in _SERVER_CONFIG_KEYS
+    ]
+    + ["json_remove(config_json, " + ", ".join(f"'$.{key}'" for key in _SERVER_CONFIG_KEYS) + ")"]
+)
+_SELECT_SERVER_CONFIG_SQL = f"SELECT {_SERVER_CONFIG_COLUMNS} FROM server_config WHERE server_id = ?"
+
+# Buffered usage_stats / tool_calls rows are force-flushed once this many are pending
+LOG_BUFFER_MAX_ROWS = 500
+
+_INSERT_USAGE_SQL = (
+    "INSERT INTO usage_stats (server_id, user_id, provider, model, tokens_used, cost_usd, timestamp) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+_INSERT_TOOL_CALL_SQL = (
+    "INSERT INTO tool_calls (server_id, user_id, tool_name, parameters, result, success, error_message, timestamp) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+# Update in place on conflict so the row keeps its rowid and created_at
+_UPSERT_SERVER_CONFIG_SQL = """
+    INSERT INTO server_config
+    (server_id, llm_provider, llm_model, temperature, max_tokens, system_prompt, enabled_tools, enforce_char_limit, config_json, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+    ON CONFLICT(server_id) DO UPDATE SET
+        llm_provider = excluded.llm_provider,
+        llm_model = excluded.llm_model,
+        temperature = excluded.temperature,
+        max_tokens = excluded.max_tokens,
+        system_prompt = excluded.system_prompt,
+        enabled_tools = excluded.enabled_tools,
+        enforce_char_limit = excluded.enforce_char_limit,
+        config_json = excluded.config_json,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+# SQLite's default limit on bound parameters per statement
+_SQLITE_MAX_VARIABLES = 999
+
+# PRAGMAs are per-connection, so they are applied whenever a connection is opened
+_CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-20000",
+)
+
+# Ordered (user_version, statements) schema migrations, applied once each by
+# _init_database. Append new entries with the next version number.
+_SCHEMA_MIGRATIONS: Tuple[Tuple[int, Tuple[str, ...]], ...] = (
+    # Indexes for per-server / per-user history and cost rollups, plus
+    # planner statistics for them
+    (1, (
+        "CREATE INDEX IF NOT EXISTS idx_usage_server_ts ON usage_stats(server_id, timestamp DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_usage_user_ts ON usage_stats(user_id, timestamp DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_tool_server_ts ON tool_calls(server_id, timestamp DESC)",
+        "ANALYZE",
+    )),
+)
+_SCHEMA_VERSION = _SCHEMA_MIGRATIONS[-1][0]
+
+
+def _get_connection(db_path: Path) -> Tuple[sqlite3.Connection, threading.Lock, bool]:
+    """
+    Get the shared connection for a database, opening it on first use.
+    
+    Each call must be paired with a _release_connection call.
+    
+    Args:
+        db_path: Path to the SQLite database
+    
+    Returns:
+        (connection, lock guarding it, whether it was newly opened)
+    """
+    key = str(db_path.resolve())
+    with _connections_lock:
+        entry = _connections.get(key)
+        if entry is not None:
+            entry[2] += 1
+            return entry[0], entry[1], False
+        
+        conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, cached_statements=256)
+        for pragma in _CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        lock = threading.Lock()
+        _connections[key] = [conn, lock, 1]
+        return conn, lock, True
+
+
+def _release_connection(db_path: Path):
+    """
+    Release a connection obtained from _get_connection.
+    
+    The connection is closed once its last user has released it.
+    
+    Args:
+        db_path: Path to the SQLite database
+    """
+    key = str(db_path.resolve())
+    with _connections_lock:
+        entry = _connections.get(key)
+        if entry is None:
+            return
+        entry[2] -= 1
+        if entry[2] > 0:
+            return
+        del _connections[key]
+    
+    conn, lock = entry[0], entry[1]
+    with lock:
+        conn.close()
+
+
+def _load_yaml_cached(path: Path) -> Any:
+    """
+    Load a YAML file, skipping the parse when the file is unchanged.
+    
+    Parsed results are cached in-process keyed on the file's mtime and
+    size, so reloading an unchanged file costs a stat and an unpickle
+    instead of a YAML parse.
+    
+    Args:
+        path: Path to the YAML file
+    
+    Returns:
+        Parsed YAML content
+    """
+    st = path.stat()
+    key = (st.st_mtime_ns, st.st_size)
+    
+    cached = _yaml_cache.get(str(path))
+    if cached and cached[0] == key:
+        return pickle.loads(cached[1])
+    
+    with open(path, 'r', encoding='utf-8') as f:
+        parsed = yaml.load(f, Loader=SafeLoader)
+    _yaml_cache[str(path)] = (key, pickle.dumps(parsed, protocol=pickle.HIGHEST_PROTOCOL))
+    return parsed
+
 
 class ConfigManager:
     """Manages bot configuration from YAML, environment, and database."""
@@ -27,7 +209,23 @@ class ConfigManager:
         """
         self.config_path = Path(config_path)
         self.config: Dict[str, Any] = {}
+        # Dot-notation key -> value for every node in self.config (see _rebuild_flat)
+        self._flat: Dict[str, Any] = {}
+        # Global fallbacks for server configs, refreshed by reload() and set()
+        self._server_defaults: Dict[str, Any] = {}
+        # Cached is_configured() result, cleared by reload() and set()
+        self._is_configured: Optional[bool] = None
         self.db_path = Path("data/bot.db")
+        self._closed = False
+        
+        # server_id -> resolved server configuration, in LRU order
+        self._server_config_cache: OrderedDict[str, Dict[str, Any]] = OrderedDict()
+        self._cache_lock = threading.Lock()
+        
+        # Write-behind buffers for usage_stats / tool_calls (see flush_logs)
+        self._usage_buf: List[Tuple] = []
+        self._tool_buf: List[Tuple] = []
+        self._log_buf_lock = threading.Lock()
         
         # Load environment variables
         load_dotenv()
@@ -42,8 +240,17 @@ class ConfigManager:
         """Initialize the SQLite database for per-server configurations."""
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        self._conn, self._lock, created = _get_connection(self.db_path)
+        if not created:
+            return
+        
+        with self._lock:
+            cursor = self._conn.cursor()
+            
+            # An up-to-date database needs no DDL at all
+            schema_version = cursor.execute("PRAGMA user_version").fetchone()[0]
+            if schema_version >= _SCHEMA_VERSION:
+                return
             
             # Server configurations
             cursor.execute("""
@@ -102,7 +309,20 @@ class ConfigManager:
                 )
             """)
             
-            conn.commit()
+            for version, statements in _SCHEMA_MIGRATIONS:
+                if version <= schema_version:
+                    continue
+                cursor.execute("BEGIN")
+                try:
+                    for statement in statements:
+                        cursor.execute(statement)
+                    cursor.execute(f"PRAGMA user_version = {version}")
+                    cursor.execute("COMMIT")
+                except Exception:
+                    if self._conn.in_transaction:
+                        cursor.execute("ROLLBACK")
+                    raise
+                logger.info(f"Migrated database schema to version {version}")
         
         logger.info(f"Database initialized at {self.db_path}")
     
@@ -113,15 +333,28 @@ class ConfigManager:
             self.config = self._default_config()
             self.save()
         else:
-            with open(self.config_path, 'r', encoding='utf-8') as f:
-                self.config = yaml.safe_load(f)
+            self.config = _load_yaml_cached(self.config_path)
+            if not isinstance(self.config, dict):
+                # Empty or malformed file; callers can rely on a mapping
+                logger.warning(f"Config file {self.config_path} does not contain a mapping, ignoring it")
+                self.config = {}
             logger.info("Configuration loaded")
+        
+        self._rebuild_flat()
+        self._rebuild_server_defaults()
+        self._is_configured = None
+        
+        # Cached server configs fall back to global defaults
+        self.invalidate_server_config()
     
     def save(self):
         """Save current configuration to file."""
         self.config_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(self.config_path, 'w', encoding='utf-8') as f:
-            yaml.dump(self.config, f, default_flow_style=False, sort_keys=False)
+        # Write to a sibling temp file and swap it in so a crash never leaves a partial config
+        tmp_path = self.config_path.with_name(self.config_path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            yaml.dump(self.config, f, Dumper=SafeDumper, default_flow_style=False, sort_keys=False)
+        os.replace(tmp_path, self.config_path)
         logger.info("Configuration saved")
     
     def get(self, key: str, default: Any = None) -> Any:
@@ -135,16 +368,32 @@ class ConfigManager:
         Returns:
             Configuration value or default
         """
-        keys = key.split('.')
-        value = self.config
+        return self._flat.get(key, default)
+    
+    def _rebuild_flat(self):
+        """Precompute dot-notation keys for every node (leaf or dict) in the configuration."""
+        flat: Dict[str, Any] = {}
         
-        for k in keys:
-            if isinstance(value, dict) and k in value:
-                value = value[k]
-            else:
-                return default
+        def walk(node: Dict[str, Any], prefix: str):
+            for k, v in node.items():
+                path = f"{prefix}{k}"
+                flat[path] = v
+                if isinstance(v, dict):
+                    walk(v, path + '.')
         
-        return value
+        if isinstance(self.config, dict):
+            walk(self.config, '')
+        self._flat = flat
+    
+    def _rebuild_server_defaults(self):
+        """Precompute the global defaults that server configurations fall back to."""
+        self._server_defaults = {
+            'llm_provider': self.get('llm.default_provider'),
+            'llm_model': self.get('llm.default_model'),
+            'temperature': self.get('llm.temperature'),
+            'max_tokens': self.get('llm.max_tokens'),
+            'system_prompt': self.get('llm.system_prompt', ''),
+        }
     
     def set(self, key: str, value: Any):
         """
@@ -154,68 +403,190 @@ class ConfigManager:
             key: Configuration key (e.g., 'llm.default_provider')
             value: Value to set
         """
-        keys = key.split('.')
-        config = self.config
+        self.update({key: value})
+    
+    def update(self, values: Dict[str, Any]):
+        """
+        Set several configuration values, saving the file once.
+        
+        Args:
+            values: Configuration keys in dot notation mapped to their values
+        """
+        # Environment may have changed alongside this call (e.g. the setup wizard)
+        self._is_configured = None
+        
+        changed = False
+        for key, value in values.items():
+            # Skip unchanged values; containers may have been mutated in place
+            old = self._flat.get(key, _MISSING)
+            if old is not _MISSING and old == value and not isinstance(value, (dict, list)):
+                continue
+            
+            keys = key.split('.')
+            config = self.config
+            
+            for k in keys[:-1]:
+                if k not in config:
+                    config[k] = {}
+                config = config[k]
+            
+            config[keys[-1]] = value
+            changed = True
         
-        for k in keys[:-1]:
-            if k not in config:
-                config[k] = {}
-            config = config[k]
+        if not changed:
+            return
         
-        config[keys[-1]] = value
+        self._rebuild_flat()
+        self._rebuild_server_defaults()
         self.save()
+        self.invalidate_server_config()
     
     def get_server_config(self, server_id: str) -> Dict[str, Any]:
         """
         Get configuration for a specific server.
         
+        Results are cached in memory; the cache is invalidated by
+        set_server_config, set, reload and invalidate_server_config.
+        
         Args:
             server_id: Discord server ID
         
         Returns:
             Server-specific configuration
         """
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT llm_provider, llm_model, temperature, max_tokens, system_prompt, enabled_tools, enforce_char_limit, config_json FROM server_config WHERE server_id = ?",
-                (server_id,)
-            )
-            result = cursor.fetchone()
-            
-            if result:
-                # Build config from columns
-                config = {
-                    'llm_provider': result[0] or self.get('llm.default_provider'),
-                    'llm_model': result[1] or self.get('llm.default_model'),
-                    'temperature': result[2] if result[2] is not None else self.get('llm.temperature'),
-                    'max_tokens': result[3] or self.get('llm.max_tokens'),
-                    'system_prompt': result[4] or self.get('llm.system_prompt', ''),
-                    'enabled_tools': result[5].split(',') if result[5] else None,
-                    'enforce_char_limit': bool(result[6]) if result[6] is not None else False
-                }
-                
-                # Merge with config_json if present
-                if result[7]:
-                    json_config = json.loads(result[7])
-                    config.update(json_config)
-                
-                # If enabled_tools is still None, use empty list (will be set by bot on first run)
-                if config['enabled_tools'] is None:
-                    config['enabled_tools'] = json_config.get('enabled_tools', []) if result[7] else []
-                
-                return config
+        with self._cache_lock:
+            config = self._server_config_cache.get(server_id)
+            if config is not None:
+                self._server_config_cache.move_to_end(server_id)
+                # Callers add per-request keys, so hand out a copy
+                return dict(config)
+        
+        config = self._fetch_server_config_uncached(server_id)
+        self._cache_server_config(server_id, config)
+        return dict(config)
+    
+    def invalidate_server_config(self, server_id: Optional[str] = None):
+        """
+        Drop cached server configuration.
+        
+        Call this after writing to the server_config table directly.
+        
+        Args:
+            server_id: Server to invalidate, or None to clear the whole cache
+        """
+        with self._cache_lock:
+            if server_id is None:
+                self._server_config_cache.clear()
             else:
-                # Return default configuration - empty enabled_tools means bot will set it
-                return {
-                    'llm_provider': self.get('llm.default_provider'),
-                    'llm_model': self.get('llm.default_model'),
-                    'temperature': self.get('llm.temperature'),
-                    'max_tokens': self.get('llm.max_tokens'),
-                    'system_prompt': self.get('llm.system_prompt', ''),
-                    'enabled_tools': [],  # Empty list - bot will populate on startup
-                    'mention_users': False
-                }
+                self._server_config_cache.pop(server_id, None)
+    
+    def _cache_server_config(self, server_id: str, config: Dict[str, Any]):
+        """Store a server configuration in the LRU cache."""
+        with self._cache_lock:
+            self._server_config_cache[server_id] = config
+            self._server_config_cache.move_to_end(server_id)
+            while len(self._server_config_cache) > SERVER_CONFIG_CACHE_SIZE:
+                self._server_config_cache.popitem(last=False)
+    
+    def get_server_configs(self, server_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get configuration for many servers with one query per 999 ids.
+        
+        Args:
+            server_ids: Discord server IDs
+        
+        Returns:
+            Mapping of server ID to server-specific configuration
+        """
+        configs: Dict[str, Dict[str, Any]] = {}
+        missing = []
+        with self._cache_lock:
+            for server_id in dict.fromkeys(server_ids):
+                config = self._server_config_cache.get(server_id)
+                if config is not None:
+                    self._server_config_cache.move_to_end(server_id)
+                    configs[server_id] = dict(config)
+                else:
+                    missing.append(server_id)
+        
+        rows = {}
+        for i in range(0, len(missing), _SQLITE_MAX_VARIABLES):
+            chunk = missing[i:i + _SQLITE_MAX_VARIABLES]
+            placeholders = ",".join("?" * len(chunk))
+            with self._lock:
+                cursor = self._conn.execute(
+                    f"SELECT server_id, {_SERVER_CONFIG_COLUMNS} FROM server_config WHERE server_id IN ({placeholders})",
+                    chunk
+                )
+                for row in cursor.fetchall():
+                    rows[row[0]] = row[1:]
+        
+        for server_id in missing:
+            row = rows.get(server_id)
+            config = self._build_server_config(row) if row else self._default_server_config()
+            self._cache_server_config(server_id, config)
+            configs[server_id] = dict(config)
+        
+        return configs
+    
+    def _fetch_server_config_uncached(self, server_id: str) -> Dict[str, Any]:
+        """Read a server's configuration from the database."""
+        with self._lock:
+            result = self._conn.execute(_SELECT_SERVER_CONFIG_SQL, (server_id,)).fetchone()
+        
+        if result:
+            return self._build_server_config(result)
+        return self._default_server_config()
+    
+    @staticmethod
+    def _from_json(json_type: str, value: Any) -> Any:
+        """Convert a json_extract result back to the value orjson would have parsed."""
+        if json_type in ('true', 'false'):
+            return bool(value)
+        if json_type in ('array', 'object'):
+            return orjson.loads(value)
+        return value
+    
+    def _build_server_config(self, result: Tuple) -> Dict[str, Any]:
+        """Build a server configuration from a row selected with _SERVER_CONFIG_COLUMNS."""
+        columns: Dict[str, Any] = {}
+        overrides: Dict[str, Any] = {}
+        for i, key in enumerate(_SERVER_CONFIG_KEYS):
+            json_type, value = result[2 * i], result[2 * i + 1]
+            if json_type is None:
+                columns[key] = value
+            else:
+                # Present in config_json: used as stored, even when empty or null
+                overrides[key] = self._from_json(json_type, value)
+        
+        defaults = self._server_defaults
+        config = {
+            'llm_provider': columns.get('llm_provider') or defaults['llm_provider'],
+            'llm_model': columns.get('llm_model') or defaults['llm_model'],
+            'temperature': columns['temperature'] if columns.get('temperature') is not None else defaults['temperature'],
+            'max_tokens': columns.get('max_tokens') or defaults['max_tokens'],
+            'system_prompt': columns.get('system_prompt') or defaults['system_prompt'],
+            # Empty list means the bot will set it on first run
+            'enabled_tools': columns['enabled_tools'].split(',') if columns.get('enabled_tools') else [],
+            'enforce_char_limit': bool(columns.get('enforce_char_limit'))
+        }
+        config.update(overrides)
+        
+        # Only keys without a dedicated column need parsing in Python
+        remaining = result[2 * len(_SERVER_CONFIG_KEYS)]
+        if remaining and remaining != '{}':
+            config.update(orjson.loads(remaining))
+        
+        return config
+    
+    def _default_server_config(self) -> Dict[str, Any]:
+        """Return the configuration used for servers without a database row."""
+        # Empty enabled_tools means bot will set it
+        return {
+            **self._server_defaults,
+            'enabled_tools': [],  # Empty list - bot will populate on startup
+            'mention_users': False
+        }
     
     def set_server_config(self, server_id: str, config: Dict[str, Any]):
         """
@@ -225,9 +596,7 @@ class ConfigManager:
             server_id: Discord server ID
             config: Configuration dictionary
         """
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
+        with self._lock:
             # Extract specific fields for columns
             llm_provider = config.get('llm_provider')
             llm_model = config.get('llm_model')
@@ -237,31 +606,142 @@ class ConfigManager:
             enabled_tools = ','.join(config.get('enabled_tools', [])) if isinstance(config.get('enabled_tools'), list) else config.get('enabled_tools')
             enforce_char_limit = config.get('enforce_char_limit', 0)
             
-            cursor.execute("""
-                INSERT OR REPLACE INTO server_config 
-                (server_id, llm_provider, llm_model, temperature, max_tokens, system_prompt, enabled_tools, enforce_char_limit, config_json, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-            """, (server_id, llm_provider, llm_model, temperature, max_tokens, system_prompt, enabled_tools, enforce_char_limit, json.dumps(config)))
-            conn.commit()
+            self._conn.execute(_UPSERT_SERVER_CONFIG_SQL, (server_id, llm_provider, llm_model, temperature, max_tokens, system_prompt, enabled_tools, enforce_char_limit, orjson.dumps(config, option=orjson.OPT_NON_STR_KEYS).decode()))
         
+        self.invalidate_server_config(server_id)
         logger.info(f"Updated config for server {server_id}")
     
-    def is_configured(self) -> bool:
-        """Check if the bot has been configured."""
-        # Check if essential values are set
-        discord_token = os.getenv('DISCORD_TOKEN')
+    def get_disabled_plugins(self, plugin_names: Iterable[str]) -> Set[str]:
+        """
+        Find which of the given plugins are disabled in the database.
         
-        if not discord_token or discord_token == 'your_discord_bot_token_here':
-            return False
+        Plugins without a row count as enabled.
         
-        # Check if at least one LLM provider is configured
-        providers = ['GEMINI_API_KEY', 'OPENAI_API_KEY', 'ANTHROPIC_API_KEY', 'OPENROUTER_API_KEY']
-        has_llm = any(
-            os.getenv(p) and os.getenv(p) != f'your_{p.lower()}'
-            for p in providers
-        )
+        Args:
+            plugin_names: Plugin names to check
+        
+        Returns:
+            Names of the disabled plugins
+        """
+        names = list(plugin_names)
+        disabled = set()
+        for i in range(0, len(names), _SQLITE_MAX_VARIABLES):
+            chunk = names[i:i + _SQLITE_MAX_VARIABLES]
+            placeholders = ",".join("?" * len(chunk))
+            with self._lock:
+                cursor = self._conn.execute(
+                    f"SELECT name FROM plugins WHERE enabled = 0 AND name IN ({placeholders})",
+                    chunk
+                )
+                disabled.update(row[0] for row in cursor.fetchall())
+        return disabled
+    
+    @staticmethod
+    def _utc_timestamp() -> str:
+        """Current time in the format SQLite's CURRENT_TIMESTAMP uses."""
+        return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+    
+    def log_usage(self, server_id: str, user_id: str, provider: str, model: str,
+                  tokens_used: int, cost_usd: float):
+        """
+        Queue a usage_stats row; written by the next flush_logs.
+        
+        Args:
+            server_id: Discord server ID
+            user_id: Discord user ID
+            provider: LLM provider name
+            model: Model identifier
+            tokens_used: Total tokens for the request
+            cost_usd: Estimated cost in USD
+        """
+        row = (server_id, user_id, provider, model, tokens_used, cost_usd, self._utc_timestamp())
+        with self._log_buf_lock:
+            self._usage_buf.append(row)
+            overflow = len(self._usage_buf) + len(self._tool_buf) >= LOG_BUFFER_MAX_ROWS
+        if overflow:
+            self.flush_logs()
+    
+    def log_tool_call(self, server_id: str, user_id: str, tool_name: str, parameters: str,
+                      result: str, success: bool, error_message: Optional[str] = None):
+        """
+        Queue a tool_calls row; written by the next flush_logs.
+        
+        Args:
+            server_id: Discord server ID
+            user_id: Discord user ID
+            tool_name: Name of the tool
+            parameters: JSON-encoded tool arguments
+            result: Tool result (truncated)
+            success: Whether the tool succeeded
+            error_message: Error message if the tool failed
+        """
+        row = (server_id, user_id, tool_name, parameters, result, 1 if success else 0,
+               error_message, self._utc_timestamp())
+        with self._log_buf_lock:
+            self._tool_buf.append(row)
+            overflow = len(self._usage_buf) + len(self._tool_buf) >= LOG_BUFFER_MAX_ROWS
+        if overflow:
+            self.flush_logs()
+    
+    def flush_logs(self):
+        """Write all buffered usage_stats and tool_calls rows in a single transaction."""
+        with self._log_buf_lock:
+            usage_rows, self._usage_buf = self._usage_buf, []
+            tool_rows, self._tool_buf = self._tool_buf, []
+        
+        if not usage_rows and not tool_rows:
+            return
+        
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN")
+                if usage_rows:
+                    self._conn.executemany(_INSERT_USAGE_SQL, usage_rows)
+                if tool_rows:
+                    self._conn.executemany(_INSERT_TOOL_CALL_SQL, tool_rows)
+                self._conn.execute("COMMIT")
+            except sqlite3.Error as e:
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+                logger.error(f"Failed to write {len(usage_rows) + len(tool_rows)} log rows: {e}")
+    
+    async def run_log_flusher(self, interval: float = 1.0):
+        """Flush buffered log rows every `interval` seconds until cancelled."""
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                await asyncio.to_thread(self.flush_logs)
+        finally:
+            self.flush_logs()
+    
+    def close(self):
+        """
+        Flush buffered logs and release this manager's database connection (call on shutdown).
+        
+        The shared connection stays open while other ConfigManagers for the
+        same database still use it.
+        """
+        if self._closed:
+            return
+        self.flush_logs()
+        self._closed = True
+        _release_connection(self.db_path)
+    
+    def is_configured(self) -> bool:
+        """Check if the bot has been configured."""
+        if self._is_configured is None:
+            env = os.environ
+            
+            # Check if essential values are set
+            discord_token = env.get('DISCORD_TOKEN')
+            
+            # Check if at least one LLM provider is configured
+            self._is_configured = bool(
+                discord_token and discord_token != _DISCORD_TOKEN_PLACEHOLDER
+                and any((v := env.get(p)) and v not in _PLACEHOLDERS for p in _PROVIDER_ENV)
+            )
         
-        return has_llm
+        return self._is_configured
     
     def _default_config(self) -> Dict[str, Any]:
         """Return default configuration."""
@@ -11,6 +11,14 @@ from src.utils.logger import setup_logger
 logger = setup_logger(__name__)
 
 
+def _to_anthropic_message(msg: Message) -> Dict[str, Any]:
+    """Convert a non-system message to Anthropic format."""
+    return {
+        'role': msg.role if msg.role != 'tool' else 'user',
+        'content': msg.content
+    }
+
+
 class AnthropicProvider(BaseLLMProvider):
     """Anthropic Claude API provider."""
     
@@ -20,6 +28,12 @@ class AnthropicProvider(BaseLLMProvider):
         'claude-3-sonnet-20240229': {'input': 3.0, 'output': 15.0},
         'claude-3-haiku-20240307': {'input': 0.25, 'output': 1.25},
     }
+    # (input, output) cost per single token, with Opus pricing as fallback
+    _COST_PER_TOKEN = {
+        m: (p['input'] / 1_000_000, p['output'] / 1_000_000)
+        for m, p in PRICING.items()
+    }
+    _DEFAULT_RATE = _COST_PER_TOKEN['claude-3-opus-20240229']
     
     def __init__(self, api_key: Optional[str] = None, **kwargs):
         """Initialize Anthropic provider."""
@@ -36,17 +50,12 @@ class AnthropicProvider(BaseLLMProvider):
         Convert internal Message format to Anthropic format.
         Returns (system_prompt, messages_list)
         """
-        system_prompt = ""
-        converted = []
-        
-        for msg in messages:
-            if msg.role == 'system':
-                system_prompt = msg.content
-            else:
-                converted.append({
-                    'role': msg.role if msg.role != 'tool' else 'user',
-                    'content': msg.content
-                })
+        # The last system message wins
+        system_prompt = next((m.content for m in reversed(messages) if m.role == 'system'), "")
+        converted = [
+            m.converted('anthropic', _to_anthropic_message)
+            for m in messages if m.role != 'system'
+        ]
         
         return system_prompt, converted
     
@@ -80,12 +89,9 @@ class AnthropicProvider(BaseLLMProvider):
             
             response = await self.client.messages.create(**params)
             
-            content = ""
-            if response.content:
-                content = " ".join([
-                    block.text for block in response.content 
-                    if hasattr(block, 'text')
-                ])
+            content = " ".join(filter(None, (
+                getattr(block, 'text', None) for block in response.content or ()
+            )))
             
             return LLMResponse(
                 content=content,
@@ -156,12 +162,6 @@ class AnthropicProvider(BaseLLMProvider):
     
     def estimate_cost(self, usage: Dict[str, int], model: str) -> float:
         """Estimate cost for Anthropic request."""
-        if model not in self.PRICING:
-            # Use Opus pricing as fallback
-            model = 'claude-3-opus-20240229'
-        
-        pricing = self.PRICING[model]
-        input_cost = (usage.get('prompt_tokens', 0) / 1_000_000) * pricing['input']
-        output_cost = (usage.get('completion_tokens', 0) / 1_000_000) * pricing['output']
-        
-        return input_cost + output_cost
+        input_rate, output_rate = self._COST_PER_TOKEN.get(model, self._DEFAULT_RATE)
+        return (usage.get('prompt_tokens', 0) * input_rate
+                + usage.get('completion_tokens', 0) * output_rate)
@@ -2,9 +2,13 @@
 Base LLM provider interface.
 All LLM providers must implement this interface for uniform usage.
 """
+import asyncio
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional, AsyncIterator
-from dataclasses import dataclass
+from types import MappingProxyType
+from typing import List, Dict, Any, Optional, AsyncIterator, Callable, Mapping, Union
+from dataclasses import dataclass, field
+
+import aiohttp
 
 
 @dataclass
@@ -15,6 +19,29 @@ class Message:
     name: Optional[str] = None
     tool_calls: Optional[List[Dict[str, Any]]] = None
     tool_call_id: Optional[str] = None
+    # Provider-specific converted forms, see converted()
+    _converted: Dict[tuple, Any] = field(default_factory=dict, init=False, repr=False, compare=False)
+    
+    def converted(self, provider: str, build: Callable[['Message'], Any]) -> Any:
+        """
+        Get this message in a provider's wire format, building it only once.
+        
+        Conversation history is re-sent every turn, so caching the converted
+        form makes conversion proportional to new messages only. The cache is
+        keyed on role and content, which are the fields that get edited in place.
+        
+        Args:
+            provider: Cache namespace (usually the provider name)
+            build: Function converting the message
+        
+        Returns:
+            Converted message (shared between calls; do not mutate)
+        """
+        key = (provider, self.role, self.content)
+        value = self._converted.get(key)
+        if value is None:
+            value = self._converted[key] = build(self)
+        return value
 
 
 @dataclass
@@ -30,6 +57,18 @@ class LLMResponse:
 class BaseLLMProvider(ABC):
     """Base class for all LLM providers."""
     
+    # aiohttp.TCPConnector options for the session returned by _get_session
+    _SESSION_CONNECTOR_OPTIONS: Mapping[str, Any] = MappingProxyType({
+        'limit': 100,
+        'limit_per_host': 100,
+        'ttl_dns_cache': 300,
+        'keepalive_timeout': 60
+    })
+    
+    # HTTP session shared by a provider's requests, and the event loop it belongs to
+    _session: Optional[aiohttp.ClientSession] = None
+    _session_loop: Optional[asyncio.AbstractEventLoop] = None
+    
     def __init__(self, api_key: str, **kwargs):
         """
         Initialize the LLM provider.
@@ -103,6 +142,172 @@ class BaseLLMProvider(ABC):
         """
         pass
     
+    async def collect_stream(
+        self,
+        messages: List[Message],
+        model: str,
+        **kwargs
+    ) -> str:
+        """
+        Stream a completion and return the full text.
+        
+        Chunks are gathered in a list and joined once, rather than
+        concatenated one by one.
+        
+        Args:
+            messages: List of messages in the conversation
+            model: Model identifier
+            **kwargs: Passed through to stream_complete()
+        
+        Returns:
+            Complete response text
+        """
+        chunks: List[str] = []
+        async for chunk in self.stream_complete(messages, model, **kwargs):
+            chunks.append(chunk)
+        return "".join(chunks)
+    
+    async def stream_complete_buffered(
+        self,
+        messages: List[Message],
+        model: str,
+        flush_bytes: int = 8192,
+        flush_ms: float = 25,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """
+        Stream a completion in batches instead of one chunk per token.
+        
+        Chunks are buffered and yielded together once flush_bytes characters
+        have accumulated or flush_ms has passed since the first buffered
+        chunk, whichever comes first. The underlying stream keeps being read
+        while a batch is being consumed.
+        
+        Args:
+            messages: List of messages in the conversation
+            model: Model identifier
+            flush_bytes: Buffered size that triggers a flush
+            flush_ms: Longest time a chunk waits in the buffer, in milliseconds
+            **kwargs: Passed through to stream_complete()
+        
+        Yields:
+            Batches of the response text
+        """
+        loop = asyncio.get_running_loop()
+        stream = self.stream_complete(messages, model, **kwargs)
+        buf: List[str] = []
+        size = 0
+        deadline = None
+        # The pending read is never cancelled on a flush timeout, since that would abort the stream
+        next_chunk = asyncio.ensure_future(stream.__anext__())
+        
+        try:
+            while True:
+                timeout = None if deadline is None else max(0.0, deadline - loop.time())
+                done, _ = await asyncio.wait((next_chunk,), timeout=timeout)
+                if not done:
+                    yield "".join(buf)
+                    buf.clear()
+                    size = 0
+                    deadline = None
+                    continue
+                
+                try:
+                    chunk = next_chunk.result()
+                except StopAsyncIteration:
+                    break
+                next_chunk = asyncio.ensure_future(stream.__anext__())
+                
+                buf.append(chunk)
+                size += len(chunk)
+                if deadline is None:
+                    deadline = loop.time() + flush_ms / 1000
+                if size >= flush_bytes:
+                    yield "".join(buf)
+                    buf.clear()
+                    size = 0
+                    deadline = None
+            
+            if buf:
+                yield "".join(buf)
+        finally:
+            if not next_chunk.done():
+                next_chunk.cancel()
+                await asyncio.wait((next_chunk,))
+            await stream.aclose()
+    
+    async def batch_complete(
+        self,
+        batch: List[List[Message]],
+        model: str,
+        max_concurrency: int = 32,
+        **kwargs
+    ) -> List[Union[LLMResponse, BaseException]]:
+        """
+        Run many independent completions with bounded concurrency.
+        
+        At most max_concurrency requests are in flight at once; as each one
+        finishes the next starts, so the provider's connection pool stays busy
+        without flooding the upstream API.
+        
+        Args:
+            batch: One message list per completion
+            model: Model identifier
+            max_concurrency: Maximum number of concurrent requests
+            **kwargs: Passed through to complete()
+        
+        Returns:
+            Responses in batch order; a failed completion is returned as its exception
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def run_one(messages: List[Message]) -> LLMResponse:
+            async with semaphore:
+                return await self.complete(messages, model, **kwargs)
+        
+        return await asyncio.gather(*(run_one(messages) for messages in batch), return_exceptions=True)
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """
+        Get the provider's HTTP session, creating it on first use.
+        
+        A session only works on the event loop it was created on, so it is
+        replaced when called from another loop; the old one is released
+        with _close_session.
+        """
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            await self._close_session()
+            connector = aiohttp.TCPConnector(**self._SESSION_CONNECTOR_OPTIONS)
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._session_loop = loop
+        return self._session
+    
+    async def _close_session(self):
+        """Close the session from _get_session, on whichever event loop owns it."""
+        session, loop = self._session, self._session_loop
+        self._session = self._session_loop = None
+        if session is None or session.closed:
+            return
+        
+        if loop is asyncio.get_running_loop():
+            await session.close()
+        elif loop is not None and not loop.is_closed():
+            asyncio.run_coroutine_threadsafe(session.close(), loop)
+        else:
+            # Its loop is gone, so the connections can't be closed cleanly;
+            # detach so the session isn't reported as unclosed
+            session.detach()
+    
+    async def close(self):
+        """
+        Release any resources held by the provider (HTTP sessions, clients).
+        
+        Closes the session from _get_session. Subclasses that hold other
+        long-lived connections should override this and call super().close().
+        """
+        await self._close_session()
+    
     def estimate_cost(self, usage: Dict[str, int], model: str) -> float:
         """
         Estimate the cost of a request in USD.
@@ -2,7 +2,8 @@
 Custom OpenAI-compatible API endpoint provider.
 """
 import os
-import aiohttp
+import orjson
+from types import MappingProxyType
 from typing import List, Dict, Optional
 from .base import BaseLLMProvider, Message, LLMResponse
 
@@ -10,6 +11,13 @@ from .base import BaseLLMProvider, Message, LLMResponse
 class CustomProvider(BaseLLMProvider):
     """Custom OpenAI-compatible API endpoint provider."""
     
+    _SESSION_CONNECTOR_OPTIONS = MappingProxyType({
+        'limit': 100,
+        'limit_per_host': 32,
+        'ttl_dns_cache': 300,
+        'keepalive_timeout': 75
+    })
+    
     def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None):
         """
         Initialize Custom provider.
@@ -65,39 +73,39 @@ class CustomProvider(BaseLLMProvider):
         if self.api_key:
             headers['Authorization'] = f'Bearer {self.api_key}'
         
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f'{self.base_url}/chat/completions',
-                json=payload,
-                headers=headers
-            ) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    raise Exception(f"Custom API error: {error_text}")
-                
-                data = await response.json()
-                
-                choice = data['choices'][0]
-                content = choice['message'].get('content', '')
-                finish_reason = choice.get('finish_reason', 'stop')
-                
-                # Handle tool calls if present
-                tool_calls = None
-                if 'tool_calls' in choice['message']:
-                    tool_calls = choice['message']['tool_calls']
-                
-                usage = data.get('usage', {})
-                
-                return LLMResponse(
-                    content=content,
-                    finish_reason=finish_reason,
-                    tool_calls=tool_calls,
-                    usage={
-                        'prompt_tokens': usage.get('prompt_tokens', 0),
-                        'completion_tokens': usage.get('completion_tokens', 0),
-                        'total_tokens': usage.get('total_tokens', 0)
-                    }
-                )
+        session = await self._get_session()
+        async with session.post(
+            f'{self.base_url}/chat/completions',
+            data=orjson.dumps(payload),
+            headers=headers
+        ) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                raise Exception(f"Custom API error: {error_text}")
+            
+            data = orjson.loads(await response.read())
+            
+            choice = data['choices'][0]
+            content = choice['message'].get('content', '')
+            finish_reason = choice.get('finish_reason', 'stop')
+            
+            # Handle tool calls if present
+            tool_calls = None
+            if 'tool_calls' in choice['message']:
+                tool_calls = choice['message']['tool_calls']
+            
+            usage = data.get('usage', {})
+            
+            return LLMResponse(
+                content=content,
+                finish_reason=finish_reason,
+                tool_calls=tool_calls,
+                usage={
+                    'prompt_tokens': usage.get('prompt_tokens', 0),
+                    'completion_tokens': usage.get('completion_tokens', 0),
+                    'total_tokens': usage.get('total_tokens', 0)
+                }
+            )
     
     def get_available_models(self) -> List[str]:
         """Get list of available models."""
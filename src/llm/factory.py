@@ -2,15 +2,10 @@
 LLM provider factory and manager.
 """
 import os
-from typing import Dict, Type, Optional
+import importlib
+import threading
+from typing import Dict, Type, Optional, Tuple, Union
 from .base import BaseLLMProvider
-from .openai_provider import OpenAIProvider
-from .anthropic_provider import AnthropicProvider
-from .ollama_provider import OllamaProvider
-from .openrouter_provider import OpenRouterProvider
-from .gemini_provider import GeminiProvider
-from .lmstudio_provider import LMStudioProvider
-from .custom_provider import CustomProvider
 from src.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -19,16 +14,22 @@ logger = setup_logger(__name__)
 class LLMProviderFactory:
     """Factory for creating LLM provider instances."""
     
-    _providers: Dict[str, Type[BaseLLMProvider]] = {
-        'gemini': GeminiProvider,
-        'openai': OpenAIProvider,
-        'anthropic': AnthropicProvider,
-        'ollama': OllamaProvider,
-        'openrouter': OpenRouterProvider,
-        'lmstudio': LMStudioProvider,
-        'custom': CustomProvider,
+    # Built-in providers are (module, class) pairs imported on first use so
+    # unused SDKs are never loaded; the resolved class replaces the entry.
+    _providers: Dict[str, Union[Type[BaseLLMProvider], Tuple[str, str]]] = {
+        'gemini': ('src.llm.gemini_provider', 'GeminiProvider'),
+        'openai': ('src.llm.openai_provider', 'OpenAIProvider'),
+        'anthropic': ('src.llm.anthropic_provider', 'AnthropicProvider'),
+        'ollama': ('src.llm.ollama_provider', 'OllamaProvider'),
+        'openrouter': ('src.llm.openrouter_provider', 'OpenRouterProvider'),
+        'lmstudio': ('src.llm.lmstudio_provider', 'LMStudioProvider'),
+        'custom': ('src.llm.custom_provider', 'CustomProvider'),
     }
     
+    # Shared instances: (provider_name, api_key, sorted kwargs) -> provider
+    _instances: Dict[tuple, BaseLLMProvider] = {}
+    _instances_lock = threading.Lock()
+    
     @classmethod
     def register_provider(cls, name: str, provider_class: Type[BaseLLMProvider]):
         """
@@ -39,8 +40,29 @@ class LLMProviderFactory:
             provider_class: Provider class
         """
         cls._providers[name] = provider_class
+        with cls._instances_lock:
+            for key in [k for k in cls._instances if k[0] == name]:
+                del cls._instances[key]
         logger.info(f"Registered LLM provider: {name}")
     
+    @classmethod
+    def _get_provider_class(cls, provider_name: str) -> Type[BaseLLMProvider]:
+        """
+        Resolve a provider class, importing its module on first use.
+        
+        Args:
+            provider_name: Name of the provider
+        
+        Returns:
+            Provider class
+        """
+        entry = cls._providers[provider_name]
+        if isinstance(entry, tuple):
+            module_path, class_name = entry
+            entry = getattr(importlib.import_module(module_path), class_name)
+            cls._providers[provider_name] = entry
+        return entry
+    
     @classmethod
     def create_provider(
         cls,
@@ -65,14 +87,63 @@ class LLMProviderFactory:
         if provider_name not in cls._providers:
             raise ValueError(f"Unknown provider: {provider_name}")
         
-        provider_class = cls._providers[provider_name]
-        
         try:
+            provider_class = cls._get_provider_class(provider_name)
             return provider_class(api_key=api_key, **kwargs)
         except Exception as e:
             logger.error(f"Failed to create provider {provider_name}: {e}")
             raise
     
+    @classmethod
+    def get_or_create_provider(
+        cls,
+        provider_name: str,
+        api_key: Optional[str] = None,
+        **kwargs
+    ) -> BaseLLMProvider:
+        """
+        Get a shared provider instance, creating it on first use.
+        
+        Reusing instances keeps their HTTP clients and connection pools warm.
+        Use create_provider for a fresh instance.
+        
+        Args:
+            provider_name: Name of the provider
+            api_key: API key (optional, will use environment variable if not provided)
+            **kwargs: Additional provider-specific parameters
+        
+        Returns:
+            Provider instance
+        
+        Raises:
+            ValueError: If provider is not registered
+        """
+        try:
+            key = (provider_name, api_key, tuple(sorted(kwargs.items())))
+            hash(key)
+        except TypeError:
+            # Unhashable kwargs can't be cached
+            return cls.create_provider(provider_name, api_key, **kwargs)
+        
+        with cls._instances_lock:
+            provider = cls._instances.get(key)
+            if provider is None:
+                provider = cls._instances[key] = cls.create_provider(provider_name, api_key, **kwargs)
+        return provider
+    
+    @classmethod
+    async def close_providers(cls):
+        """Close and forget all shared provider instances."""
+        with cls._instances_lock:
+            providers = list(cls._instances.values())
+            cls._instances.clear()
+        
+        for provider in providers:
+            try:
+                await provider.close()
+            except Exception as e:
+                logger.warning(f"Error closing LLM provider: {e}")
+    
     @classmethod
     def get_available_providers(cls) -> list[str]:
         """Get list of registered provider names."""
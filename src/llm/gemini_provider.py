@@ -2,7 +2,11 @@
 Google Gemini LLM provider implementation.
 """
 import os
-from typing import List, Dict, Any, Optional, AsyncIterator
+import re
+import json
+import orjson
+from collections import OrderedDict
+from typing import List, Dict, Any, Mapping, Optional, AsyncIterator
 import google.generativeai as genai
 import asyncio
 
@@ -11,17 +15,133 @@ from src.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# GenerativeModel instances kept per provider, see GeminiProvider._get_model
+MODEL_CACHE_SIZE = 64
+
+# Rendered tool descriptions kept per provider, see GeminiProvider._render_tools_suffix
+TOOLS_SUFFIX_CACHE_SIZE = 32
+
+_TOOL_CALL_HINT = (
+    "\nIf you want to call a tool, output ONLY a single JSON object containing a 'function' key with 'name' and 'arguments' fields, for example:\n"
+    "{\"function\": {\"name\": \"web_search\", \"arguments\": {\"query\": \"latest AI news\"}}}\n"
+)
+
+# JSON Schema keywords that only cost prompt tokens when describing tools to the model
+_STRIPPED_SCHEMA_KEYS = frozenset({'$schema', 'additionalProperties'})
+
+
+def _compact_schema(node: Any, property_map: bool = False) -> Any:
+    """
+    Return a copy of a JSON Schema without keywords in _STRIPPED_SCHEMA_KEYS.
+    
+    Args:
+        node: Schema (or part of one)
+        property_map: True when node is a 'properties' mapping, whose keys are
+            property names rather than keywords
+    
+    Returns:
+        Compacted copy of node
+    """
+    if isinstance(node, dict):
+        return {
+            k: _compact_schema(v, k == 'properties' and not property_map)
+            for k, v in node.items()
+            if property_map or k not in _STRIPPED_SCHEMA_KEYS
+        }
+    if isinstance(node, list):
+        return [_compact_schema(v) for v in node]
+    return node
+
+
+# Internal role -> Gemini chat role; system messages become the system instruction.
+# Tool outputs stay tool messages so Gemini sees the results in the next reply.
+_ROLE_MAP = {'user': 'user', 'assistant': 'model', 'tool': 'tool'}
+
+
+def _to_gemini_message(msg: Message) -> Dict[str, Any]:
+    """Convert a non-system message to Gemini chat history format."""
+    return {'role': _ROLE_MAP[msg.role], 'parts': [msg.content or '']}
+
+
+# Candidate starts of a JSON object embedded in model output
+_JSON_OBJECT_START_RE = re.compile(r'\{\s*"')
+_JSON_DECODER = json.JSONDecoder()
+
+
+def _find_tool_call_json(content: str) -> Optional[Dict[str, Any]]:
+    """
+    Find the first JSON object in text that looks like a tool call.
+    
+    Each candidate is decoded in place, so only the object itself is
+    parsed and nested arguments are handled correctly.
+    
+    Args:
+        content: Model output text
+    
+    Returns:
+        Parsed object with a 'function', 'tool' or 'name' key, or None
+    """
+    for match in _JSON_OBJECT_START_RE.finditer(content):
+        try:
+            parsed, _ = _JSON_DECODER.raw_decode(content, match.start())
+        except ValueError:
+            continue
+        if isinstance(parsed, dict) and ('function' in parsed or 'tool' in parsed or 'name' in parsed):
+            return parsed
+    return None
+
+
+def _normalize_tool_calls(raw_calls: Any) -> List[Dict[str, Any]]:
+    """
+    Convert tool calls from an SDK response into the OpenAI-style dict shape.
+    
+    Args:
+        raw_calls: Tool call objects (with a 'function' attribute) or mappings
+    
+    Returns:
+        Normalized tool calls; entries in neither shape are skipped
+    """
+    tool_calls = []
+    for tc in raw_calls:
+        fn = getattr(tc, 'function', None)
+        if fn is not None:
+            tool_calls.append({
+                'id': getattr(tc, 'id', None),
+                'type': getattr(tc, 'type', None),
+                'function': {
+                    'name': getattr(fn, 'name', None),
+                    'arguments': getattr(fn, 'arguments', None)
+                }
+            })
+        elif isinstance(tc, Mapping):
+            # Fallback dict-like
+            tool_calls.append(dict(tc))
+    return tool_calls
+
 
 class GeminiProvider(BaseLLMProvider):
     """Google Gemini API provider."""
     
-    # Pricing per 1M tokens (as of 2024)
+    # Pricing per 1M tokens (as of 2024); cached_input applies to context-cache hits
+    # (1.5 models bill them at 25% of input, older models have no context caching)
     PRICING = {
-        'gemini-pro': {'input': 0.5, 'output': 1.5},
-        'gemini-pro-vision': {'input': 0.5, 'output': 1.5},
-        'gemini-1.5-pro': {'input': 3.5, 'output': 10.5},
-        'gemini-1.5-flash': {'input': 0.35, 'output': 1.05},
+        'gemini-pro': {'input': 0.5, 'output': 1.5, 'cached_input': 0.5},
+        'gemini-pro-vision': {'input': 0.5, 'output': 1.5, 'cached_input': 0.5},
+        'gemini-1.5-pro': {'input': 3.5, 'output': 10.5, 'cached_input': 0.875},
+        'gemini-1.5-flash': {'input': 0.35, 'output': 1.05, 'cached_input': 0.0875},
     }
+    # (input, output, cached input) cost per single token, with gemini-1.5-flash as fallback
+    _COST_PER_TOKEN = {
+        m: (p['input'] / 1_000_000, p['output'] / 1_000_000, p['cached_input'] / 1_000_000)
+        for m, p in PRICING.items()
+    }
+    _DEFAULT_RATE = _COST_PER_TOKEN['gemini-1.5-flash']
+    
+    _AVAILABLE_MODELS: tuple[str, ...] = (
+        'gemini-1.5-flash',  # Recommended - fast and cheap
+        'gemini-1.5-pro',
+        'gemini-pro',
+    )
     
     def __init__(self, api_key: Optional[str] = None, **kwargs):
         """Initialize Gemini provider."""
@@ -31,39 +151,86 @@ class GeminiProvider(BaseLLMProvider):
         
         super().__init__(api_key, **kwargs)
         genai.configure(api_key=api_key)
+        
+        # (model, system_instruction, temperature, max_tokens) -> GenerativeModel, in LRU order
+        self._model_cache: OrderedDict[tuple, genai.GenerativeModel] = OrderedDict()
+        # id(tools) -> (tools, rendered suffix); holding the list keeps its id from being reused
+        self._tools_suffix_cache: OrderedDict[int, tuple] = OrderedDict()
         logger.info("Gemini provider initialized")
     
-    def _convert_messages(self, messages: List[Message]) -> tuple[str, List[Dict[str, str]]]:
+    def _get_model(
+        self,
+        model: str,
+        system_instruction: Optional[str],
+        temperature: float,
+        max_tokens: int
+    ) -> genai.GenerativeModel:
+        """Get a GenerativeModel for these settings, reusing a cached instance when possible."""
+        key = (model, system_instruction, temperature, max_tokens)
+        model_instance = self._model_cache.get(key)
+        if model_instance is not None:
+            self._model_cache.move_to_end(key)
+            return model_instance
+        
+        model_instance = genai.GenerativeModel(
+            model_name=model,
+            generation_config={
+                'temperature': temperature,
+                'max_output_tokens': max_tokens,
+            },
+            system_instruction=system_instruction
+        )
+        self._model_cache[key] = model_instance
+        if len(self._model_cache) > MODEL_CACHE_SIZE:
+            self._model_cache.popitem(last=False)
+        return model_instance
+    
+    def _render_tools_suffix(self, tools: List[Dict[str, Any]]) -> str:
+        """
+        Render the tool list appended to the system instruction.
+        
+        The bot passes the same list for every round of a tool-calling
+        exchange, so the rendered text is cached per list object. The text
+        is re-sent with every request, so it is kept as compact as possible.
+        
+        Args:
+            tools: Tool definitions
+        
+        Returns:
+            Text describing the tools and the JSON call format
+        """
+        cached = self._tools_suffix_cache.get(id(tools))
+        if cached is not None and cached[0] is tools:
+            self._tools_suffix_cache.move_to_end(id(tools))
+            return cached[1]
+        
+        # Compact UTF-8 JSON: no separator padding or \u escapes to spend tokens on
+        tools_desc = orjson.dumps([{ 'name': t.get('name') or t.get('id') or t.get('function', {}).get('name'), 'description': t.get('description', ''), 'parameters': _compact_schema(t.get('parameters', {})) } for t in tools]).decode()
+        suffix = "\n\nAvailable tools (JSON): " + tools_desc + _TOOL_CALL_HINT
+        logger.debug(f"Rendered {len(tools)} tools into a {len(suffix)}-character system instruction suffix")
+        
+        self._tools_suffix_cache[id(tools)] = (tools, suffix)
+        if len(self._tools_suffix_cache) > TOOLS_SUFFIX_CACHE_SIZE:
+            self._tools_suffix_cache.popitem(last=False)
+        return suffix
+    
+    def _convert_messages(self, messages: List[Message]) -> tuple[str, List[Dict[str, Any]], str]:
         """
         Convert internal Message format to Gemini format.
-        Returns (system_instruction, chat_history)
+        Returns (system_instruction, history, last_part), where history holds
+        every chat message except the last and last_part is the text to send.
         """
         system_instruction = ""
-        chat_history = []
+        history = []
         
         for msg in messages:
-            if msg.role == 'system':
+            if msg.role in _ROLE_MAP:
+                history.append(msg.converted('gemini', _to_gemini_message))
+            elif msg.role == 'system':
                 system_instruction = msg.content
-            elif msg.role == 'user':
-                chat_history.append({
-                    'role': 'user',
-                    'parts': [msg.content]
-                })
-            elif msg.role == 'assistant':
-                chat_history.append({
-                    'role': 'model',
-                    'parts': [msg.content]
-                })
-            elif msg.role == 'tool':
-                # Represent tool outputs as tool messages so Gemini sees the results
-                # and can incorporate them into the next reply. Prefix content if not already prefixed.
-                content = msg.content or ''
-                chat_history.append({
-                    'role': 'tool',
-                    'parts': [content]
-                })
         
-        return system_instruction, chat_history
+        last_part = history.pop()['parts'][0] if history else ""
+        return system_instruction, history, last_part
     
     async def complete(
         self,
@@ -76,13 +243,7 @@ class GeminiProvider(BaseLLMProvider):
     ) -> LLMResponse:
         """Get completion from Gemini."""
         try:
-            system_instruction, chat_history = self._convert_messages(messages)
-            
-            # Create model
-            generation_config = {
-                'temperature': temperature,
-                'max_output_tokens': max_tokens,
-            }
+            system_instruction, history, last_part = self._convert_messages(messages)
             
             # If tools are provided, inject a brief machine-readable description into the system instruction
             # so Gemini knows about available tools and how to request them. We keep this short to avoid
@@ -90,53 +251,40 @@ class GeminiProvider(BaseLLMProvider):
             system_instr = system_instruction or ""
             if tools:
                 try:
-                    import json
-                    tools_desc = json.dumps([{ 'name': t.get('name') or t.get('id') or t.get('function', {}).get('name'), 'description': t.get('description', ''), 'parameters': t.get('parameters', {}) } for t in tools])
-                    system_instr += (
-                        "\n\nAvailable tools (JSON): " + tools_desc +
-                        "\nIf you want to call a tool, output ONLY a single JSON object containing a 'function' key with 'name' and 'arguments' fields, for example:\n"
-                        "{\"function\": {\"name\": \"web_search\", \"arguments\": {\"query\": \"latest AI news\"}}}\n"
-                    )
+                    system_instr += self._render_tools_suffix(tools)
                 except Exception:
                     # fall back silently if tools can't be serialized
                     pass
 
-            model_instance = genai.GenerativeModel(
-                model_name=model,
-                generation_config=generation_config,
-                system_instruction=system_instr if system_instr else None
-            )
+            model_instance = self._get_model(model, system_instr or None, temperature, max_tokens)
             
-            # Start chat or single message
-            if len(chat_history) > 1:
-                chat = model_instance.start_chat(history=chat_history[:-1])
-                response = await asyncio.to_thread(
-                    chat.send_message,
-                    chat_history[-1]['parts'][0]
-                )
+            # Start chat or single message. The SDK's *_async methods share one
+            # process-wide gRPC client bound to the first event loop that uses it,
+            # and this provider is called from several loops (bot, dashboard), so
+            # the blocking calls are run in a worker thread instead.
+            if history:
+                chat = model_instance.start_chat(history=history)
+                response = await asyncio.to_thread(chat.send_message, last_part)
             else:
-                prompt = chat_history[0]['parts'][0] if chat_history else ""
-                response = await asyncio.to_thread(
-                    model_instance.generate_content,
-                    prompt
-                )
+                response = await asyncio.to_thread(model_instance.generate_content, last_part)
             
             # Extract usage info
-            try:
-                prompt_tokens = response.usage_metadata.prompt_token_count
-                completion_tokens = response.usage_metadata.candidates_token_count
-                total_tokens = response.usage_metadata.total_token_count
-            except Exception:
-                prompt_tokens = 0
-                completion_tokens = 0
-                total_tokens = 0
+            usage_metadata = getattr(response, 'usage_metadata', None)
+            if usage_metadata is not None:
+                prompt_tokens = getattr(usage_metadata, 'prompt_token_count', 0)
+                completion_tokens = getattr(usage_metadata, 'candidates_token_count', 0)
+                total_tokens = getattr(usage_metadata, 'total_token_count', 0)
+                cached_tokens = getattr(usage_metadata, 'cached_content_token_count', 0) or 0
+            else:
+                prompt_tokens = completion_tokens = total_tokens = cached_tokens = 0
+
+            candidates = getattr(response, 'candidates', None)
 
             # Normalize content
             content = getattr(response, 'text', None)
             if not content:
                 # Try common alternative locations
-                candidates = getattr(response, 'candidates', None)
-                if candidates and len(candidates) > 0:
+                if candidates:
                     # candidate may have 'content' or 'text'
                     c = candidates[0]
                     content = getattr(c, 'content', None) or getattr(c, 'text', None) or ''
@@ -147,74 +295,30 @@ class GeminiProvider(BaseLLMProvider):
             tool_calls = None
 
             # 1) Native field on response (if present)
-            if hasattr(response, 'tool_calls') and getattr(response, 'tool_calls'):
-                tool_calls = []
-                for tc in response.tool_calls:
-                    try:
-                        fn = getattr(tc, 'function', None)
-                        if fn is not None:
-                            tool_calls.append({
-                                'id': getattr(tc, 'id', None),
-                                'type': getattr(tc, 'type', None),
-                                'function': {
-                                    'name': getattr(fn, 'name', None),
-                                    'arguments': getattr(fn, 'arguments', None)
-                                }
-                            })
-                        else:
-                            # Fallback dict-like
-                            tool_calls.append(dict(tc))
-                    except Exception:
-                        continue
+            native_calls = getattr(response, 'tool_calls', None)
+            if native_calls:
+                tool_calls = _normalize_tool_calls(native_calls)
 
             # 2) Candidates may include tool_calls
-            if not tool_calls:
-                candidates = getattr(response, 'candidates', None)
-                if candidates:
-                    for c in candidates:
-                        tc_attr = getattr(c, 'tool_calls', None) or (getattr(c, 'message', None) and getattr(c.message, 'tool_calls', None))
-                        if tc_attr:
-                            tool_calls = []
-                            for tc in tc_attr:
-                                try:
-                                    fn = getattr(tc, 'function', None)
-                                    if fn is not None:
-                                        tool_calls.append({
-                                            'id': getattr(tc, 'id', None),
-                                            'type': getattr(tc, 'type', None),
-                                            'function': {
-                                                'name': getattr(fn, 'name', None),
-                                                'arguments': getattr(fn, 'arguments', None)
-                                            }
-                                        })
-                                    else:
-                                        tool_calls.append(dict(tc))
-                                except Exception:
-                                    continue
-                            break
+            if not tool_calls and candidates:
+                for c in candidates:
+                    message = getattr(c, 'message', None)
+                    tc_attr = getattr(c, 'tool_calls', None) or getattr(message, 'tool_calls', None)
+                    if tc_attr:
+                        tool_calls = _normalize_tool_calls(tc_attr)
+                        break
 
             # 3) As a last resort try to parse JSON embedded in the text (models sometimes emit a JSON tool call)
             if not tool_calls and content:
-                import json
-                try:
-                    # Find first JSON object in the text
-                    start = content.find('{')
-                    end = content.rfind('}')
-                    if start != -1 and end != -1 and end > start:
-                        maybe_json = content[start:end+1]
-                        parsed = json.loads(maybe_json)
-                        # Heuristics: look for either 'function' or 'tool' keys
-                        if isinstance(parsed, dict) and ('function' in parsed or 'tool' in parsed or 'name' in parsed):
-                            # Normalize into tool_calls structure
-                            fn_obj = parsed.get('function') or {'name': parsed.get('tool') or parsed.get('name'), 'arguments': parsed.get('arguments') or parsed.get('args')}
-                            tool_calls = [{
-                                'id': parsed.get('id'),
-                                'type': parsed.get('type'),
-                                'function': fn_obj
-                            }]
-                except Exception:
-                    # ignore JSON parse errors
-                    pass
+                parsed = _find_tool_call_json(content)
+                if parsed is not None:
+                    # Normalize into tool_calls structure
+                    fn_obj = parsed.get('function') or {'name': parsed.get('tool') or parsed.get('name'), 'arguments': parsed.get('arguments') or parsed.get('args')}
+                    tool_calls = [{
+                        'id': parsed.get('id'),
+                        'type': parsed.get('type'),
+                        'function': fn_obj
+                    }]
 
             return LLMResponse(
                 content=content,
@@ -222,7 +326,8 @@ class GeminiProvider(BaseLLMProvider):
                 usage={
                     'prompt_tokens': prompt_tokens,
                     'completion_tokens': completion_tokens,
-                    'total_tokens': total_tokens
+                    'total_tokens': total_tokens,
+                    'cached_tokens': cached_tokens
                 },
                 tool_calls=tool_calls,
                 finish_reason='stop'
@@ -243,35 +348,22 @@ class GeminiProvider(BaseLLMProvider):
     ) -> AsyncIterator[str]:
         """Stream completion from Gemini."""
         try:
-            system_instruction, chat_history = self._convert_messages(messages)
+            system_instruction, history, last_part = self._convert_messages(messages)
             
-            generation_config = {
-                'temperature': temperature,
-                'max_output_tokens': max_tokens,
-            }
-            
-            model_instance = genai.GenerativeModel(
-                model_name=model,
-                generation_config=generation_config,
-                system_instruction=system_instruction if system_instruction else None
-            )
+            model_instance = self._get_model(model, system_instruction or None, temperature, max_tokens)
             
-            if len(chat_history) > 1:
-                chat = model_instance.start_chat(history=chat_history[:-1])
-                response = await asyncio.to_thread(
-                    chat.send_message,
-                    chat_history[-1]['parts'][0],
-                    stream=True
-                )
+            # Blocking SDK calls in a worker thread, see complete()
+            if history:
+                chat = model_instance.start_chat(history=history)
+                response = await asyncio.to_thread(chat.send_message, last_part, stream=True)
             else:
-                prompt = chat_history[0]['parts'][0] if chat_history else ""
                 response = await asyncio.to_thread(
-                    model_instance.generate_content,
-                    prompt,
-                    stream=True
+                    model_instance.generate_content, last_part, stream=True
                 )
             
-            for chunk in response:
+            # Fetch each chunk off the event loop too; the iterator blocks on the network
+            chunks = iter(response)
+            while (chunk := await asyncio.to_thread(next, chunks, None)) is not None:
                 if chunk.text:
                     yield chunk.text
         
@@ -281,20 +373,13 @@ class GeminiProvider(BaseLLMProvider):
     
     def get_available_models(self) -> List[str]:
         """Get available Gemini models."""
-        return [
-            'gemini-1.5-flash',  # Recommended - fast and cheap
-            'gemini-1.5-pro',
-            'gemini-pro',
-        ]
+        return list(self._AVAILABLE_MODELS)
     
     def estimate_cost(self, usage: Dict[str, int], model: str) -> float:
         """Estimate cost for Gemini request."""
-        # Default to gemini-1.5-flash if model not in pricing
-        if model not in self.PRICING:
-            model = 'gemini-1.5-flash'
-        
-        pricing = self.PRICING.get(model, self.PRICING['gemini-1.5-flash'])
-        input_cost = (usage.get('prompt_tokens', 0) / 1_000_000) * pricing['input']
-        output_cost = (usage.get('completion_tokens', 0) / 1_000_000) * pricing['output']
-        
-        return input_cost + output_cost
+        input_rate, output_rate, cached_rate = self._COST_PER_TOKEN.get(model, self._DEFAULT_RATE)
+        # Cached prompt tokens are included in prompt_tokens but billed at the cached rate
+        cached = usage.get('cached_tokens', 0)
+        return ((usage.get('prompt_tokens', 0) - cached) * input_rate
+                + cached * cached_rate
+                + usage.get('completion_tokens', 0) * output_rate)
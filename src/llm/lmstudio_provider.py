@@ -2,14 +2,22 @@
 LM Studio provider implementation.
 """
 import os
-import aiohttp
+import orjson
 from typing import List, Dict, Optional
 from .base import BaseLLMProvider, Message, LLMResponse
 
 
+def _to_chat_message(msg: Message) -> Dict[str, str]:
+    """Convert a message to OpenAI-style chat format."""
+    return {'role': msg.role, 'content': msg.content}
+
+
 class LMStudioProvider(BaseLLMProvider):
     """LM Studio local server provider."""
     
+    # LM Studio uses whatever model is loaded
+    _AVAILABLE_MODELS: tuple[str, ...] = ('local-model', 'lmstudio')
+    
     def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None):
         """
         Initialize LM Studio provider.
@@ -43,12 +51,7 @@ class LMStudioProvider(BaseLLMProvider):
             LLM response
         """
         # Convert messages to OpenAI format
-        formatted_messages = []
-        for msg in messages:
-            formatted_messages.append({
-                'role': msg.role,
-                'content': msg.content
-            })
+        formatted_messages = [msg.converted('lmstudio', _to_chat_message) for msg in messages]
         
         payload = {
             'model': model,
@@ -57,34 +60,36 @@ class LMStudioProvider(BaseLLMProvider):
             'max_tokens': max_tokens
         }
         
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f'{self.base_url}/chat/completions',
-                json=payload,
-                headers={'Content-Type': 'application/json'}
-            ) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    raise Exception(f"LM Studio API error: {error_text}")
-                
-                data = await response.json()
-                
-                choice = data['choices'][0]
-                content = choice['message']['content']
-                finish_reason = choice.get('finish_reason', 'stop')
-                
-                usage = data.get('usage', {})
-                
-                return LLMResponse(
-                    content=content,
-                    model=model,
-                    finish_reason=finish_reason,
-                    usage={
-                        'prompt_tokens': usage.get('prompt_tokens', 0),
-                        'completion_tokens': usage.get('completion_tokens', 0),
-                        'total_tokens': usage.get('total_tokens', 0)
-                    }
-                )
+        session = await self._get_session()
+        async with session.post(
+            f'{self.base_url}/chat/completions',
+            data=orjson.dumps(payload),
+            headers={'Content-Type': 'application/json'}
+        ) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                raise Exception(f"LM Studio API error: {error_text}")
+            
+            data = orjson.loads(await response.read())
+            
+            choice = data['choices'][0]
+            content = choice['message']['content']
+            finish_reason = choice.get('finish_reason', 'stop')
+            
+            usage = data.get('usage', {})
+            
+            return LLMResponse(
+                content=content,
+                model=model,
+                finish_reason=finish_reason,
+                usage={
+                    'prompt_tokens': usage.get('prompt_tokens', 0),
+                    'completion_tokens': usage.get('completion_tokens', 0),
+                    'total_tokens': usage.get('total_tokens', 0),
+                    # OpenAI-compatible prompt cache hits, when the server reports them
+                    'cached_tokens': (usage.get('prompt_tokens_details') or {}).get('cached_tokens', 0)
+                }
+            )
 
     async def stream_complete(
         self,
@@ -108,8 +113,7 @@ class LMStudioProvider(BaseLLMProvider):
     
     def get_available_models(self) -> List[str]:
         """Get list of available models."""
-        # LM Studio uses whatever model is loaded
-        return ['local-model', 'lmstudio']
+        return list(self._AVAILABLE_MODELS)
     
     def estimate_cost(self, usage: Dict, model: str) -> float:
         """Estimate cost (LM Studio is free)."""
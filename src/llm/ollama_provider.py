@@ -2,7 +2,7 @@
 Ollama LLM provider implementation (local models).
 """
 import os
-import json
+import orjson
 from typing import List, Dict, Any, Optional, AsyncIterator
 import aiohttp
 
@@ -11,25 +11,40 @@ from src.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+_JSON_HEADERS = {'Content-Type': 'application/json'}
+
+
+def _to_chat_message(msg: Message) -> Dict[str, str]:
+    """Convert a message to OpenAI-style chat format."""
+    return {'role': msg.role, 'content': msg.content}
+
 
 class OllamaProvider(BaseLLMProvider):
     """Ollama local LLM provider."""
     
+    # Common Ollama models
+    _AVAILABLE_MODELS: tuple[str, ...] = (
+        'llama2',
+        'llama2:13b',
+        'llama2:70b',
+        'mistral',
+        'mixtral',
+        'codellama',
+        'phi',
+        'neural-chat',
+        'starling-lm'
+    )
+    
     def __init__(self, api_key: Optional[str] = None, base_url: str = "http://localhost:11434", **kwargs):
         """Initialize Ollama provider."""
         super().__init__(api_key or "not-required", **kwargs)
         self.base_url = base_url.rstrip('/')
+        
         logger.info(f"Ollama provider initialized (base_url: {self.base_url})")
     
     def _convert_messages(self, messages: List[Message]) -> List[Dict[str, str]]:
         """Convert internal Message format to Ollama format."""
-        converted = []
-        for msg in messages:
-            converted.append({
-                'role': msg.role,
-                'content': msg.content
-            })
-        return converted
+        return [msg.converted('ollama', _to_chat_message) for msg in messages]
     
     async def complete(
         self,
@@ -54,20 +69,21 @@ class OllamaProvider(BaseLLMProvider):
                 }
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=payload) as response:
-                    data = await response.json()
-                    
-                    return LLMResponse(
-                        content=data.get('message', {}).get('content', ''),
-                        model=model,
-                        usage={
-                            'prompt_tokens': data.get('prompt_eval_count', 0),
-                            'completion_tokens': data.get('eval_count', 0),
-                            'total_tokens': data.get('prompt_eval_count', 0) + data.get('eval_count', 0)
-                        },
-                        finish_reason='stop'
-                    )
+            session = await self._get_session()
+            async with session.post(url, data=orjson.dumps(payload), headers=_JSON_HEADERS) as response:
+                await self._raise_for_status(response)
+                data = orjson.loads(await response.read())
+                
+                return LLMResponse(
+                    content=data.get('message', {}).get('content', ''),
+                    model=model,
+                    usage={
+                        'prompt_tokens': data.get('prompt_eval_count', 0),
+                        'completion_tokens': data.get('eval_count', 0),
+                        'total_tokens': data.get('prompt_eval_count', 0) + data.get('eval_count', 0)
+                    },
+                    finish_reason='stop'
+                )
         
         except Exception as e:
             logger.error(f"Ollama API error: {e}")
@@ -96,32 +112,46 @@ class OllamaProvider(BaseLLMProvider):
                 }
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=payload) as response:
-                    async for line in response.content:
-                        if line:
-                            data = json.loads(line)
-                            if 'message' in data and 'content' in data['message']:
-                                yield data['message']['content']
+            session = await self._get_session()
+            async with session.post(url, data=orjson.dumps(payload), headers=_JSON_HEADERS) as response:
+                await self._raise_for_status(response)
+                
+                # NDJSON: split frames ourselves and keep any partial line for the next chunk
+                buf = b''
+                async for chunk in response.content.iter_any():
+                    buf += chunk
+                    *lines, buf = buf.split(b'\n')
+                    for line in lines:
+                        content = self._parse_stream_line(line)
+                        if content:
+                            yield content
+                
+                content = self._parse_stream_line(buf)
+                if content:
+                    yield content
         
         except Exception as e:
             logger.error(f"Ollama streaming error: {e}")
             raise
     
+    @staticmethod
+    async def _raise_for_status(response: aiohttp.ClientResponse):
+        """Raise with the server's error text instead of trying to parse an error body as JSON."""
+        if response.status >= 400:
+            error_text = await response.text()
+            raise Exception(f"Ollama API error {response.status}: {error_text[:512]}")
+    
+    @staticmethod
+    def _parse_stream_line(line: bytes) -> Optional[str]:
+        """Extract the content delta from one NDJSON stream line."""
+        if not line.strip():
+            return None
+        message = orjson.loads(line).get('message')
+        return message.get('content') if message else None
+    
     def get_available_models(self) -> List[str]:
         """Get available Ollama models."""
-        # Common Ollama models
-        return [
-            'llama2',
-            'llama2:13b',
-            'llama2:70b',
-            'mistral',
-            'mixtral',
-            'codellama',
-            'phi',
-            'neural-chat',
-            'starling-lm'
-        ]
+        return list(self._AVAILABLE_MODELS)
     
     def estimate_cost(self, usage: Dict[str, int], model: str) -> float:
         """Estimate cost for Ollama (free, local)."""
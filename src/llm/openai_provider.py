@@ -2,7 +2,16 @@
 OpenAI LLM provider implementation.
 """
 import os
-from typing import List, Dict, Any, Optional, AsyncIterator
+import time
+import asyncio
+import uuid
+import hashlib
+from collections import OrderedDict
+from dataclasses import replace
+from types import MappingProxyType
+from typing import List, Dict, Any, Mapping, Optional, AsyncIterator, Tuple
+import orjson
+import httpx
 import openai
 from openai import AsyncOpenAI
 
@@ -11,18 +20,107 @@ from src.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Local cache of near-deterministic completions, see OpenAIProvider.complete
+RESPONSE_CACHE_SIZE = 100
+RESPONSE_CACHE_TTL = 60.0  # seconds
+RESPONSE_CACHE_MAX_TEMPERATURE = 0.1
 
-class OpenAIProvider(BaseLLMProvider):
-    """OpenAI API provider."""
+# Connection pool limits for the shared clients, see _get_shared_client
+CLIENT_MAX_CONNECTIONS = 100
+CLIENT_MAX_KEEPALIVE_CONNECTIONS = 50
+
+# (api_key, base_url, event loop) -> client shared by all provider instances
+_client_cache: Dict[Tuple[str, Optional[str], asyncio.AbstractEventLoop], AsyncOpenAI] = {}
+
+# Pricing in integer micro-USD per 1K tokens (as of 2024): (input, output)
+_PRICING_MICRO: Mapping[str, Tuple[int, int]] = MappingProxyType({
+    'gpt-4-turbo-preview': (10_000, 30_000),
+    'gpt-4': (30_000, 60_000),
+    'gpt-4-32k': (60_000, 120_000),
+    'gpt-3.5-turbo': (500, 1_500),
+    'gpt-3.5-turbo-16k': (1_000, 2_000),
+})
+# GPT-4 pricing is the fallback for unknown models
+_DEFAULT_PRICING_MICRO = _PRICING_MICRO['gpt-4']
+
+
+def _get_shared_client(api_key: str, base_url: Optional[str] = None) -> AsyncOpenAI:
+    """
+    Get the AsyncOpenAI client for these credentials on the running event loop.
     
-    # Pricing per 1K tokens (as of 2024)
-    PRICING = {
-        'gpt-4-turbo-preview': {'input': 0.01, 'output': 0.03},
-        'gpt-4': {'input': 0.03, 'output': 0.06},
-        'gpt-4-32k': {'input': 0.06, 'output': 0.12},
-        'gpt-3.5-turbo': {'input': 0.0005, 'output': 0.0015},
-        'gpt-3.5-turbo-16k': {'input': 0.001, 'output': 0.002},
+    Provider instances with the same key and base URL share one client and
+    its connection pool. Pooled connections cannot outlive their event loop,
+    so clients are kept per loop and dropped once their loop is closed.
+    """
+    loop = asyncio.get_running_loop()
+    key = (api_key, base_url, loop)
+    client = _client_cache.get(key)
+    if client is None:
+        for stale in [k for k in _client_cache if k[2].is_closed()]:
+            del _client_cache[stale]
+        client = _client_cache[key] = AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=CLIENT_MAX_CONNECTIONS,
+                    max_keepalive_connections=CLIENT_MAX_KEEPALIVE_CONNECTIONS
+                ),
+                timeout=openai.DEFAULT_TIMEOUT,
+                follow_redirects=True
+            )
+        )
+    return client
+
+
+def _to_openai_message(msg: Message) -> Dict[str, Any]:
+    """Convert a message to OpenAI chat format."""
+    openai_msg = {
+        'role': msg.role,
+        'content': msg.content
+    }
+    if msg.name:
+        openai_msg['name'] = msg.name
+    if msg.tool_calls:
+        openai_msg['tool_calls'] = msg.tool_calls
+    if msg.tool_call_id:
+        openai_msg['tool_call_id'] = msg.tool_call_id
+    return openai_msg
+
+
+def _tool_call_to_dict(tc: Any) -> Dict[str, Any]:
+    """Convert an SDK tool call object to a plain dictionary."""
+    function = tc.function
+    return {
+        'id': tc.id,
+        'type': tc.type,
+        'function': {
+            'name': function.name,
+            'arguments': function.arguments
+        }
+    }
+
+
+def _usage_to_dict(usage: Any) -> Dict[str, int]:
+    """Convert an SDK usage object (or None) to a token count dictionary."""
+    return {
+        'prompt_tokens': getattr(usage, 'prompt_tokens', 0) or 0,
+        'completion_tokens': getattr(usage, 'completion_tokens', 0) or 0,
+        'total_tokens': getattr(usage, 'total_tokens', 0) or 0
     }
+
+
+def _add_no_cache_headers(params: Dict[str, Any]):
+    """Add a unique request ID and no-cache headers so the request bypasses prompt caching."""
+    params['extra_headers'] = {
+        **params.get('extra_headers', {}),
+        'X-Request-ID': str(uuid.uuid4()),
+        'Cache-Control': 'no-cache, no-store, must-revalidate'
+    }
+
+
+class OpenAIProvider(BaseLLMProvider):
+    """OpenAI API provider."""
     
     def __init__(self, api_key: Optional[str] = None, **kwargs):
         """Initialize OpenAI provider."""
@@ -31,27 +129,39 @@ class OpenAIProvider(BaseLLMProvider):
             raise ValueError("OpenAI API key not provided")
         
         super().__init__(api_key, **kwargs)
-        self.client = AsyncOpenAI(api_key=api_key)
+        self.base_url: Optional[str] = None  # None means the SDK default
+        
+        # Request hash -> (expiry, response), in LRU order
+        self._response_cache: OrderedDict[str, Tuple[float, LLMResponse]] = OrderedDict()
         logger.info("OpenAI provider initialized")
     
+    @property
+    def client(self) -> AsyncOpenAI:
+        """Shared API client for this provider's key and base URL on the running event loop."""
+        return _get_shared_client(self.api_key, self.base_url)
+    
     def _convert_messages(self, messages: List[Message]) -> List[Dict[str, Any]]:
         """Convert internal Message format to OpenAI format."""
-        converted = []
-        for msg in messages:
-            openai_msg = {
-                'role': msg.role,
-                'content': msg.content
-            }
-            if msg.name:
-                openai_msg['name'] = msg.name
-            if msg.tool_calls:
-                openai_msg['tool_calls'] = msg.tool_calls
-            if msg.tool_call_id:
-                openai_msg['tool_call_id'] = msg.tool_call_id
-            
-            converted.append(openai_msg)
-        
-        return converted
+        return [msg.converted('openai', _to_openai_message) for msg in messages]
+    
+    def _get_cached_response(self, key: str) -> Optional[LLMResponse]:
+        """Return an unexpired cached response for a request hash, if any."""
+        entry = self._response_cache.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._response_cache[key]
+            return None
+        self._response_cache.move_to_end(key)
+        # Nothing was billed for this call
+        return replace(entry[1], usage={'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0})
+    
+    def _cache_response(self, key: str, response: LLMResponse):
+        """Store a response under a request hash, evicting the oldest entries."""
+        self._response_cache[key] = (time.monotonic() + RESPONSE_CACHE_TTL, response)
+        self._response_cache.move_to_end(key)
+        while len(self._response_cache) > RESPONSE_CACHE_SIZE:
+            self._response_cache.popitem(last=False)
     
     async def complete(
         self,
@@ -62,11 +172,18 @@ class OpenAIProvider(BaseLLMProvider):
         tools: Optional[List[Dict[str, Any]]] = None,
         **kwargs
     ) -> LLMResponse:
-        """Get completion from OpenAI."""
+        """
+        Get completion from OpenAI.
+        
+        Pass disable_prompt_cache=True to send a unique request ID and
+        no-cache headers; by default requests stay eligible for the API's
+        prompt caching, which bills repeated prompt prefixes at a discount.
+        
+        Requests without tools at temperature <= RESPONSE_CACHE_MAX_TEMPERATURE
+        are also answered from a local cache for RESPONSE_CACHE_TTL seconds.
+        """
         try:
-            # Add a unique request ID to bypass any caching
-            import uuid
-            request_id = str(uuid.uuid4())
+            disable_prompt_cache = kwargs.pop('disable_prompt_cache', False)
             
             params = {
                 'model': model,
@@ -79,10 +196,19 @@ class OpenAIProvider(BaseLLMProvider):
             if tools:
                 params['tools'] = tools
             
-            # Include unique request ID in extra headers to prevent caching
-            params['extra_headers'] = {
-                'X-Request-ID': request_id
-            }
+            cache_key = None
+            if not tools and not disable_prompt_cache and temperature <= RESPONSE_CACHE_MAX_TEMPERATURE:
+                cache_key = hashlib.blake2b(
+                    orjson.dumps(params, default=str, option=orjson.OPT_SORT_KEYS),
+                    digest_size=16
+                ).hexdigest()
+                cached = self._get_cached_response(cache_key)
+                if cached is not None:
+                    logger.debug(f"Serving {model} completion from local response cache")
+                    return cached
+            
+            if disable_prompt_cache:
+                _add_no_cache_headers(params)
             
             response = await self.client.chat.completions.create(**params)
 
@@ -91,41 +217,31 @@ class OpenAIProvider(BaseLLMProvider):
                 logger.error("OpenAI returned empty response object")
                 raise RuntimeError("OpenAI returned empty response object")
 
-            if not hasattr(response, 'choices') or not response.choices:
+            if not getattr(response, 'choices', None):
                 logger.error(f"OpenAI response missing choices: {response}")
                 raise RuntimeError("OpenAI response missing choices")
 
             choice = response.choices[0]
+            message = getattr(choice, 'message', None)
             
             # Convert tool_calls to dict format if present
             tool_calls = None
-            if hasattr(choice, 'message') and hasattr(choice.message, 'tool_calls') and choice.message.tool_calls:
-                tool_calls = [
-                    {
-                        'id': tc.id,
-                        'type': tc.type,
-                        'function': {
-                            'name': tc.function.name,
-                            'arguments': tc.function.arguments
-                        }
-                    }
-                    for tc in choice.message.tool_calls
-                ]
+            tc_list = getattr(message, 'tool_calls', None)
+            if tc_list:
+                tool_calls = [_tool_call_to_dict(tc) for tc in tc_list]
             
-            # Safe access to usage fields
-            usage = {
-                'prompt_tokens': getattr(getattr(response, 'usage', None), 'prompt_tokens', 0) or 0,
-                'completion_tokens': getattr(getattr(response, 'usage', None), 'completion_tokens', 0) or 0,
-                'total_tokens': getattr(getattr(response, 'usage', None), 'total_tokens', 0) or 0
-            }
+            usage = _usage_to_dict(getattr(response, 'usage', None))
 
-            return LLMResponse(
-                content=(getattr(choice.message, 'content', None) or ""),
+            result = LLMResponse(
+                content=(getattr(message, 'content', None) or ""),
                 model=getattr(response, 'model', None),
                 usage=usage,
                 tool_calls=tool_calls,
                 finish_reason=getattr(choice, 'finish_reason', None)
             )
+            if cache_key is not None:
+                self._cache_response(cache_key, result)
+            return result
         
         except Exception as e:
             # Log more context for debugging
@@ -144,8 +260,18 @@ class OpenAIProvider(BaseLLMProvider):
         tools: Optional[List[Dict[str, Any]]] = None,
         **kwargs
     ) -> AsyncIterator[str]:
-        """Stream completion from OpenAI."""
+        """
+        Stream completion from OpenAI (accepts disable_prompt_cache like complete).
+        
+        Pass stream_options={'include_usage': True} to have the API report
+        token usage in a final chunk, and a dict as usage_out to receive it.
+        Usage is handed back per call because providers are shared between
+        concurrent streams.
+        """
         try:
+            disable_prompt_cache = kwargs.pop('disable_prompt_cache', False)
+            usage_out: Optional[Dict[str, int]] = kwargs.pop('usage_out', None)
+            
             params = {
                 'model': model,
                 'messages': self._convert_messages(messages),
@@ -158,11 +284,21 @@ class OpenAIProvider(BaseLLMProvider):
             if tools:
                 params['tools'] = tools
             
+            if disable_prompt_cache:
+                _add_no_cache_headers(params)
+            
             stream = await self.client.chat.completions.create(**params)
             
             async for chunk in stream:
-                if chunk.choices[0].delta.content:
-                    yield chunk.choices[0].delta.content
+                choices = chunk.choices
+                if choices:
+                    content = choices[0].delta.content
+                    if content:
+                        yield content
+                # The usage chunk has no choices
+                usage = getattr(chunk, 'usage', None)
+                if usage and usage_out is not None:
+                    usage_out.update(_usage_to_dict(usage))
         
         except Exception as e:
             logger.error(f"OpenAI streaming error: {e}")
@@ -180,12 +316,7 @@ class OpenAIProvider(BaseLLMProvider):
     
     def estimate_cost(self, usage: Dict[str, int], model: str) -> float:
         """Estimate cost for OpenAI request."""
-        if model not in self.PRICING:
-            # Use GPT-4 pricing as fallback
-            model = 'gpt-4'
-        
-        pricing = self.PRICING[model]
-        input_cost = (usage.get('prompt_tokens', 0) / 1000) * pricing['input']
-        output_cost = (usage.get('completion_tokens', 0) / 1000) * pricing['output']
-        
-        return input_cost + output_cost
+        input_rate, output_rate = _PRICING_MICRO.get(model, _DEFAULT_PRICING_MICRO)
+        # Exact integer micro-USD * tokens / 1K tokens, converted to USD once
+        return (usage.get('prompt_tokens', 0) * input_rate
+                + usage.get('completion_tokens', 0) * output_rate) / 1_000_000_000
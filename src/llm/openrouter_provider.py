@@ -2,9 +2,13 @@
 OpenRouter LLM provider implementation.
 """
 import os
-from typing import List, Dict, Any, Optional, AsyncIterator, Union
-import aiohttp
+import tempfile
+import time
+from pathlib import Path
+from types import MappingProxyType
+from typing import List, Dict, Any, Optional, AsyncIterator, Union, Mapping
 import asyncio
+import orjson
 
 from .openai_provider import OpenAIProvider
 from .base import BaseLLMProvider, Message, LLMResponse
@@ -12,6 +16,29 @@ from src.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+OPENROUTER_API_URL = 'https://openrouter.ai/api/v1'
+OPENROUTER_MODELS_URL = 'https://openrouter.ai/api/v1/models'
+
+# Last fetched model list, used to warm the model cache on startup
+MODEL_SNAPSHOT_PATH = Path("data/openrouter_models.json")
+
+# Context windows for common models, used until the model list has been fetched
+_DEFAULT_CONTEXT_WINDOWS: Mapping[str, int] = MappingProxyType({
+    'openai/gpt-4o': 128000,
+    'openai/gpt-4-turbo': 128000,
+    'openai/gpt-3.5-turbo': 16385,
+    'anthropic/claude-3-5-sonnet-20241022': 200000,
+    'anthropic/claude-3-opus-20240229': 200000,
+    'anthropic/claude-3-haiku-20240307': 200000,
+    'google/gemini-pro-1.5': 1000000,
+    'google/gemini-flash-1.5': 1000000,
+    'meta-llama/llama-3.2-90b-vision-instruct': 128000,
+    'mistralai/mixtral-8x22b-instruct': 64000
+})
+
+# Conservative context window for models we know nothing about
+_FALLBACK_CONTEXT_WINDOW = 4096
+
 
 class OpenRouterProvider(OpenAIProvider):
     """
@@ -19,10 +46,19 @@ class OpenRouterProvider(OpenAIProvider):
     Uses OpenAI-compatible API but with different base URL.
     """
     
+    # Model cache shared by all instances
     _cached_models = None  # Cache for model list
     _cached_model_info = {}  # Cache for model details (context windows, pricing)
-    _cache_timestamp = 0
+    _cache_timestamp = 0  # time.monotonic() of the last successful fetch
     _cache_ttl = 3600  # Cache for 1 hour
+    _refresh_task: Optional[asyncio.Task] = None  # In-flight fetch, awaited by concurrent callers
+    
+    # Session for the models endpoint; completions go through the OpenAI client
+    _SESSION_CONNECTOR_OPTIONS = MappingProxyType({
+        'limit': 32,
+        'ttl_dns_cache': 300,
+        'keepalive_timeout': 60
+    })
     
     def __init__(self, api_key: Optional[str] = None, **kwargs):
         """Initialize OpenRouter provider."""
@@ -32,12 +68,16 @@ class OpenRouterProvider(OpenAIProvider):
         
         # Use OpenAI client but with OpenRouter base URL
         super().__init__(api_key, **kwargs)
-        # Override the base URL
-        from openai import AsyncOpenAI
-        self.client = AsyncOpenAI(
-            api_key=api_key,
-            base_url="https://openrouter.ai/api/v1"
-        )
+        self.base_url = OPENROUTER_API_URL
+        
+        # Refresh the model list in the background so 'auto' max_tokens doesn't wait on it
+        self._warmup_task: Optional[asyncio.Future] = None
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            self._warmup_task = asyncio.ensure_future(self.fetch_models_from_api())
         logger.info("OpenRouter provider initialized")
     
     async def complete(
@@ -50,33 +90,16 @@ class OpenRouterProvider(OpenAIProvider):
         **kwargs
     ) -> LLMResponse:
         """Get completion from OpenRouter, with auto context window support."""
-        # Handle 'auto' max_tokens by looking up model's context window
-        resolved_max_tokens = max_tokens
-        if isinstance(max_tokens, str) and max_tokens.lower() == 'auto':
-            resolved_max_tokens = self.get_model_context_window(model)
-            logger.info(f"Auto max_tokens for {model}: using {resolved_max_tokens}")
-        
-        # Add a unique request ID to bypass prompt caching
-        import uuid
-        request_id = str(uuid.uuid4())
-        
-        # Disable prompt caching on OpenRouter to prevent returning cached responses
-        kwargs['extra_headers'] = {
-            'X-Request-ID': request_id,
-            'Cache-Control': 'no-cache, no-store, must-revalidate'
-        }
-        
-        # Call parent's complete method with resolved max_tokens
         return await super().complete(
             messages=messages,
             model=model,
             temperature=temperature,
-            max_tokens=resolved_max_tokens,
+            max_tokens=self._resolve_max_tokens(max_tokens, model),
             tools=tools,
             **kwargs
         )
     
-    async def stream_complete(
+    def stream_complete(
         self,
         messages: List[Message],
         model: str,
@@ -85,63 +108,123 @@ class OpenRouterProvider(OpenAIProvider):
         tools: Optional[List[Dict[str, Any]]] = None,
         **kwargs
     ) -> AsyncIterator[str]:
-        """Stream completion from OpenRouter, with auto context window support."""
-        # Handle 'auto' max_tokens by looking up model's context window
-        resolved_max_tokens = max_tokens
-        if isinstance(max_tokens, str) and max_tokens.lower() == 'auto':
-            resolved_max_tokens = self.get_model_context_window(model)
-            logger.info(f"Auto max_tokens for {model}: using {resolved_max_tokens}")
+        """
+        Stream completion from OpenRouter, with auto context window support.
         
-        # Call parent's stream_complete method with resolved max_tokens
-        async for chunk in super().stream_complete(
+        Returns the parent's async generator directly rather than re-yielding
+        each chunk through another generator frame.
+        """
+        return super().stream_complete(
             messages=messages,
             model=model,
             temperature=temperature,
-            max_tokens=resolved_max_tokens,
+            max_tokens=self._resolve_max_tokens(max_tokens, model),
             tools=tools,
             **kwargs
-        ):
-            yield chunk
+        )
+    
+    def _resolve_max_tokens(self, max_tokens: Union[int, str], model: str) -> int:
+        """Resolve max_tokens='auto' to the model's context window."""
+        if isinstance(max_tokens, str) and max_tokens.lower() == 'auto':
+            resolved = self.get_model_context_window(model)
+            logger.info(f"Auto max_tokens for {model}: using {resolved}")
+            return resolved
+        return max_tokens
     
     async def fetch_models_from_api(self) -> List[str]:
-        """Fetch available models from OpenRouter API."""
+        """
+        Fetch available models from OpenRouter API.
+        
+        Results are cached for all instances for _cache_ttl seconds, and
+        concurrent callers on the same event loop share a single request.
+        """
+        cls = type(self)
+        if cls._cached_models and time.monotonic() - cls._cache_timestamp < cls._cache_ttl:
+            return cls._cached_models
+        
+        task = cls._refresh_task
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            task = cls._refresh_task = asyncio.ensure_future(self._fetch_models_uncached())
+        # Shield so one cancelled caller doesn't cancel the fetch for the others
+        return await asyncio.shield(task)
+    
+    async def _fetch_models_uncached(self) -> List[str]:
+        """Request the model list from OpenRouter and refresh the shared cache."""
+        cls = type(self)
         try:
-            import time
-            
-            # Check cache
-            if (self._cached_models and 
-                time.time() - self._cache_timestamp < self._cache_ttl):
-                return self._cached_models
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.get('https://openrouter.ai/api/v1/models') as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        # Extract model IDs and store full info
-                        models = []
-                        for model in data.get('data', []):
-                            model_id = model['id']
-                            models.append(model_id)
-                            # Store context window and pricing info
-                            self._cached_model_info[model_id] = {
-                                'context_length': model.get('context_length', 4096),
-                                'pricing': model.get('pricing', {}),
-                                'name': model.get('name', model_id)
-                            }
-                        
-                        # Cache the results
-                        self._cached_models = models
-                        self._cache_timestamp = time.time()
-                        
-                        logger.info(f"Fetched {len(models)} models from OpenRouter API")
-                        return models
-                    else:
-                        logger.warning(f"Failed to fetch OpenRouter models: {response.status}")
-                        return self._get_default_models()
+            session = await self._get_session()
+            async with session.get(OPENROUTER_MODELS_URL) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    # Extract model IDs and store full info
+                    models = []
+                    for model in data.get('data', []):
+                        model_id = model['id']
+                        models.append(model_id)
+                        # Store context window and pricing info
+                        cls._cached_model_info[model_id] = {
+                            'context_length': model.get('context_length', 4096),
+                            'pricing': model.get('pricing', {}),
+                            'name': model.get('name', model_id)
+                        }
+                    
+                    # Cache the results
+                    cls._cached_models = models
+                    cls._cache_timestamp = time.monotonic()
+                    
+                    logger.info(f"Fetched {len(models)} models from OpenRouter API")
+                    await asyncio.to_thread(cls._save_model_snapshot, dict(cls._cached_model_info))
+                    return models
+                else:
+                    logger.warning(f"Failed to fetch OpenRouter models: {response.status}")
+                    return self._get_default_models()
         except Exception as e:
             logger.error(f"Error fetching OpenRouter models: {e}")
             return self._get_default_models()
     
+    @classmethod
+    def _load_model_snapshot(cls):
+        """
+        Warm the model cache from the snapshot saved by the last successful fetch.
+        
+        The snapshot is treated as already expired, so the next
+        fetch_models_from_api() call still refreshes it from the API.
+        """
+        try:
+            model_info = orjson.loads(MODEL_SNAPSHOT_PATH.read_bytes())
+        except FileNotFoundError:
+            return
+        except (OSError, orjson.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable OpenRouter model snapshot: {e}")
+            return
+        
+        cls._cached_model_info.update(model_info)
+        cls._cached_models = list(model_info)
+        cls._cache_timestamp = float('-inf')
+        logger.debug(f"Loaded {len(model_info)} OpenRouter models from {MODEL_SNAPSHOT_PATH}")
+    
+    @staticmethod
+    def _save_model_snapshot(model_info: Dict[str, Dict[str, Any]]):
+        """Write model info to the snapshot file."""
+        try:
+            MODEL_SNAPSHOT_PATH.parent.mkdir(parents=True, exist_ok=True)
+            # Unique temp file: refreshes on other threads or processes may save concurrently
+            fd, tmp_path = tempfile.mkstemp(
+                dir=MODEL_SNAPSHOT_PATH.parent, prefix=f'.{MODEL_SNAPSHOT_PATH.name}.', suffix='.tmp'
+            )
+            try:
+                with os.fdopen(fd, 'wb') as tmp_file:
+                    tmp_file.write(orjson.dumps(model_info))
+                os.replace(tmp_path, MODEL_SNAPSHOT_PATH)
+            except BaseException:
+                try:
+                    os.unlink(tmp_path)
+                except FileNotFoundError:
+                    pass
+                raise
+        except OSError as e:
+            logger.warning(f"Could not save OpenRouter model snapshot: {e}")
+    
     def _get_default_models(self) -> List[str]:
         """Get default/fallback model list."""
         return [
@@ -177,32 +260,18 @@ class OpenRouterProvider(OpenAIProvider):
             The context window size in tokens
         """
         # Check cached model info
-        if model_id in self._cached_model_info:
-            context_length = self._cached_model_info[model_id]['context_length']
-            logger.info(f"Auto-detected context window for {model_id}: {context_length}")
-            return context_length
+        info = self._cached_model_info.get(model_id)
+        if info:
+            logger.debug(f"Auto-detected context window for {model_id}: {info['context_length']}")
+            return info['context_length']
         
-        # Default context windows for common models if not cached
-        default_windows = {
-            'openai/gpt-4o': 128000,
-            'openai/gpt-4-turbo': 128000,
-            'openai/gpt-3.5-turbo': 16385,
-            'anthropic/claude-3-5-sonnet-20241022': 200000,
-            'anthropic/claude-3-opus-20240229': 200000,
-            'anthropic/claude-3-haiku-20240307': 200000,
-            'google/gemini-pro-1.5': 1000000,
-            'google/gemini-flash-1.5': 1000000,
-            'meta-llama/llama-3.2-90b-vision-instruct': 128000,
-            'mistralai/mixtral-8x22b-instruct': 64000
-        }
-        
-        if model_id in default_windows:
-            logger.info(f"Using default context window for {model_id}: {default_windows[model_id]}")
-            return default_windows[model_id]
+        context_length = _DEFAULT_CONTEXT_WINDOWS.get(model_id)
+        if context_length is not None:
+            logger.debug(f"Using default context window for {model_id}: {context_length}")
+            return context_length
         
-        # Conservative default if unknown
-        logger.warning(f"Unknown model {model_id}, using conservative context window of 4096")
-        return 4096
+        logger.warning(f"Unknown model {model_id}, using conservative context window of {_FALLBACK_CONTEXT_WINDOW}")
+        return _FALLBACK_CONTEXT_WINDOW
     
     def estimate_cost(self, usage: Dict[str, int], model: str) -> float:
         """
@@ -213,3 +282,6 @@ class OpenRouterProvider(OpenAIProvider):
         base_cost_per_1k = 0.002  # Average estimate
         total_tokens = usage.get('total_tokens', 0)
         return (total_tokens / 1000) * base_cost_per_1k
+
+
+OpenRouterProvider._load_model_snapshot()
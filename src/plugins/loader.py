@@ -2,18 +2,21 @@
 Plugin loader and manager.
 """
 import os
-import json
-import importlib
+import orjson
+import importlib.util
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Any, Optional
-import sqlite3
+from typing import Dict, List, Any, Optional, Tuple
 
 from src.tools.base import BaseTool
 from src.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Upper bound on threads used by load_all_plugins
+MAX_PLUGIN_LOAD_WORKERS = 8
+
 
 class PluginManifest:
     """Represents a plugin manifest."""
@@ -53,6 +56,9 @@ class PluginManager:
         self.plugins: Dict[str, Any] = {}
         self.tools: Dict[str, BaseTool] = {}
         
+        # manifest path -> (st_mtime_ns, parsed manifest)
+        self._manifest_cache: Dict[Path, Tuple[int, PluginManifest]] = {}
+        
         logger.info(f"Plugin manager initialized (dir: {self.plugins_dir})")
     
     def discover_plugins(self) -> List[str]:
@@ -64,11 +70,12 @@ class PluginManager:
         """
         plugins = []
         
-        for item in self.plugins_dir.iterdir():
-            if item.is_dir() and not item.name.startswith('_'):
-                manifest_file = item / 'manifest.json'
-                if manifest_file.exists():
-                    plugins.append(item.name)
+        # DirEntry.is_dir() uses the type from the directory listing, so only the manifest check stats
+        with os.scandir(self.plugins_dir) as entries:
+            for entry in entries:
+                if not entry.name.startswith('_') and entry.is_dir():
+                    if os.path.isfile(os.path.join(entry.path, 'manifest.json')):
+                        plugins.append(entry.name)
         
         return plugins
     
@@ -84,13 +91,19 @@ class PluginManager:
         """
         manifest_path = self.plugins_dir / plugin_name / 'manifest.json'
         
-        if not manifest_path.exists():
+        try:
+            mtime_ns = manifest_path.stat().st_mtime_ns
+        except FileNotFoundError:
             logger.error(f"Manifest not found for plugin: {plugin_name}")
             return None
         
+        # Reuse the parsed manifest until the file changes
+        cached = self._manifest_cache.get(manifest_path)
+        if cached and cached[0] == mtime_ns:
+            return cached[1]
+        
         try:
-            with open(manifest_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = orjson.loads(manifest_path.read_bytes())
             
             manifest = PluginManifest(data)
             
@@ -98,6 +111,7 @@ class PluginManager:
                 logger.error(f"Invalid manifest for plugin: {plugin_name}")
                 return None
             
+            self._manifest_cache[manifest_path] = (mtime_ns, manifest)
             return manifest
         
         except Exception as e:
@@ -118,65 +132,128 @@ class PluginManager:
             logger.warning(f"Plugin already loaded: {plugin_name}")
             return True
         
+        prepared = self._prepare_plugin(plugin_name)
+        if prepared is None:
+            return False
+        
+        manifest, module = prepared
+        return self._register_plugin(plugin_name, manifest, module, self._instantiate_plugin(plugin_name, module))
+    
+    def _prepare_plugin(self, plugin_name: str) -> Optional[Tuple[PluginManifest, Any]]:
+        """
+        Check a plugin's manifest and create its (not yet executed) module.
+        
+        The module is added to sys.modules so relative imports inside the
+        plugin resolve while _instantiate_plugin runs it.
+        
+        Args:
+            plugin_name: Name of the plugin
+        
+        Returns:
+            (manifest, module) or None if the plugin cannot be loaded
+        """
         # Load manifest
         manifest = self.load_manifest(plugin_name)
         if not manifest:
-            return False
+            return None
         
         # Check permissions
         if not self._check_permissions(manifest.permissions):
             logger.error(f"Plugin {plugin_name} requires unauthorized permissions")
-            return False
+            return None
+        
+        plugin_path = self.plugins_dir / plugin_name
+        entry_point = plugin_path / manifest.entry_point
+        
+        if not entry_point.exists():
+            logger.error(f"Entry point not found: {entry_point}")
+            return None
         
-        # Load plugin module
         try:
-            plugin_path = self.plugins_dir / plugin_name
-            entry_point = plugin_path / manifest.entry_point
-            
-            if not entry_point.exists():
-                logger.error(f"Entry point not found: {entry_point}")
-                return False
-            
-            # Add plugin directory to path
-            sys.path.insert(0, str(plugin_path))
-            
-            # Import the plugin module
+            # Import the entry point as the plugin's package so relative
+            # imports resolve against its directory without touching sys.path
             spec = importlib.util.spec_from_file_location(
                 f"plugins.{plugin_name}",
-                entry_point
+                entry_point,
+                submodule_search_locations=[str(plugin_path)]
             )
             module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(module)
-            
-            # Remove from path
-            sys.path.pop(0)
+        except Exception as e:
+            logger.error(f"Error loading plugin {plugin_name}: {e}", exc_info=True)
+            return None
+        
+        sys.modules[spec.name] = module
+        return manifest, module
+    
+    @staticmethod
+    def _instantiate_plugin(plugin_name: str, module: Any) -> Optional[Any]:
+        """
+        Execute a prepared plugin module and create its Plugin instance.
+        
+        Safe to call from a worker thread: it does not touch the manager's state.
+        
+        Args:
+            plugin_name: Name of the plugin
+            module: Module returned by _prepare_plugin
+        
+        Returns:
+            Plugin instance or None if loading failed
+        """
+        try:
+            module.__spec__.loader.exec_module(module)
             
-            # Get plugin instance
-            if hasattr(module, 'Plugin'):
-                plugin_instance = module.Plugin()
-                self.plugins[plugin_name] = {
-                    'manifest': manifest,
-                    'module': module,
-                    'instance': plugin_instance
-                }
-                
-                # Register tools
-                if hasattr(plugin_instance, 'get_tools'):
-                    tools = plugin_instance.get_tools()
-                    for tool in tools:
-                        tool_name = tool.get_definition().name
-                        self.tools[tool_name] = tool
-                        logger.info(f"Registered tool from plugin: {tool_name}")
-                
-                logger.info(f"Loaded plugin: {plugin_name} v{manifest.version}")
-                return True
-            else:
+            plugin_class = getattr(module, 'Plugin', None)
+            if plugin_class is None:
                 logger.error(f"Plugin {plugin_name} has no Plugin class")
-                return False
+                return None
+            return plugin_class()
         
         except Exception as e:
+            logger.error(f"Error loading plugin {plugin_name}: {e}", exc_info=True)
+            return None
+    
+    def _register_plugin(self, plugin_name: str, manifest: PluginManifest, module: Any,
+                         plugin_instance: Optional[Any]) -> bool:
+        """
+        Record a loaded plugin and register its tools.
+        
+        Args:
+            plugin_name: Name of the plugin
+            manifest: Plugin manifest
+            module: Executed plugin module
+            plugin_instance: Result of _instantiate_plugin
+        
+        Returns:
+            True if the plugin was registered
+        """
+        if plugin_instance is None:
+            sys.modules.pop(f"plugins.{plugin_name}", None)
+            return False
+        
+        try:
+            get_tools = getattr(plugin_instance, 'get_tools', None)
+            
+            # Register tools
+            tools = get_tools() if get_tools else []
+            for tool in tools:
+                tool_name = tool.get_definition().name
+                self.tools[tool_name] = tool
+                logger.info(f"Registered tool from plugin: {tool_name}")
+        
+        except Exception as e:
+            sys.modules.pop(f"plugins.{plugin_name}", None)
             logger.error(f"Error loading plugin {plugin_name}: {e}", exc_info=True)
             return False
+        
+        self.plugins[plugin_name] = {
+            'manifest': manifest,
+            'module': module,
+            'instance': plugin_instance,
+            '_get_tools': get_tools
+        }
+        
+        logger.info(f"Loaded plugin: {plugin_name} v{manifest.version}")
+        return True
     
     def unload_plugin(self, plugin_name: str) -> bool:
         """
@@ -195,45 +272,63 @@ class PluginManager:
         plugin_data = self.plugins[plugin_name]
         instance = plugin_data.get('instance')
         
-        if instance and hasattr(instance, 'get_tools'):
-            tools = instance.get_tools()
+        get_tools = plugin_data.get('_get_tools')
+        if get_tools:
+            tools = get_tools()
             for tool in tools:
                 tool_name = tool.get_definition().name
                 if tool_name in self.tools:
                     del self.tools[tool_name]
         
         # Call cleanup if available
-        if instance and hasattr(instance, 'cleanup'):
+        cleanup = getattr(instance, 'cleanup', None)
+        if cleanup:
             try:
-                instance.cleanup()
+                cleanup()
             except Exception as e:
                 logger.error(f"Error during plugin cleanup: {e}")
         
         # Remove plugin
         del self.plugins[plugin_name]
+        sys.modules.pop(f"plugins.{plugin_name}", None)
         logger.info(f"Unloaded plugin: {plugin_name}")
         return True
     
     def load_all_plugins(self):
         """Load all discovered plugins."""
         plugins = self.discover_plugins()
-        
+        if not plugins:
+            return
+        
+        # Check which are disabled in the database with a single query
+        if self.config_manager:
+            disabled = self.config_manager.get_disabled_plugins(plugins)
+            for plugin_name in disabled:
+                logger.info(f"Skipping disabled plugin: {plugin_name}")
+            plugins = [name for name in plugins if name not in disabled]
+        
+        # Manifests and sys.modules entries are handled here, in discovery order
+        prepared = []
         for plugin_name in plugins:
-            # Check if enabled in database
-            if self.config_manager:
-                with sqlite3.connect(self.config_manager.db_path) as conn:
-                    cursor = conn.cursor()
-                    cursor.execute(
-                        "SELECT enabled FROM plugins WHERE name = ?",
-                        (plugin_name,)
-                    )
-                    result = cursor.fetchone()
-                    
-                    if result and not result[0]:
-                        logger.info(f"Skipping disabled plugin: {plugin_name}")
-                        continue
-            
-            self.load_plugin(plugin_name)
+            if plugin_name in self.plugins:
+                logger.warning(f"Plugin already loaded: {plugin_name}")
+                continue
+            result = self._prepare_plugin(plugin_name)
+            if result is not None:
+                prepared.append((plugin_name, *result))
+        
+        if not prepared:
+            return
+        
+        # Module execution is mostly file I/O, so run the plugins' code in parallel
+        with ThreadPoolExecutor(max_workers=min(MAX_PLUGIN_LOAD_WORKERS, len(prepared))) as executor:
+            instances = list(executor.map(
+                lambda item: self._instantiate_plugin(item[0], item[2]), prepared
+            ))
+        
+        # Register on this thread, in discovery order, so tool name clashes resolve predictably
+        for (plugin_name, manifest, module), instance in zip(prepared, instances):
+            self._register_plugin(plugin_name, manifest, module, instance)
     
     def _check_permissions(self, permissions: List[str]) -> bool:
         """
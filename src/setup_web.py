@@ -6,25 +6,30 @@ and persists configuration to both the YAML config and .env file.
 from __future__ import annotations
 
 import asyncio
+import concurrent.futures
+import functools
+import itertools
 import json
 import os
+import secrets
 import sys
 import subprocess
 import threading
 import webbrowser
+from collections import ChainMap
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, Optional
-
-from flask import Flask, jsonify, render_template, request
-from dotenv import set_key
-from werkzeug.serving import make_server
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
 
 from src.config.manager import ConfigManager
 from src.llm.factory import LLMProviderFactory
 from src.llm.base import Message
+from src.utils.env_file import create_env_file, set_env_values
 from src.utils.logger import setup_logger
 
+if TYPE_CHECKING:
+    from flask import Flask
+
 logger = setup_logger(__name__)
 
 ROOT_DIR = Path(__file__).resolve().parent.parent
@@ -36,6 +41,7 @@ DEFAULT_ENV = ROOT_DIR / ".env"
 # Fallback per-user directory for writable runtime configuration. Use LOCALAPPDATA
 # when available, otherwise fall back to the user's home directory.
 USER_CONFIG_DIR = Path(os.getenv("LOCALAPPDATA") or Path.home()) / "OpenLLM"
+USER_ENV = USER_CONFIG_DIR / ".env"
 
 
 PROVIDER_MODELS: Dict[str, list[str]] = {
@@ -58,6 +64,18 @@ PROVIDER_MODELS: Dict[str, list[str]] = {
     ],
 }
 
+# First entry of each provider's model list
+PROVIDER_DEFAULT_MODEL: Dict[str, str] = {provider: models[0] for provider, models in PROVIDER_MODELS.items()}
+
+# .env variable holding each provider's API key (None: no key needed)
+PROVIDER_ENV_KEYS: Dict[str, Optional[str]] = {
+    "gemini": "GEMINI_API_KEY",
+    "openai": "OPENAI_API_KEY",
+    "anthropic": "ANTHROPIC_API_KEY",
+    "ollama": None,
+    "openrouter": "OPENROUTER_API_KEY",
+}
+
 RECOMMENDED_PROMPT = (
     "You are a helpful Discord bot assistant. Be friendly, concise, and helpful."
 )
@@ -71,6 +89,81 @@ OLLAMA_GUIDE = {
     "run_model": "ollama run granite4:3b",
 }
 
+SETUP_PROVIDERS = [
+    {
+        "id": "gemini",
+        "name": "Google Gemini",
+        "tagline": "Fast, affordable, generous free tier",
+        "recommended": True,
+    },
+    {
+        "id": "openai",
+        "name": "OpenAI",
+        "tagline": "GPT-4 & GPT-3.5 family",
+        "recommended": False,
+    },
+    {
+        "id": "anthropic",
+        "name": "Anthropic",
+        "tagline": "Claude 3 family",
+        "recommended": False,
+    },
+    {
+        "id": "ollama",
+        "name": "Ollama (Local)",
+        "tagline": "Run local models for free",
+        "recommended": False,
+    },
+    {
+        "id": "openrouter",
+        "name": "OpenRouter",
+        "tagline": "Unified access to many providers",
+        "recommended": False,
+    },
+]
+
+# Values reported by _serialize_config when neither config nor env set them
+_LLM_DEFAULTS = {
+    "default_provider": "gemini",
+    "default_model": "gemini-2.5-flash",
+    "temperature": 0.7,
+    "max_tokens": 2048,
+    "system_prompt": RECOMMENDED_PROMPT,
+    "enforce_char_limit": False,
+}
+_WEB_SEARCH_DEFAULTS = {
+    "enabled": True,
+    "default_provider": "duckduckgo",
+    "searxng_url": "http://localhost:8888",
+}
+
+# Parts of the /api/setup/state response that never change
+_STATIC_SETUP_STATE = {
+    "providers": SETUP_PROVIDERS,
+    "models": PROVIDER_MODELS,
+    "ollamaGuide": OLLAMA_GUIDE,
+}
+
+# Request sent to the LLM by /api/setup/generate-prompt
+PROMPT_GENERATION_TEMPLATE = """You are a helpful assistant that creates system prompts for Discord bots.
+The user wants their bot to: {user_request}
+
+Create a clear, concise system prompt (2-4 sentences) that defines the bot's personality, tone, and behavior.
+The prompt should be professional and suitable for a Discord bot.
+
+Respond with ONLY the system prompt text, nothing else."""
+PROMPT_GENERATION_MAX_TOKENS = 300
+
+# Seconds to wait for the LLM when generating a system prompt
+PROMPT_GENERATION_TIMEOUT = 120
+
+# Event loop shared by all LLM calls from the setup app, see _get_llm_loop
+_llm_loop: Optional[asyncio.AbstractEventLoop] = None
+_llm_loop_lock = threading.Lock()
+
+# Serializes saves; the server is threaded and a double-clicked Save sends two requests
+_persist_lock = threading.Lock()
+
 
 @dataclass
 class SetupOptions:
@@ -79,62 +172,80 @@ class SetupOptions:
     completion_event: Optional[threading.Event] = None
 
 
+@functools.lru_cache(maxsize=1)
 def _ensure_env_file() -> Path:
     """Ensure a .env file exists by copying from example if available."""
     # Try to create/use the env file inside the installation/root directory first.
     try:
-        if not DEFAULT_ENV.exists():
-            if DEFAULT_ENV_EXAMPLE.exists():
-                DEFAULT_ENV.write_text(DEFAULT_ENV_EXAMPLE.read_text(encoding="utf-8"), encoding="utf-8")
-            else:
-                DEFAULT_ENV.touch()
+        create_env_file(DEFAULT_ENV, DEFAULT_ENV_EXAMPLE)
         return DEFAULT_ENV
     except PermissionError:
         # Likely installed under Program Files - fall back to per-user config directory
-        try:
-            USER_CONFIG_DIR.mkdir(parents=True, exist_ok=True)
-            user_env = USER_CONFIG_DIR / ".env"
-            if not user_env.exists():
-                if DEFAULT_ENV_EXAMPLE.exists():
-                    # Copy example into per-user config dir
-                    user_env.write_text(DEFAULT_ENV_EXAMPLE.read_text(encoding="utf-8"), encoding="utf-8")
-                else:
-                    user_env.touch()
-            return user_env
-        except Exception:
-            # As a last resort, re-raise the original PermissionError to preserve behavior
-            raise
-
-
-def _set_env_value(env_path: Path, key: str, value: Any) -> None:
-    """Persist an environment variable to the .env file and current process."""
-    value_str = "" if value is None else str(value)
-    set_key(str(env_path), key, value_str)
-    os.environ[key] = value_str
+        USER_CONFIG_DIR.mkdir(parents=True, exist_ok=True)
+        create_env_file(USER_ENV, DEFAULT_ENV_EXAMPLE)
+        return USER_ENV
+
+
+def _get_llm_loop() -> asyncio.AbstractEventLoop:
+    """
+    Return the background event loop used for LLM calls, starting it on first use.
+    
+    Running every request on one long-lived loop lets shared providers keep
+    their HTTP connection pools between requests.
+    """
+    global _llm_loop
+    with _llm_loop_lock:
+        if _llm_loop is None:
+            _llm_loop = asyncio.new_event_loop()
+            threading.Thread(target=_llm_loop.run_forever, name="setup-llm-loop", daemon=True).start()
+        return _llm_loop
 
 
 def _serialize_config(config: ConfigManager) -> Dict[str, Any]:
     """Return a normalized snapshot of current configuration and env."""
     env = os.environ
+    # ConfigManager guarantees a mapping at the top level
     cfg = config.config
 
-    dashboard_cfg = cfg.get("dashboard", {}) if isinstance(cfg, dict) else {}
-    tools_cfg = cfg.get("tools", {}) if isinstance(cfg, dict) else {}
-    web_search_cfg = tools_cfg.get("web_search", {}) if isinstance(tools_cfg, dict) else {}
-    screening_cfg = cfg.get("screening", {}) if isinstance(cfg, dict) else {}
+    # Look up each section once; empty YAML sections load as None
+    llm_cfg = cfg.get("llm") or {}
+    bot_cfg = cfg.get("bot") or {}
+    dashboard_cfg = cfg.get("dashboard") or {}
+    tools_cfg = cfg.get("tools") or {}
+    web_search_cfg = tools_cfg.get("web_search") or {}
+    screening_cfg = cfg.get("screening") or {}
+
+    # Layered lookups: config, then env, then defaults for the LLM settings;
+    # env wins over config for the SearxNG URL. Unset env vars don't shadow.
+    llm_env = {
+        key: value
+        for key, value in (
+            ("default_provider", env.get("DEFAULT_LLM_PROVIDER")),
+            ("default_model", env.get("DEFAULT_MODEL")),
+        )
+        if value is not None
+    }
+    llm_view = ChainMap(llm_cfg, llm_env, _LLM_DEFAULTS)
+    searxng_url = env.get("SEARXNG_URL")
+    web_search_view = ChainMap(
+        {"searxng_url": searxng_url} if searxng_url is not None else {},
+        web_search_cfg,
+        _WEB_SEARCH_DEFAULTS,
+    )
 
+    discord_token = env.get("DISCORD_TOKEN")
     data = {
-        "discordTokenSet": bool(env.get("DISCORD_TOKEN") and env.get("DISCORD_TOKEN") != "your_discord_bot_token_here"),
-        "prefix": env.get("DISCORD_PREFIX") or cfg.get("bot", {}).get("prefix", "!"),
-        "provider": cfg.get("llm", {}).get("default_provider", env.get("DEFAULT_LLM_PROVIDER", "gemini")),
-        "model": cfg.get("llm", {}).get("default_model", env.get("DEFAULT_MODEL", "gemini-2.5-flash")),
-        "temperature": cfg.get("llm", {}).get("temperature", 0.7),
-        "maxTokens": cfg.get("llm", {}).get("max_tokens", 2048),
-        "systemPrompt": cfg.get("llm", {}).get("system_prompt", RECOMMENDED_PROMPT),
-        "enforceCharLimit": bool(cfg.get("llm", {}).get("enforce_char_limit", False)),
-        "searchEnabled": bool(web_search_cfg.get("enabled", True)),
-        "searchProvider": web_search_cfg.get("default_provider", "duckduckgo"),
-        "searxngUrl": env.get("SEARXNG_URL", web_search_cfg.get("searxng_url", "http://localhost:8888")),
+        "discordTokenSet": bool(discord_token and discord_token != "your_discord_bot_token_here"),
+        "prefix": env.get("DISCORD_PREFIX") or bot_cfg.get("prefix", "!"),
+        "provider": llm_view["default_provider"],
+        "model": llm_view["default_model"],
+        "temperature": llm_view["temperature"],
+        "maxTokens": llm_view["max_tokens"],
+        "systemPrompt": llm_view["system_prompt"],
+        "enforceCharLimit": bool(llm_view["enforce_char_limit"]),
+        "searchEnabled": bool(web_search_view["enabled"]),
+        "searchProvider": web_search_view["default_provider"],
+        "searxngUrl": web_search_view["searxng_url"],
         "dashboardEnabled": bool(dashboard_cfg.get("enabled", True)),
         "dashboardPort": dashboard_cfg.get("port", 5000),
         "screeningEnabled": bool(screening_cfg.get("enabled", False)),
@@ -148,210 +259,230 @@ def _serialize_config(config: ConfigManager) -> Dict[str, Any]:
         "screeningChannelId": screening_cfg.get("channel_id", ""),
     }
 
-    data["apiKeysSet"] = {
-        "gemini": bool(env.get("GEMINI_API_KEY") and not env.get("GEMINI_API_KEY").startswith("your_")),
-        "openai": bool(env.get("OPENAI_API_KEY") and not env.get("OPENAI_API_KEY").startswith("your_")),
-        "anthropic": bool(env.get("ANTHROPIC_API_KEY") and not env.get("ANTHROPIC_API_KEY").startswith("your_")),
-        "openrouter": bool(env.get("OPENROUTER_API_KEY") and not env.get("OPENROUTER_API_KEY").startswith("your_")),
-    }
+    api_keys_set = {}
+    for provider_id, env_key in PROVIDER_ENV_KEYS.items():
+        if not env_key:
+            continue
+        value = env.get(env_key) or ""
+        api_keys_set[provider_id] = bool(value) and not value.startswith("your_")
+    data["apiKeysSet"] = api_keys_set
 
     return data
 
 
-def _validate_payload(payload: Dict[str, Any]) -> Optional[str]:
-    """Perform basic validation on incoming setup payload."""
+def _normalize_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a copy of the setup payload with surrounding whitespace stripped from strings."""
+    return {k: v.strip() if isinstance(v, str) else v for k, v in payload.items()}
+
+
+def _validate_payload(payload: Dict[str, Any]) -> Tuple[Optional[str], Dict[str, Any]]:
+    """
+    Validate a normalized setup payload and convert it to typed settings.
+
+    Returns:
+        Tuple of (error message or None, settings for _persist_configuration)
+    """
     required_keys = ["discord_token", "prefix", "provider", "model", "system_prompt"]
-    missing = [k for k in required_keys if not str(payload.get(k, "")).strip()]
+    missing = [k for k in required_keys if not str(payload.get(k, ""))]
     if missing:
-        return f"Missing required field(s): {', '.join(missing)}"
+        return f"Missing required field(s): {', '.join(missing)}", {}
 
     provider = payload.get("provider")
     if provider not in PROVIDER_MODELS:
-        return "Selected provider is not supported."
+        return "Selected provider is not supported.", {}
 
-    if provider != "ollama" and not str(payload.get("api_key", "")).strip():
-        return f"Please enter your {provider.title()} API key."
+    api_key = str(payload.get("api_key", ""))
+    if provider != "ollama" and not api_key:
+        return f"Please enter your {provider.title()} API key.", {}
 
-    dashboard_port = payload.get("dashboard_port")
     try:
-        int(dashboard_port)
+        dashboard_port = int(payload.get("dashboard_port"))
     except (TypeError, ValueError):
-        return "Dashboard port must be a number."
+        return "Dashboard port must be a number.", {}
 
-    max_tokens = payload.get("max_tokens", "auto")
-    if isinstance(max_tokens, str) and max_tokens.lower() != "auto":
-        if not max_tokens.isdigit():
-            return "Max tokens must be an integer or 'auto'."
+    try:
+        temperature = float(payload.get("temperature", 0.7))
+    except (TypeError, ValueError):
+        return "Temperature must be a number.", {}
 
-    if payload.get("search_enabled") and payload.get("search_provider") == "searxng":
-        url = str(payload.get("searxng_url", "")).strip()
-        if not url:
-            return "Please provide a SearxNG instance URL."
+    max_tokens = payload.get("max_tokens", "auto")
+    if isinstance(max_tokens, str):
+        if max_tokens.lower() == "auto":
+            max_tokens = "auto"
+        elif max_tokens.isdigit():
+            max_tokens = int(max_tokens)
+        else:
+            return "Max tokens must be an integer or 'auto'.", {}
+    else:
+        try:
+            max_tokens = int(max_tokens)
+        except (TypeError, ValueError):
+            return "Max tokens must be an integer or 'auto'.", {}
 
-    if payload.get("screening_enabled"):
-        if not str(payload.get("screening_policy", "")).strip():
-            return "Please provide a screening policy."
-        if payload.get("screening_action") == "escalate":
-            channel_id = str(payload.get("screening_channel_id", "")).strip()
-            if not channel_id.isdigit():
-                return "Moderation channel ID must be a numeric Discord channel ID."
+    search_enabled = bool(payload.get("search_enabled", True))
+    search_provider = payload.get("search_provider", "duckduckgo")
+    searxng_url = payload.get("searxng_url", "http://localhost:8888")
+    if search_enabled and search_provider == "searxng" and not str(searxng_url):
+        return "Please provide a SearxNG instance URL.", {}
 
-    return None
+    screening_enabled = bool(payload.get("screening_enabled", False))
+    screening_action = payload.get("screening_action", "block")
+    screening_channel_id = payload.get("screening_channel_id", "")
+    if screening_enabled:
+        if not str(payload.get("screening_policy", "")):
+            return "Please provide a screening policy.", {}
+        if screening_action == "escalate" and not str(screening_channel_id).isdigit():
+            return "Moderation channel ID must be a numeric Discord channel ID.", {}
+
+    model = payload.get("model") or PROVIDER_DEFAULT_MODEL.get(provider, "default")
+    settings = {
+        "discord_token": str(payload["discord_token"]),
+        "prefix": str(payload["prefix"]),
+        "provider": provider,
+        "model": model,
+        "api_key": api_key,
+        "system_prompt": payload["system_prompt"],
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "enforce_char_limit": bool(payload.get("enforce_char_limit", False)),
+        "search_enabled": search_enabled,
+        "search_provider": search_provider,
+        "searxng_url": searxng_url,
+        "dashboard_enabled": bool(payload.get("dashboard_enabled", True)),
+        "dashboard_port": dashboard_port,
+        "screening_enabled": screening_enabled,
+        "screening_model": payload.get("screening_model", model),
+        "screening_action": screening_action,
+        "screening_policy": payload.get("screening_policy"),
+        "screening_channel_id": screening_channel_id if screening_action == "escalate" else "",
+    }
+    return None, settings
 
 
-def _persist_configuration(payload: Dict[str, Any], config: ConfigManager, env_path: Path) -> None:
-    """Persist configuration selections to YAML and .env."""
+def _persist_configuration(settings: Dict[str, Any], config: ConfigManager, env_path: Path) -> None:
+    """Persist validated settings from _validate_payload to YAML and .env."""
     logger.info("Saving configuration via web setup wizard")
 
-    _set_env_value(env_path, "DISCORD_TOKEN", payload["discord_token"].strip())
-    _set_env_value(env_path, "DISCORD_PREFIX", payload["prefix"].strip())
-
-    provider = payload["provider"]
-    model = payload.get("model") or PROVIDER_MODELS.get(provider, ["default"])[0]
-    api_key = payload.get("api_key", "").strip()
-
-    if provider == "gemini":
-        _set_env_value(env_path, "GEMINI_API_KEY", api_key)
-        _set_env_value(env_path, "DEFAULT_LLM_PROVIDER", "gemini")
-        _set_env_value(env_path, "DEFAULT_MODEL", model)
-    elif provider == "openai":
-        _set_env_value(env_path, "OPENAI_API_KEY", api_key)
-        _set_env_value(env_path, "DEFAULT_LLM_PROVIDER", "openai")
-        _set_env_value(env_path, "DEFAULT_MODEL", model)
-    elif provider == "anthropic":
-        _set_env_value(env_path, "ANTHROPIC_API_KEY", api_key)
-        _set_env_value(env_path, "DEFAULT_LLM_PROVIDER", "anthropic")
-        _set_env_value(env_path, "DEFAULT_MODEL", model)
-    elif provider == "ollama":
-        _set_env_value(env_path, "DEFAULT_LLM_PROVIDER", "ollama")
-        _set_env_value(env_path, "DEFAULT_MODEL", model)
-    elif provider == "openrouter":
-        _set_env_value(env_path, "OPENROUTER_API_KEY", api_key)
-        _set_env_value(env_path, "DEFAULT_LLM_PROVIDER", "openrouter")
-        _set_env_value(env_path, "DEFAULT_MODEL", model)
-
-    config.set("bot.prefix", payload["prefix"].strip())
-    config.set("llm.default_provider", provider)
-    config.set("llm.default_model", model)
-    config.set("llm.system_prompt", payload["system_prompt"].strip())
-
-    temperature = float(payload.get("temperature", 0.7))
-    config.set("llm.temperature", temperature)
-
-    max_tokens = payload.get("max_tokens", "auto")
-    if isinstance(max_tokens, str) and max_tokens.lower() == "auto":
-        config.set("llm.max_tokens", "auto")
-    else:
-        config.set("llm.max_tokens", int(max_tokens))
-
-    config.set("llm.enforce_char_limit", bool(payload.get("enforce_char_limit", False)))
+    # Collected here and written to .env in a single pass at the end
+    env_updates: Dict[str, str] = {
+        "DISCORD_TOKEN": settings["discord_token"],
+        "DISCORD_PREFIX": settings["prefix"],
+    }
 
-    # Tools / web search
-    search_enabled = bool(payload.get("search_enabled", True))
-    config.set("tools.web_search.enabled", search_enabled)
+    provider = settings["provider"]
+    model = settings["model"]
+    env_key = PROVIDER_ENV_KEYS[provider]
+    if env_key:
+        env_updates[env_key] = settings["api_key"]
+    env_updates["DEFAULT_LLM_PROVIDER"] = provider
+    env_updates["DEFAULT_MODEL"] = model
+
+    search_enabled = settings["search_enabled"]
+    screening_enabled = settings["screening_enabled"]
+    config_updates: Dict[str, Any] = {
+        "bot.prefix": settings["prefix"],
+        "llm.default_provider": provider,
+        "llm.default_model": model,
+        "llm.system_prompt": settings["system_prompt"],
+        "llm.temperature": settings["temperature"],
+        "llm.max_tokens": settings["max_tokens"],
+        "llm.enforce_char_limit": settings["enforce_char_limit"],
+        # Tools / web search
+        "tools.web_search.enabled": search_enabled,
+        # Dashboard
+        "dashboard.enabled": settings["dashboard_enabled"],
+        "dashboard.port": settings["dashboard_port"],
+        # Screening
+        "screening.enabled": screening_enabled,
+        "screening.model": settings["screening_model"] if screening_enabled else None,
+        "screening.action": settings["screening_action"] if screening_enabled else "block",
+        "screening.policy": settings["screening_policy"] if screening_enabled else None,
+        "screening.channel_id": settings["screening_channel_id"] if screening_enabled else "",
+    }
     if search_enabled:
-        provider_choice = payload.get("search_provider", "duckduckgo")
-        config.set("tools.web_search.default_provider", provider_choice)
-        if provider_choice == "searxng":
-            searxng_url = payload.get("searxng_url", "http://localhost:8888").strip()
-            config.set("tools.web_search.searxng_url", searxng_url)
-            _set_env_value(env_path, "SEARXNG_URL", searxng_url)
-
-    # Dashboard
-    config.set("dashboard.enabled", bool(payload.get("dashboard_enabled", True)))
-    config.set("dashboard.port", int(payload.get("dashboard_port", 5000)))
-
-    # Screening
-    screening_enabled = bool(payload.get("screening_enabled", False))
-    config.set("screening.enabled", screening_enabled)
-    if screening_enabled:
-        config.set("screening.model", payload.get("screening_model", model))
-        config.set("screening.action", payload.get("screening_action", "block"))
-        config.set("screening.policy", payload.get("screening_policy"))
-        if payload.get("screening_action") == "escalate":
-            config.set("screening.channel_id", payload.get("screening_channel_id", ""))
-        else:
-            config.set("screening.channel_id", "")
-    else:
-        config.set("screening.model", None)
-        config.set("screening.action", "block")
-        config.set("screening.policy", None)
-        config.set("screening.channel_id", "")
+        config_updates["tools.web_search.default_provider"] = settings["search_provider"]
+        if settings["search_provider"] == "searxng":
+            config_updates["tools.web_search.searxng_url"] = settings["searxng_url"]
+            env_updates["SEARXNG_URL"] = settings["searxng_url"]
+
+    with _persist_lock:
+        # Env first: config.update resets the cached is_configured check
+        set_env_values(env_path, env_updates)
+        config.update(config_updates)
 
 
 def create_setup_app(options: SetupOptions) -> Flask:
     """Create a standalone Flask app for the setup workflow."""
+    # Imported here so that importing this module (main.py does) stays cheap
+    from flask import Flask, jsonify, make_response, render_template, request
+
     env_path = _ensure_env_file()
     config_manager = ConfigManager()
 
     app = Flask(__name__, template_folder=str(TEMPLATE_DIR))
+    # Emit compact JSON in insertion order; nothing relies on sorted keys
+    app.json.sort_keys = False
+    app.json.compact = True
+    # Templates don't change while the wizard runs; don't stat them per render
+    app.config["TEMPLATES_AUTO_RELOAD"] = False
     app.config["SETUP_OPTIONS"] = options
     app.config["ENV_PATH"] = env_path
     app.config["CONFIG_MANAGER"] = config_manager
+    # Setup state ETag: a per-process token plus a counter bumped on every save
+    app.config["STATE_TOKEN"] = secrets.token_hex(4)
+    app.config["STATE_VERSION"] = 0
+    # next() on a count is atomic, so concurrent saves never reuse a version
+    state_versions = itertools.count(1)
+
+    # setup.html only uses url_for, so its output never changes; render it once
+    rendered_setup_page: Dict[str, str] = {}
 
     @app.route("/setup")
-    def render_setup() -> str:
-        return render_template("setup.html")
+    def render_setup():
+        html = rendered_setup_page.get("html")
+        if html is None:
+            html = rendered_setup_page["html"] = render_template("setup.html")
+        response = make_response(html)
+        response.add_etag()
+        return response.make_conditional(request)
 
     @app.route("/api/setup/state")
     def setup_state():
+        etag = f'{app.config["STATE_TOKEN"]}-{app.config["STATE_VERSION"]}'
+        if request.if_none_match.contains_weak(etag):
+            return "", 304
+
         options: SetupOptions = app.config["SETUP_OPTIONS"]
         config_state = _serialize_config(config_manager)
-        return jsonify(
+        response = jsonify(
             {
                 "success": True,
                 "data": config_state,
-                "providers": [
-                    {
-                        "id": "gemini",
-                        "name": "Google Gemini",
-                        "tagline": "Fast, affordable, generous free tier",
-                        "recommended": True,
-                    },
-                    {
-                        "id": "openai",
-                        "name": "OpenAI",
-                        "tagline": "GPT-4 & GPT-3.5 family",
-                        "recommended": False,
-                    },
-                    {
-                        "id": "anthropic",
-                        "name": "Anthropic",
-                        "tagline": "Claude 3 family",
-                        "recommended": False,
-                    },
-                    {
-                        "id": "ollama",
-                        "name": "Ollama (Local)",
-                        "tagline": "Run local models for free",
-                        "recommended": False,
-                    },
-                    {
-                        "id": "openrouter",
-                        "name": "OpenRouter",
-                        "tagline": "Unified access to many providers",
-                        "recommended": False,
-                    },
-                ],
-                "models": PROVIDER_MODELS,
-                "ollamaGuide": OLLAMA_GUIDE,
+                **_STATIC_SETUP_STATE,
                 "allowLaunch": options.allow_launch,
                 "autoStartDashboard": options.auto_start_dashboard,
             }
         )
+        response.set_etag(etag, weak=True)
+        # Let the browser keep the body but revalidate it on every poll
+        response.headers["Cache-Control"] = "no-cache"
+        return response
 
     @app.route("/api/setup/save", methods=["POST"])
     def save_setup():
-        payload = request.get_json(force=True, silent=True) or {}
-        error = _validate_payload(payload)
+        payload = _normalize_payload(request.get_json(force=True, silent=True) or {})
+        error, settings = _validate_payload(payload)
         if error:
             return jsonify({"success": False, "error": error}), 400
 
         try:
-            _persist_configuration(payload, config_manager, env_path)
+            _persist_configuration(settings, config_manager, env_path)
         except Exception as exc:  # pragma: no cover - defensive
             logger.error("Failed to persist setup configuration", exc_info=True)
             return jsonify({"success": False, "error": str(exc)}), 500
+        finally:
+            # Even a failed save may have written part of the configuration
+            app.config["STATE_VERSION"] = next(state_versions)
 
         options: SetupOptions = app.config["SETUP_OPTIONS"]
         if options.completion_event:
@@ -396,29 +527,27 @@ def create_setup_app(options: SetupOptions) -> Flask:
             return jsonify({"success": False, "error": f"Please provide your {provider.title()} API key."}), 400
 
         try:
-            # Create LLM provider instance
-            llm = LLMProviderFactory.create_provider(provider, api_key=api_key)
+            # Shared instance, so repeated generations reuse its HTTP client
+            llm = LLMProviderFactory.get_or_create_provider(provider, api_key=api_key)
             
-            # Generate the prompt
-            assistant_prompt = f"""You are a helpful assistant that creates system prompts for Discord bots.
-The user wants their bot to: {user_request}
-
-Create a clear, concise system prompt (2-4 sentences) that defines the bot's personality, tone, and behavior.
-The prompt should be professional and suitable for a Discord bot.
-
-Respond with ONLY the system prompt text, nothing else."""
+            messages = [Message(role="user", content=PROMPT_GENERATION_TEMPLATE.format(user_request=user_request))]
             
             async def generate():
                 response = await llm.complete(
-                    messages=[Message(role="user", content=assistant_prompt)],
+                    messages=messages,
                     model=model,
-                    max_tokens=300,
+                    max_tokens=PROMPT_GENERATION_MAX_TOKENS,
                     temperature=0.7
                 )
                 return response.content.strip()
             
-            # Run async generation
-            generated_prompt = asyncio.run(generate())
+            # Run on the shared background loop
+            future = asyncio.run_coroutine_threadsafe(generate(), _get_llm_loop())
+            try:
+                generated_prompt = future.result(timeout=PROMPT_GENERATION_TIMEOUT)
+            except concurrent.futures.TimeoutError:
+                future.cancel()
+                raise
             
             return jsonify({"success": True, "prompt": generated_prompt})
             
@@ -433,17 +562,17 @@ class _ServerThread(threading.Thread):
     """Utility thread for running Flask via werkzeug's make_server."""
 
     def __init__(self, app: Flask, host: str, port: int):
+        from werkzeug.serving import make_server
+
         super().__init__(daemon=True)
-        self._server = make_server(host, port, app)
-        self._ctx = app.app_context()
-        self._ctx.push()
+        # Threaded, so state polls aren't stuck behind a slow prompt generation
+        self._server = make_server(host, port, app, threaded=True)
 
     def run(self) -> None:
         self._server.serve_forever()
 
     def shutdown(self) -> None:
         self._server.shutdown()
-        self._ctx.pop()
 
 
 def run_web_setup(
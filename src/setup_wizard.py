@@ -8,9 +8,9 @@ from rich.console import Console
 from rich.prompt import Prompt, Confirm
 from rich.panel import Panel
 from rich.table import Table
-from dotenv import set_key
 
 from src.config.manager import ConfigManager
+from src.utils.env_file import create_env_file, set_env_values
 from src.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -26,12 +26,11 @@ class SetupWizard:
         self.env_file = Path('.env')
         
         # Create .env if it doesn't exist
-        if not self.env_file.exists():
-            if Path('.env.example').exists():
-                import shutil
-                shutil.copy('.env.example', '.env')
-            else:
-                self.env_file.touch()
+        create_env_file(self.env_file, '.env.example')
+        
+        # Changes made during the run, written in one pass each by _flush
+        self._env_pending = {}
+        self._config_pending = {}
     
     async def run(self):
         """Run the setup wizard."""
@@ -41,17 +40,20 @@ class SetupWizard:
             border_style="cyan"
         ))
         
-        # Step 1: Discord Configuration
-        await self._setup_discord()
-        
-        # Step 2: LLM Provider
-        await self._setup_llm_provider()
-        
-        # Step 3: Tools
-        await self._setup_tools()
-        
-        # Step 4: Optional Features
-        await self._setup_optional_features()
+        try:
+            # Step 1: Discord Configuration
+            await self._setup_discord()
+            
+            # Step 2: LLM Provider
+            await self._setup_llm_provider()
+            
+            # Step 3: Tools
+            await self._setup_tools()
+            
+            # Step 4: Optional Features
+            await self._setup_optional_features()
+        finally:
+            self._flush()
         
         # Summary
         console.print("\n[bold green]✓ Setup complete![/bold green]")
@@ -72,7 +74,7 @@ class SetupWizard:
             "Command prefix",
             default=self.config_manager.get('bot.prefix', '!')
         )
-        self.config_manager.set('bot.prefix', prefix)
+        self._set_config('bot.prefix', prefix)
         
         console.print("[green]✓ Discord configured[/green]")
     
@@ -120,21 +122,21 @@ class SetupWizard:
             )
             self._set_env(env_key, api_key)
         
-        self.config_manager.set('llm.default_provider', provider_name)
-        self.config_manager.set('llm.default_model', default_model)
+        self._set_config('llm.default_provider', provider_name)
+        self._set_config('llm.default_model', default_model)
         
         # LLM parameters
         temperature = Prompt.ask(
             "Temperature (0.0-2.0, higher = more creative)",
             default=str(self.config_manager.get('llm.temperature', 0.7))
         )
-        self.config_manager.set('llm.temperature', float(temperature))
+        self._set_config('llm.temperature', float(temperature))
         
         max_tokens = Prompt.ask(
             "Max tokens per response",
             default=str(self.config_manager.get('llm.max_tokens', 2048))
         )
-        self.config_manager.set('llm.max_tokens', int(max_tokens))
+        self._set_config('llm.max_tokens', int(max_tokens))
         
         console.print(f"[green]✓ {provider_name.title()} configured[/green]")
     
@@ -180,8 +182,8 @@ class SetupWizard:
             }
             
             provider = search_map[search_choice]
-            self.config_manager.set('tools.web_search.enabled', True)
-            self.config_manager.set('tools.web_search.default_provider', provider)
+            self._set_config('tools.web_search.enabled', True)
+            self._set_config('tools.web_search.default_provider', provider)
             
             # Configure provider-specific settings
             if provider == "google":
@@ -200,7 +202,7 @@ class SetupWizard:
             
             console.print(f"[green]✓ Web search configured ({provider})[/green]")
         else:
-            self.config_manager.set('tools.web_search.enabled', False)
+            self._set_config('tools.web_search.enabled', False)
     
     async def _setup_optional_features(self):
         """Setup optional features."""
@@ -211,32 +213,43 @@ class SetupWizard:
             "Enable web dashboard?",
             default=True
         )
-        self.config_manager.set('dashboard.enabled', enable_dashboard)
+        self._set_config('dashboard.enabled', enable_dashboard)
         
         if enable_dashboard:
             port = Prompt.ask(
                 "Dashboard port",
                 default=str(self.config_manager.get('dashboard.port', 5000))
             )
-            self.config_manager.set('dashboard.port', int(port))
+            self._set_config('dashboard.port', int(port))
         
         # Content moderation
         enable_moderation = Confirm.ask(
             "Enable content moderation?",
             default=False
         )
-        self.config_manager.set('moderation.enabled', enable_moderation)
+        self._set_config('moderation.enabled', enable_moderation)
         
         # Plugin system
         enable_plugins = Confirm.ask(
             "Enable plugin system?",
             default=True
         )
-        self.config_manager.set('plugins.enabled', enable_plugins)
+        self._set_config('plugins.enabled', enable_plugins)
         
         console.print("[green]✓ Optional features configured[/green]")
     
     def _set_env(self, key: str, value: str):
-        """Set environment variable in .env file."""
-        set_key(str(self.env_file), key, value)
+        """Set environment variable now and queue it for the .env file."""
+        self._env_pending[key] = value
         os.environ[key] = value
+    
+    def _set_config(self, key: str, value):
+        """Queue a configuration value for the config file."""
+        self._config_pending[key] = value
+    
+    def _flush(self):
+        """Write queued environment variables and configuration values."""
+        set_env_values(self.env_file, self._env_pending)
+        self._env_pending.clear()
+        self.config_manager.update(self._config_pending)
+        self._config_pending.clear()
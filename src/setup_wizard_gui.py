@@ -3,12 +3,13 @@ GUI Setup Wizard using customtkinter.
 Modern, user-friendly interface for first-time configuration.
 """
 
+import functools
 import os
+import threading
 import tkinter as tk
 from tkinter import messagebox, ttk
 import customtkinter as ctk
 from pathlib import Path
-from dotenv import set_key
 import asyncio
 
 from src.config.manager import ConfigManager
@@ -16,14 +17,466 @@ from src.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
-ctk.set_appearance_mode("dark")
-ctk.set_default_color_theme("blue")
+# Shown for OpenRouter until the live model list has been fetched
+OPENROUTER_FALLBACK_MODELS = [
+    "openai/gpt-4o",
+    "openai/gpt-4-turbo",
+    "anthropic/claude-3-5-sonnet-20241022",
+    "google/gemini-pro-1.5",
+    "meta-llama/llama-3.2-90b-vision-instruct",
+    "Type custom model name...",
+]
+
+# Declarative layout of every step except the final summary, rendered by
+# SetupWizardGUI._render_step. Each node is a dict with a "kind" (title,
+# text, heading, hint, label, entry, radio, checkbox, combo, textbox, button
+# or frame) and optional keys:
+#   var      - key into setup_data bound to the widget
+#   attr     - attribute name the widget is stored under on the wizard
+#   command  - name of the wizard method to call
+#   pack     - pack() options overriding the kind's defaults; None leaves
+#              the widget unpacked for a toggle handler to show later
+#   children - nested nodes (frames only)
+# "on_build" names wizard methods to call once the step has been built.
+STEP_SCHEMA = {
+    0: {
+        "layout": [
+            {"kind": "title", "text": "Discord Configuration"},
+            {"kind": "text", "text": "First, let's set up your Discord bot connection."},
+            {
+                "kind": "frame",
+                "pack": {"fill": "x", "padx": 40, "pady": 20},
+                "children": [
+                    {"kind": "heading", "text": "Discord Bot Token:"},
+                    {
+                        "kind": "entry",
+                        "var": "discord_token",
+                        "placeholder": "Paste your Discord bot token here",
+                        "width": 500,
+                        "secret": True,
+                        "pack": {"anchor": None},
+                    },
+                    {
+                        "kind": "button",
+                        "text": "How to get a Discord token?",
+                        "command": "show_discord_help",
+                        "link": True,
+                    },
+                ],
+            },
+            {
+                "kind": "frame",
+                "pack": {"fill": "x", "padx": 40, "pady": 10},
+                "children": [
+                    {"kind": "heading", "text": "Command Prefix:"},
+                    {"kind": "entry", "var": "prefix", "placeholder": "!", "width": 100},
+                    {
+                        "kind": "hint",
+                        "text": "Users will use this prefix for commands (e.g., !help)",
+                    },
+                ],
+            },
+        ],
+    },
+    1: {
+        "layout": [
+            {"kind": "title", "text": "AI Provider Configuration"},
+            {"kind": "text", "text": "Choose your AI provider and enter the API key."},
+            {
+                "kind": "frame",
+                "pack": {"fill": "x", "padx": 40, "pady": 20},
+                "children": [
+                    {"kind": "heading", "text": "Select AI Provider:"},
+                    {
+                        "kind": "radio",
+                        "var": "llm_provider",
+                        "command": "on_provider_change",
+                        "options": [
+                            (
+                                "Google Gemini (Recommended - Fast & Affordable, very generous free tier)",
+                                "gemini",
+                            ),
+                            ("OpenAI (GPT-4, GPT-3.5)", "openai"),
+                            ("Anthropic (Claude 3)", "anthropic"),
+                            ("Ollama (Local, Free)", "ollama"),
+                            ("OpenRouter (Multiple Providers)", "openrouter"),
+                        ],
+                        "pack": {"padx": 20, "pady": 5},
+                    },
+                ],
+            },
+            {
+                "kind": "frame",
+                "attr": "api_key_frame",
+                "pack": {"fill": "x", "padx": 40, "pady": 20},
+                "children": [
+                    {"kind": "heading", "text": "API Key:"},
+                    {
+                        "kind": "entry",
+                        "attr": "api_key_entry",
+                        "var": "api_key",
+                        "placeholder": "Enter your API key here",
+                        "width": 500,
+                        "secret": True,
+                        "pack": {"anchor": None},
+                    },
+                    {
+                        "kind": "button",
+                        "text": "How to get an API key?",
+                        "command": "show_api_help",
+                        "link": True,
+                    },
+                ],
+            },
+            {
+                "kind": "frame",
+                "pack": {"fill": "x", "padx": 40, "pady": 20},
+                "children": [
+                    {"kind": "heading", "text": "Model:"},
+                    # Allows both selecting a listed model and typing a custom one
+                    {"kind": "combo", "attr": "model_combo", "var": "llm_model"},
+                ],
+            },
+        ],
+        "on_build": ["on_provider_change"],
+    },
+    2: {
+        "layout": [
+            {"kind": "title", "text": "System Prompt Configuration", "pack": {"pady": 15}},
+            {
+                "kind": "text",
+                "text": "Define how your bot should behave and respond to users.",
+            },
+            {
+                "kind": "frame",
+                "pack": {"fill": "both", "expand": True, "padx": 40, "pady": 15},
+                "children": [
+                    {"kind": "heading", "text": "System Prompt:"},
+                    {
+                        "kind": "hint",
+                        "text": "This defines the bot's personality, tone, and behavior guidelines.",
+                    },
+                    {
+                        "kind": "textbox",
+                        "attr": "system_prompt_text",
+                        "var": "system_prompt",
+                        "height": 150,
+                    },
+                ],
+            },
+            {
+                "kind": "frame",
+                "pack": {"fill": "x", "padx": 40, "pady": 10},
+                "children": [
+                    {"kind": "heading", "text": "💡 AI Prompt Assistant"},
+                    {
+                        "kind": "hint",
+                        "text": "Describe what you want your bot to do, and AI will generate a system prompt for you.",
+                    },
+                    {
+                        "kind": "frame",
+                        "children": [
+                            {
+                                "kind": "entry",
+                                "attr": "prompt_request_entry",
+                                "placeholder": "E.g., 'Make my bot act like a pirate who loves coding'",
+                                "width": 550,
+                                "pack": {"side": "left", "anchor": None, "padx": 5, "pady": 0},
+                            },
+                            {
+                                "kind": "button",
+                                "attr": "generate_prompt_btn",
+                                "text": "Generate Prompt",
+                                "command": "generate_system_prompt",
+                                "width": 130,
+                                "pack": {"side": "left", "padx": 5, "pady": 0},
+                            },
+                        ],
+                    },
+                    # Status of the AI prompt generation
+                    {"kind": "hint", "attr": "prompt_status_label", "text": ""},
+                ],
+            },
+            {
+                "kind": "frame",
+                "pack": {"fill": "x", "padx": 40, "pady": 10},
+                "children": [
+                    {"kind": "heading", "text": "⚙️ Response Settings"},
+                    {
+                        "kind": "checkbox",
+                        "var": "enforce_char_limit",
+                        "text": "Instruct bot to keep responses under 2000 characters (prevents message splitting)",
+                        "font": "body",
+                    },
+                    {
+                        "kind": "hint",
+                        "text": "When enabled, adds instructions to the system prompt asking the LLM to keep responses concise.",
+                        "font": "tiny",
+                        "pack": {"pady": (0, 10)},
+                    },
+                ],
+            },
+        ],
+    },
+    3: {
+        "layout": [
+            {"kind": "title", "text": "Tools & Features"},
+            {"kind": "text", "text": "Enable additional features for your bot."},
+            {
+                "kind": "frame",
+                "pack": {"fill": "x", "padx": 40, "pady": 20},
+                "children": [
+                    {
+                        "kind": "checkbox",
+                        "var": "enable_search",
+                        "text": "Enable Web Search Tool",
+                        "command": "on_search_toggle",
+                    },
+                    {
+                        "kind": "hint",
+                        "text": "Allows the bot to search the internet for real-time information.",
+                        "pack": {"padx": 30},
+                    },
+                    {
+                        "kind": "frame",
+                        "attr": "search_provider_frame",
+                        "pack": {"padx": 30},
+                        "children": [
+                            {"kind": "label", "text": "Search Provider:", "pack": {"padx": 0}},
+                            {
+                                "kind": "radio",
+                                "var": "search_provider",
+                                "command": "on_search_provider_change",
+                                "options": [
+                                    (
+                                        "DuckDuckGo (Free, No API Key, pretty harsh rate limits)",
+                                        "duckduckgo",
+                                    ),
+                                    ("Google Custom Search", "google"),
+                                    ("Brave Search", "brave"),
+                                    ("SearxNG (Self-hosted, free, no rate limits)", "searxng"),
+                                ],
+                                "pack": {"padx": 10},
+                            },
+                            # Only shown while SearxNG is selected
+                            {
+                                "kind": "frame",
+                                "attr": "searxng_url_frame",
+                                "pack": None,
+                                "children": [
+                                    {
+                                        "kind": "label",
+                                        "text": "SearxNG Instance URL:",
+                                        "pack": {"padx": 0},
+                                    },
+                                    {
+                                        "kind": "entry",
+                                        "var": "searxng_url",
+                                        "placeholder": "http://localhost:8888",
+                                        "width": 400,
+                                    },
+                                    {
+                                        "kind": "hint",
+                                        "text": "Enter the URL of your SearxNG instance",
+                                        "font": "tiny",
+                                    },
+                                ],
+                            },
+                        ],
+                    },
+                ],
+            },
+            {
+                "kind": "frame",
+                "pack": {"fill": "x", "padx": 40, "pady": 20},
+                "children": [
+                    {
+                        "kind": "checkbox",
+                        "var": "enable_dashboard",
+                        "text": "Enable Web Dashboard",
+                    },
+                    {
+                        "kind": "hint",
+                        "text": "Web-based interface for monitoring and configuration.",
+                        "pack": {"padx": 30},
+                    },
+                    {
+                        "kind": "frame",
+                        "pack": {"padx": 30, "pady": 5},
+                        "children": [
+                            {
+                                "kind": "label",
+                                "text": "Dashboard Port:",
+                                "pack": {"side": "left", "anchor": None, "padx": 5, "pady": 0},
+                            },
+                            {
+                                "kind": "entry",
+                                "var": "dashboard_port",
+                                "width": 100,
+                                "pack": {"side": "left", "anchor": None, "padx": 5, "pady": 0},
+                            },
+                        ],
+                    },
+                ],
+            },
+        ],
+        "on_build": ["on_search_toggle"],
+    },
+    4: {
+        "layout": [
+            {"kind": "title", "text": "Content Screening (Optional)", "pack": {"pady": 15}},
+            {
+                "kind": "text",
+                "text": "Configure AI-powered content moderation to keep responses safe and appropriate.",
+            },
+            {
+                "kind": "frame",
+                "pack": {"fill": "x", "padx": 40, "pady": 15},
+                "children": [
+                    {
+                        "kind": "checkbox",
+                        "var": "enable_screening",
+                        "text": "Enable Content Screening",
+                        "command": "on_screening_toggle",
+                    },
+                    {
+                        "kind": "hint",
+                        "text": "Uses AI to review bot responses before sending them to Discord.",
+                        "pack": {"padx": 30},
+                    },
+                ],
+            },
+            # Shown while screening is enabled
+            {
+                "kind": "frame",
+                "attr": "screening_config_frame",
+                "pack": {"fill": "both", "expand": True, "padx": 40},
+                "children": [
+                    {
+                        "kind": "frame",
+                        "children": [
+                            {"kind": "heading", "text": "Screening Model:", "font": "subheader"},
+                            {
+                                "kind": "hint",
+                                "text": "Choose a fast, cost-effective model for screening (e.g., gemini-flash, gpt-4o-mini).",
+                            },
+                            # Offers the same provider's models
+                            {
+                                "kind": "combo",
+                                "attr": "screening_model_combo",
+                                "var": "screening_model",
+                            },
+                        ],
+                    },
+                    {
+                        "kind": "frame",
+                        "children": [
+                            {
+                                "kind": "heading",
+                                "text": "Action on Flagged Content:",
+                                "font": "subheader",
+                            },
+                            {
+                                "kind": "radio",
+                                "var": "screening_action",
+                                "command": "on_screening_action_change",
+                                "options": [
+                                    ("Block and notify user", "block"),
+                                    ("Log but allow", "log"),
+                                    ("Replace with safe message", "replace"),
+                                    ("Escalate to moderators", "escalate"),
+                                ],
+                            },
+                            # Only shown for the escalate action
+                            {
+                                "kind": "frame",
+                                "attr": "mod_channel_frame",
+                                "pack": {"padx": 20},
+                                "children": [
+                                    {
+                                        "kind": "label",
+                                        "text": "Moderation Channel ID:",
+                                        "pack": {"pady": 2},
+                                    },
+                                    {
+                                        "kind": "entry",
+                                        "var": "screening_channel_id",
+                                        "placeholder": "Right-click channel → Copy Channel ID",
+                                        "width": 400,
+                                    },
+                                    {
+                                        "kind": "hint",
+                                        "text": "Flagged messages will be sent here for manual review.",
+                                    },
+                                ],
+                            },
+                        ],
+                    },
+                    {
+                        "kind": "frame",
+                        "pack": {"fill": "both", "expand": True},
+                        "children": [
+                            {"kind": "heading", "text": "Screening Policy:", "font": "subheader"},
+                            {
+                                "kind": "hint",
+                                "text": "Define what content should be flagged (e.g., harmful, inappropriate, offensive).",
+                            },
+                            {
+                                "kind": "textbox",
+                                "attr": "screening_policy_text",
+                                "var": "screening_policy",
+                                "height": 120,
+                            },
+                        ],
+                    },
+                ],
+            },
+        ],
+        "on_build": ["on_screening_toggle", "on_screening_action_change"],
+    },
+}
+
+# pack() options for each node kind, before the node's own overrides
+_PACK_DEFAULTS = {
+    "title": {"pady": 20},
+    "text": {"pady": 5},
+    "heading": {"anchor": "w", "padx": 10, "pady": 5},
+    "hint": {"anchor": "w", "padx": 10, "pady": 2},
+    "label": {"anchor": "w", "padx": 10, "pady": 5},
+    "entry": {"anchor": "w", "padx": 10, "pady": 5},
+    "radio": {"anchor": "w", "padx": 20, "pady": 3},
+    "checkbox": {"anchor": "w", "padx": 10, "pady": 10},
+    "combo": {"padx": 10, "pady": 5},
+    "textbox": {"padx": 10, "pady": 10},
+    "button": {"pady": 5},
+    "frame": {"fill": "x", "padx": 10, "pady": 10},
+}
+
+# Font and text colour of each label kind
+_LABEL_STYLES = {
+    "title": ("title", None),
+    "text": ("body", None),
+    "heading": ("header", None),
+    "hint": ("small", "gray"),
+    "label": ("body", None),
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _configure_appearance():
+    """Apply the wizard theme once, when the first window is created.
+
+    Loading the theme JSON is deferred so importing this module stays cheap.
+    """
+    ctk.set_appearance_mode("dark")
+    ctk.set_default_color_theme("blue")
 
 
 class SetupWizardGUI(ctk.CTk):
     """GUI Setup Wizard for OpenLLM."""
 
     def __init__(self):
+        _configure_appearance()
         super().__init__()
 
         self.title("OpenLLM - Setup Wizard")
@@ -76,9 +529,43 @@ class SetupWizardGUI(ctk.CTk):
             "screening_channel_id": tk.StringVar(value=""),
         }
 
+        # Step frames are built on first visit and reused afterwards; the
+        # Tk variables above already carry their state between visits
+        self._step_frames = {}
+        self._current_frame = None
+
+        # Fetched model lists keyed by (provider, api_key), and keys with a refresh in flight
+        self._model_cache = {}
+        self._model_refreshing = set()
+
+        # Event loop thread for prompt generation, started on first use
+        self._llm_loop = None
+
+        # Shared fonts, see _fonts
+        self._fonts_cache = None
+
         self.create_widgets()
         self.show_step(0)
 
+    def _fonts(self) -> dict:
+        """Return the wizard's fonts, creating them on first use.
+
+        Every widget shares these instead of building its own CTkFont.
+        """
+        if self._fonts_cache is None:
+            self._fonts_cache = {
+                "hero": ctk.CTkFont(size=24, weight="bold"),
+                "title": ctk.CTkFont(size=20, weight="bold"),
+                "header": ctk.CTkFont(size=14, weight="bold"),
+                "subheader": ctk.CTkFont(size=13, weight="bold"),
+                "label": ctk.CTkFont(size=14),
+                "value": ctk.CTkFont(size=13),
+                "body": ctk.CTkFont(size=12),
+                "small": ctk.CTkFont(size=11),
+                "tiny": ctk.CTkFont(size=10),
+            }
+        return self._fonts_cache
+
     def create_widgets(self):
         """Create the main UI layout."""
         # Header
@@ -88,7 +575,7 @@ class SetupWizardGUI(ctk.CTk):
         self.title_label = ctk.CTkLabel(
             self.header,
             text="🤖 OpenLLM Setup",
-            font=ctk.CTkFont(size=20, weight="bold"),
+            font=self._fonts()["title"],
         )
         self.title_label.pack(pady=20)
 
@@ -99,13 +586,16 @@ class SetupWizardGUI(ctk.CTk):
 
         # Step label
         self.step_label = ctk.CTkLabel(
-            self, text="Step 1 of 4", font=ctk.CTkFont(size=14)
+            self, text="Step 1 of 4", font=self._fonts()["label"]
         )
         self.step_label.pack(pady=5)
 
         # Content frame (will hold different steps)
         self.content_frame = ctk.CTkFrame(self)
         self.content_frame.pack(fill="both", expand=True, padx=20, pady=20)
+        # The window size is fixed by geometry(), so swapping step frames
+        # shouldn't send size requests up to the toplevel
+        self.content_frame.pack_propagate(False)
 
         # Navigation buttons
         self.nav_frame = ctk.CTkFrame(self, height=60, corner_radius=0)
@@ -121,31 +611,27 @@ class SetupWizardGUI(ctk.CTk):
         )
         self.next_button.pack(side="right", padx=20, pady=10)
 
-    def clear_content(self):
-        """Clear the content frame."""
-        for widget in self.content_frame.winfo_children():
-            widget.destroy()
-
     def show_step(self, step):
         """Show the specified step."""
         self.current_step = step
         self.progress.set((step + 1) / self.total_steps)
         self.step_label.configure(text=f"Step {step + 1} of {self.total_steps}")
 
-        self.clear_content()
-
-        if step == 0:
-            self.show_discord_step()
-        elif step == 1:
-            self.show_llm_step()
-        elif step == 2:
-            self.show_system_prompt_step()
-        elif step == 3:
-            self.show_tools_step()
-        elif step == 4:
-            self.show_screening_step()
-        elif step == 5:
-            self.show_final_step()
+        outgoing = self._current_frame
+        if outgoing is not None:
+            if outgoing in self._step_frames.values():
+                outgoing.pack_forget()
+            else:
+                outgoing.destroy()
+
+        frame = self._step_frames.get(step)
+        if frame is None:
+            frame = self._build_step(step)
+        frame.pack(fill="both", expand=True)
+        self._current_frame = frame
+
+        # Build the next step while the user is busy with this one
+        self.after_idle(self._prebuild, step + 1)
 
         # Update button states
         self.back_button.configure(state="disabled" if step == 0 else "normal")
@@ -154,170 +640,133 @@ class SetupWizardGUI(ctk.CTk):
         else:
             self.next_button.configure(text="Next →")
 
-    def show_discord_step(self):
-        """Step 1: Discord Configuration."""
-        title = ctk.CTkLabel(
-            self.content_frame,
-            text="Discord Configuration",
-            font=ctk.CTkFont(size=20, weight="bold"),
-        )
-        title.pack(pady=20)
-
-        desc = ctk.CTkLabel(
-            self.content_frame,
-            text="First, let's set up your Discord bot connection.",
-            font=ctk.CTkFont(size=12),
-        )
-        desc.pack(pady=5)
-
-        # Discord token
-        token_frame = ctk.CTkFrame(self.content_frame)
-        token_frame.pack(fill="x", padx=40, pady=20)
-
-        ctk.CTkLabel(
-            token_frame,
-            text="Discord Bot Token:",
-            font=ctk.CTkFont(size=14, weight="bold"),
-        ).pack(anchor="w", padx=10, pady=5)
-
-        ctk.CTkEntry(
-            token_frame,
-            textvariable=self.setup_data["discord_token"],
-            placeholder_text="Paste your Discord bot token here",
-            width=500,
-            show="•",
-        ).pack(padx=10, pady=5)
-
-        help_btn = ctk.CTkButton(
-            token_frame,
-            text="How to get a Discord token?",
-            command=self.show_discord_help,
-            fg_color="transparent",
-            hover_color=("#3B8ED0", "#1F6AA5"),
-        )
-        help_btn.pack(pady=5)
-
-        # Bot prefix
-        prefix_frame = ctk.CTkFrame(self.content_frame)
-        prefix_frame.pack(fill="x", padx=40, pady=10)
-
-        ctk.CTkLabel(
-            prefix_frame,
-            text="Command Prefix:",
-            font=ctk.CTkFont(size=14, weight="bold"),
-        ).pack(anchor="w", padx=10, pady=5)
-
-        ctk.CTkEntry(
-            prefix_frame,
-            textvariable=self.setup_data["prefix"],
-            placeholder_text="!",
-            width=100,
-        ).pack(anchor="w", padx=10, pady=5)
-
-        ctk.CTkLabel(
-            prefix_frame,
-            text="Users will use this prefix for commands (e.g., !help)",
-            font=ctk.CTkFont(size=11),
-            text_color="gray",
-        ).pack(anchor="w", padx=10, pady=2)
-
-    def show_llm_step(self):
-        """Step 2: LLM Provider Configuration."""
-        title = ctk.CTkLabel(
-            self.content_frame,
-            text="AI Provider Configuration",
-            font=ctk.CTkFont(size=20, weight="bold"),
-        )
-        title.pack(pady=20)
-
-        desc = ctk.CTkLabel(
-            self.content_frame,
-            text="Choose your AI provider and enter the API key.",
-            font=ctk.CTkFont(size=12),
-        )
-        desc.pack(pady=5)
-
-        # Provider selection
-        provider_frame = ctk.CTkFrame(self.content_frame)
-        provider_frame.pack(fill="x", padx=40, pady=20)
-
-        ctk.CTkLabel(
-            provider_frame,
-            text="Select AI Provider:",
-            font=ctk.CTkFont(size=14, weight="bold"),
-        ).pack(anchor="w", padx=10, pady=5)
-
-        providers = [
-            (
-                "Google Gemini (Recommended - Fast & Affordable, very generous free tier)",
-                "gemini",
-            ),
-            ("OpenAI (GPT-4, GPT-3.5)", "openai"),
-            ("Anthropic (Claude 3)", "anthropic"),
-            ("Ollama (Local, Free)", "ollama"),
-            ("OpenRouter (Multiple Providers)", "openrouter"),
-        ]
-
-        for i, (label, value) in enumerate(providers):
-            rb = ctk.CTkRadioButton(
-                provider_frame,
+    def _build_step(self, step):
+        """Build a step's frame without packing it, caching it for later visits."""
+        frame = ctk.CTkFrame(self.content_frame, fg_color="transparent")
+        if step in STEP_SCHEMA:
+            self._render_step(step, frame)
+        else:
+            self.show_final_step(frame)
+        # The summary must reflect the latest answers, so it is rebuilt
+        if step != self.total_steps - 1:
+            self._step_frames[step] = frame
+        return frame
+
+    def _prebuild(self, step):
+        """Build a step ahead of time so navigating to it is instant."""
+        # The summary is built on demand since it depends on the answers given
+        if step < self.total_steps - 1 and step not in self._step_frames:
+            self._build_step(step)
+
+    def _render_step(self, step, parent):
+        """Build a step's widgets from its STEP_SCHEMA entry."""
+        schema = STEP_SCHEMA[step]
+        self._render_nodes(parent, schema["layout"])
+        for handler in schema.get("on_build", ()):
+            getattr(self, handler)()
+
+    def _render_nodes(self, parent, nodes):
+        """Build and pack schema nodes into parent."""
+        for node in nodes:
+            kind = node["kind"]
+            if kind in _LABEL_STYLES:
+                built = self._build_label(parent, node)
+            else:
+                built = getattr(self, f"_build_{kind}")(parent, node)
+
+            if "attr" in node:
+                setattr(self, node["attr"], built)
+
+            overrides = node.get("pack", {})
+            if overrides is None:
+                continue
+            options = {**_PACK_DEFAULTS[kind], **overrides}
+            options = {key: value for key, value in options.items() if value is not None}
+            for widget in built if isinstance(built, list) else [built]:
+                widget.pack(**options)
+
+    def _command(self, node):
+        """Resolve a node's command name to the wizard method, if any."""
+        name = node.get("command")
+        return getattr(self, name) if name else None
+
+    def _build_label(self, parent, node):
+        """Build a title, text, heading, hint or label node."""
+        font, text_color = _LABEL_STYLES[node["kind"]]
+        options = {"font": self._fonts()[node.get("font", font)]}
+        if text_color:
+            options["text_color"] = text_color
+        return ctk.CTkLabel(parent, text=node["text"], **options)
+
+    def _build_entry(self, parent, node):
+        """Build an entry, optionally bound to a setup_data variable."""
+        options = {"width": node.get("width", 400)}
+        if "var" in node:
+            options["textvariable"] = self.setup_data[node["var"]]
+        if "placeholder" in node:
+            options["placeholder_text"] = node["placeholder"]
+        if node.get("secret"):
+            options["show"] = "•"
+        return ctk.CTkEntry(parent, **options)
+
+    def _build_radio(self, parent, node):
+        """Build one radio button per (label, value) option."""
+        return [
+            ctk.CTkRadioButton(
+                parent,
                 text=label,
-                variable=self.setup_data["llm_provider"],
+                variable=self.setup_data[node["var"]],
                 value=value,
-                command=self.on_provider_change,
+                command=self._command(node),
             )
-            rb.pack(anchor="w", padx=20, pady=5)
-            if i == 0:  # First one is recommended
-                rb.select()
-
-        # API Key
-        self.api_key_frame = ctk.CTkFrame(self.content_frame)
-        self.api_key_frame.pack(fill="x", padx=40, pady=20)
-
-        self.api_key_label = ctk.CTkLabel(
-            self.api_key_frame,
-            text="API Key:",
-            font=ctk.CTkFont(size=14, weight="bold"),
-        )
-        self.api_key_label.pack(anchor="w", padx=10, pady=5)
-
-        self.api_key_entry = ctk.CTkEntry(
-            self.api_key_frame,
-            textvariable=self.setup_data["api_key"],
-            placeholder_text="Enter your API key here",
-            width=500,
-            show="•",
-        )
-        self.api_key_entry.pack(padx=10, pady=5)
-
-        self.api_help_btn = ctk.CTkButton(
-            self.api_key_frame,
-            text="How to get an API key?",
-            command=self.show_api_help,
-            fg_color="transparent",
-            hover_color=("#3B8ED0", "#1F6AA5"),
+            for label, value in node["options"]
+        ]
+
+    def _build_checkbox(self, parent, node):
+        """Build a checkbox bound to a setup_data variable."""
+        return ctk.CTkCheckBox(
+            parent,
+            text=node["text"],
+            variable=self.setup_data[node["var"]],
+            font=self._fonts()[node.get("font", "header")],
+            command=self._command(node),
         )
-        self.api_help_btn.pack(pady=5)
 
-        # Model selection
-        self.model_frame = ctk.CTkFrame(self.content_frame)
-        self.model_frame.pack(fill="x", padx=40, pady=20)
+    def _build_combo(self, parent, node):
+        """Build a model dropdown for the selected provider."""
+        # Model lists follow the selected provider
+        provider = self.setup_data["llm_provider"].get()
+        return ctk.CTkComboBox(
+            parent,
+            variable=self.setup_data[node["var"]],
+            values=self.get_models_for_provider(provider),
+            width=node.get("width", 500),
+        )
 
-        self.model_label = ctk.CTkLabel(
-            self.model_frame, text="Model:", font=ctk.CTkFont(size=14, weight="bold")
+    def _build_textbox(self, parent, node):
+        """Build a multi-line textbox seeded from a setup_data variable."""
+        textbox = ctk.CTkTextbox(
+            parent, height=node["height"], width=node.get("width", 700), wrap="word"
         )
-        self.model_label.pack(anchor="w", padx=10, pady=5)
-
-        # Combobox for model selection (allows both selection and custom input)
-        self.model_combo = ctk.CTkComboBox(
-            self.model_frame,
-            variable=self.setup_data["llm_model"],
-            values=self.get_models_for_provider("gemini"),
-            width=500,
+        textbox.insert("1.0", self.setup_data[node["var"]].get())
+        return textbox
+
+    def _build_button(self, parent, node):
+        """Build a button; link buttons get a transparent style."""
+        options = {}
+        if "width" in node:
+            options["width"] = node["width"]
+        if node.get("link"):
+            options.update(fg_color="transparent", hover_color=("#3B8ED0", "#1F6AA5"))
+        return ctk.CTkButton(
+            parent, text=node["text"], command=self._command(node), **options
         )
-        self.model_combo.pack(padx=10, pady=5)
 
-        self.on_provider_change()
+    def _build_frame(self, parent, node):
+        """Build a frame and its children."""
+        frame = ctk.CTkFrame(parent)
+        self._render_nodes(frame, node.get("children", ()))
+        return frame
 
     def get_models_for_provider(self, provider: str) -> list:
         """Get available models for a provider."""
@@ -331,153 +780,73 @@ class SetupWizardGUI(ctk.CTk):
                 "claude-3-haiku-20240307",
             ],
             "ollama": ["llama3.2", "llama3.1", "llama2", "mistral", "codellama"],
-            "openrouter": ["Loading..."],  # Will be fetched from API
         }
 
-        # Fetch OpenRouter models dynamically if that provider is selected
         if provider == "openrouter":
-            try:
-                import asyncio
-                from src.llm.openrouter_provider import OpenRouterProvider
-
-                # Try to fetch models if API key is available
-                api_key = self.setup_data["api_key"].get()
-                if api_key:
-                    try:
-                        openrouter = OpenRouterProvider(api_key=api_key)
-                        # Run async function in sync context
-                        loop = asyncio.new_event_loop()
-                        asyncio.set_event_loop(loop)
-                        fetched_models = loop.run_until_complete(
-                            openrouter.fetch_models_from_api()
-                        )
-                        loop.close()
-                        if fetched_models:
-                            return fetched_models
-                    except Exception as e:
-                        logger.warning(f"Could not fetch OpenRouter models: {e}")
-
-                # Return default list if fetch fails or no API key
-                return [
-                    "openai/gpt-4o",
-                    "openai/gpt-4-turbo",
-                    "anthropic/claude-3-5-sonnet-20241022",
-                    "google/gemini-pro-1.5",
-                    "meta-llama/llama-3.2-90b-vision-instruct",
-                    "Type custom model name...",
-                ]
-            except Exception as e:
-                logger.error(f"Error setting up OpenRouter models: {e}")
-                return ["openai/gpt-4o", "anthropic/claude-3-5-sonnet-20241022"]
+            return self._get_openrouter_models()
 
         return models.get(provider, ["default"])
 
-    def show_system_prompt_step(self):
-        """Step 3: System Prompt Configuration."""
-        title = ctk.CTkLabel(
-            self.content_frame,
-            text="System Prompt Configuration",
-            font=ctk.CTkFont(size=20, weight="bold"),
-        )
-        title.pack(pady=15)
+    def _get_openrouter_models(self) -> list:
+        """
+        Return the OpenRouter model list without blocking the UI.
 
-        desc = ctk.CTkLabel(
-            self.content_frame,
-            text="Define how your bot should behave and respond to users.",
-            font=ctk.CTkFont(size=12),
-        )
-        desc.pack(pady=5)
-
-        # System prompt text area
-        prompt_frame = ctk.CTkFrame(self.content_frame)
-        prompt_frame.pack(fill="both", expand=True, padx=40, pady=15)
-
-        ctk.CTkLabel(
-            prompt_frame,
-            text="System Prompt:",
-            font=ctk.CTkFont(size=14, weight="bold"),
-        ).pack(anchor="w", padx=10, pady=5)
-
-        ctk.CTkLabel(
-            prompt_frame,
-            text="This defines the bot's personality, tone, and behavior guidelines.",
-            font=ctk.CTkFont(size=11),
-            text_color="gray",
-        ).pack(anchor="w", padx=10, pady=2)
+        The last fetched list (or a static fallback) is returned straight
+        away and a refresh is started in the background; the model
+        dropdowns are updated when it completes.
+        """
+        api_key = self.setup_data["api_key"].get()
+        cached = self._model_cache.get(("openrouter", api_key))
 
-        # Text area for system prompt
-        self.system_prompt_text = ctk.CTkTextbox(
-            prompt_frame, height=150, width=700, wrap="word"
-        )
-        self.system_prompt_text.pack(padx=10, pady=10)
-        self.system_prompt_text.insert("1.0", self.setup_data["system_prompt"].get())
-
-        # AI Assistant section
-        assistant_frame = ctk.CTkFrame(self.content_frame)
-        assistant_frame.pack(fill="x", padx=40, pady=10)
-
-        ctk.CTkLabel(
-            assistant_frame,
-            text="💡 AI Prompt Assistant",
-            font=ctk.CTkFont(size=14, weight="bold"),
-        ).pack(anchor="w", padx=10, pady=5)
-
-        ctk.CTkLabel(
-            assistant_frame,
-            text="Describe what you want your bot to do, and AI will generate a system prompt for you.",
-            font=ctk.CTkFont(size=11),
-            text_color="gray",
-        ).pack(anchor="w", padx=10, pady=2)
+        if api_key and api_key not in self._model_refreshing:
+            self._model_refreshing.add(api_key)
+            threading.Thread(
+                target=self._refresh_openrouter_models, args=(api_key,), daemon=True
+            ).start()
 
-        # Input for user request
-        input_container = ctk.CTkFrame(assistant_frame)
-        input_container.pack(fill="x", padx=10, pady=10)
+        return cached or list(OPENROUTER_FALLBACK_MODELS)
 
-        self.prompt_request_entry = ctk.CTkEntry(
-            input_container,
-            placeholder_text="E.g., 'Make my bot act like a pirate who loves coding'",
-            width=550,
-        )
-        self.prompt_request_entry.pack(side="left", padx=5)
+    def _refresh_openrouter_models(self, api_key: str):
+        """Fetch the OpenRouter model list in a background thread."""
+        models = None
+        try:
+            from src.llm.openrouter_provider import OpenRouterProvider
 
-        self.generate_prompt_btn = ctk.CTkButton(
-            input_container,
-            text="Generate Prompt",
-            command=self.generate_system_prompt,
-            width=130,
-        )
-        self.generate_prompt_btn.pack(side="left", padx=5)
+            openrouter = OpenRouterProvider(api_key=api_key)
 
-        # Status label for generation
-        self.prompt_status_label = ctk.CTkLabel(
-            assistant_frame, text="", font=ctk.CTkFont(size=11), text_color="gray"
-        )
-        self.prompt_status_label.pack(anchor="w", padx=10, pady=2)
-        
-        # Character limit enforcement option
-        char_limit_frame = ctk.CTkFrame(self.content_frame)
-        char_limit_frame.pack(fill="x", padx=40, pady=10)
-        
-        ctk.CTkLabel(
-            char_limit_frame,
-            text="⚙️ Response Settings",
-            font=ctk.CTkFont(size=14, weight="bold"),
-        ).pack(anchor="w", padx=10, pady=5)
-        
-        char_limit_checkbox = ctk.CTkCheckBox(
-            char_limit_frame,
-            text="Instruct bot to keep responses under 2000 characters (prevents message splitting)",
-            variable=self.setup_data["enforce_char_limit"],
-            font=ctk.CTkFont(size=12),
-        )
-        char_limit_checkbox.pack(anchor="w", padx=10, pady=10)
-        
-        ctk.CTkLabel(
-            char_limit_frame,
-            text="When enabled, adds instructions to the system prompt asking the LLM to keep responses concise.",
-            font=ctk.CTkFont(size=10),
-            text_color="gray",
-        ).pack(anchor="w", padx=10, pady=(0, 10))
+            async def fetch():
+                try:
+                    return await openrouter.fetch_models_from_api()
+                finally:
+                    await openrouter.close()
+
+            models = list(asyncio.run(fetch()))
+        except Exception as e:
+            logger.warning(f"Could not fetch OpenRouter models: {e}")
+
+        # Hand the result back to the Tk thread
+        self.after(0, self._apply_openrouter_models, api_key, models)
+
+    def _apply_openrouter_models(self, api_key: str, models):
+        """Store a fetched OpenRouter model list and refresh the dropdowns."""
+        self._model_refreshing.discard(api_key)
+        key = ("openrouter", api_key)
+        if not models or self._model_cache.get(key) == models:
+            return
+        self._model_cache[key] = models
+
+        # Only touch the dropdowns if they still show this provider and key
+        if (
+            self.setup_data["llm_provider"].get() != "openrouter"
+            or self.setup_data["api_key"].get() != api_key
+        ):
+            return
+        for combo in (
+            getattr(self, "model_combo", None),
+            getattr(self, "screening_model_combo", None),
+        ):
+            if combo is not None:
+                combo.configure(values=models)
 
     def generate_system_prompt(self):
         """Generate a system prompt using AI."""
@@ -500,26 +869,48 @@ class SetupWizardGUI(ctk.CTk):
             )
             return
 
-        self.prompt_status_label.configure(text="🤖 Generating prompt...")
+        # Disable first so a second click can't start another generation, then
+        # only flush pending redraws; update() would also process queued clicks
         self.generate_prompt_btn.configure(state="disabled")
-        self.update()
-        
-        # Run generation in background thread to avoid freezing UI
-        import threading
-        thread = threading.Thread(target=self._generate_prompt_async, args=(provider, api_key, model, user_request))
-        thread.daemon = True
-        thread.start()
-    
-    def _generate_prompt_async(self, provider, api_key, model, user_request):
-        """Generate prompt in background thread."""
+        self.prompt_status_label.configure(text="🤖 Generating prompt...")
+        self.update_idletasks()
+
+        # Generations share one long-lived loop so provider sessions are reused
+        if self._llm_loop is None:
+            self._llm_loop = asyncio.new_event_loop()
+            threading.Thread(target=self._llm_loop.run_forever, daemon=True).start()
+
+        future = asyncio.run_coroutine_threadsafe(
+            self._generate_prompt(provider, api_key, model, user_request),
+            self._llm_loop,
+        )
+
+        def on_done(f):
+            # Hand the outcome back to the Tk thread; the loop may be stopped
+            # mid-generation (see destroy), cancelling the task
+            if f.cancelled():
+                result = (None, "Generation was cancelled")
+            elif (exc := f.exception()) is not None:
+                result = (None, str(exc) or type(exc).__name__)
+            else:
+                result = f.result()
+
+            try:
+                self.after(0, self._update_generated_prompt, *result)
+            except (tk.TclError, RuntimeError):
+                logger.debug("Setup window closed before prompt generation finished")
+
+        future.add_done_callback(on_done)
+
+    async def _generate_prompt(self, provider, api_key, model, user_request):
+        """Generate a prompt on the background loop, returning (prompt, error)."""
         try:
-            # Import the provider
             from src.llm.factory import LLMProviderFactory
-            
-            # Create provider instance
-            llm = LLMProviderFactory.create_provider(provider, api_key=api_key)
-            
-            # Generate the prompt
+            from src.llm.base import Message
+
+            # Cached per provider and key, so the HTTP session survives between clicks
+            llm = LLMProviderFactory.get_or_create_provider(provider, api_key=api_key)
+
             assistant_prompt = f"""You are a helpful assistant that creates system prompts for Discord bots.
 The user wants their bot to: {user_request}
 
@@ -527,35 +918,20 @@ Create a clear, concise system prompt (2-4 sentences) that defines the bot's per
 The prompt should be professional and suitable for a Discord bot.
 
 Respond with ONLY the system prompt text, nothing else."""
-            
-            # Run async generation
-            import asyncio
-            from src.llm.base import Message
-            
-            async def generate():
-                response = await llm.complete(
-                    messages=[Message(role="user", content=assistant_prompt)],
-                    model=model,
-                    max_tokens=300,
-                    temperature=0.7
-                )
-                return response.content.strip()
-            
-            # Create new event loop for this thread
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            generated_prompt = loop.run_until_complete(generate())
-            loop.close()
-            
-            # Update UI in main thread
-            self.after(0, self._update_prompt_result, generated_prompt, None)
-            
+
+            response = await llm.complete(
+                messages=[Message(role="user", content=assistant_prompt)],
+                model=model,
+                max_tokens=300,
+                temperature=0.7
+            )
+            return response.content.strip(), None
+
         except Exception as e:
             logger.error(f"Failed to generate prompt: {e}", exc_info=True)
-            # Update UI with error in main thread
-            self.after(0, self._update_prompt_result, None, str(e))
-    
-    def _update_prompt_result(self, prompt, error):
+            return None, str(e)
+
+    def _update_generated_prompt(self, prompt, error):
         """Update UI with prompt generation result."""
         if error:
             messagebox.showerror("Generation Failed", f"Could not generate prompt: {error}")
@@ -569,263 +945,6 @@ Respond with ONLY the system prompt text, nothing else."""
         
         self.generate_prompt_btn.configure(state="normal")
     
-    def show_tools_step(self):
-        """Step 4: Tools Configuration."""
-        title = ctk.CTkLabel(
-            self.content_frame,
-            text="Tools & Features",
-            font=ctk.CTkFont(size=20, weight="bold"),
-        )
-        title.pack(pady=20)
-
-        desc = ctk.CTkLabel(
-            self.content_frame,
-            text="Enable additional features for your bot.",
-            font=ctk.CTkFont(size=12),
-        )
-        desc.pack(pady=5)
-
-        # Web Search
-        search_frame = ctk.CTkFrame(self.content_frame)
-        search_frame.pack(fill="x", padx=40, pady=20)
-
-        ctk.CTkCheckBox(
-            search_frame,
-            text="Enable Web Search Tool",
-            variable=self.setup_data["enable_search"],
-            font=ctk.CTkFont(size=14, weight="bold"),
-            command=self.on_search_toggle,
-        ).pack(anchor="w", padx=10, pady=10)
-
-        ctk.CTkLabel(
-            search_frame,
-            text="Allows the bot to search the internet for real-time information.",
-            font=ctk.CTkFont(size=11),
-            text_color="gray",
-        ).pack(anchor="w", padx=30, pady=2)
-
-        self.search_provider_frame = ctk.CTkFrame(search_frame)
-        self.search_provider_frame.pack(fill="x", padx=30, pady=10)
-
-        ctk.CTkLabel(
-            self.search_provider_frame,
-            text="Search Provider:",
-            font=ctk.CTkFont(size=12),
-        ).pack(anchor="w", pady=5)
-
-        search_providers = [
-            ("DuckDuckGo (Free, No API Key, pretty harsh rate limits)", "duckduckgo"),
-            ("Google Custom Search", "google"),
-            ("Brave Search", "brave"),
-            ("SearxNG (Self-hosted, free, no rate limits)", "searxng"),
-        ]
-
-        for label, value in search_providers:
-            ctk.CTkRadioButton(
-                self.search_provider_frame,
-                text=label,
-                variable=self.setup_data["search_provider"],
-                value=value,
-                command=self.on_search_provider_change,
-            ).pack(anchor="w", padx=10, pady=3)
-
-        # SearxNG URL input (hidden by default)
-        self.searxng_url_frame = ctk.CTkFrame(self.search_provider_frame)
-
-        ctk.CTkLabel(
-            self.searxng_url_frame,
-            text="SearxNG Instance URL:",
-            font=ctk.CTkFont(size=12),
-        ).pack(anchor="w", pady=5)
-
-        ctk.CTkEntry(
-            self.searxng_url_frame,
-            textvariable=self.setup_data["searxng_url"],
-            placeholder_text="http://localhost:8888",
-            width=400,
-        ).pack(anchor="w", padx=10, pady=5)
-
-        ctk.CTkLabel(
-            self.searxng_url_frame,
-            text="Enter the URL of your SearxNG instance",
-            font=ctk.CTkFont(size=10),
-            text_color="gray",
-        ).pack(anchor="w", padx=10, pady=2)
-
-        # Dashboard
-        dashboard_frame = ctk.CTkFrame(self.content_frame)
-        dashboard_frame.pack(fill="x", padx=40, pady=20)
-
-        ctk.CTkCheckBox(
-            dashboard_frame,
-            text="Enable Web Dashboard",
-            variable=self.setup_data["enable_dashboard"],
-            font=ctk.CTkFont(size=14, weight="bold"),
-        ).pack(anchor="w", padx=10, pady=10)
-
-        ctk.CTkLabel(
-            dashboard_frame,
-            text="Web-based interface for monitoring and configuration.",
-            font=ctk.CTkFont(size=11),
-            text_color="gray",
-        ).pack(anchor="w", padx=30, pady=2)
-
-        port_frame = ctk.CTkFrame(dashboard_frame)
-        port_frame.pack(fill="x", padx=30, pady=5)
-
-        ctk.CTkLabel(
-            port_frame, text="Dashboard Port:", font=ctk.CTkFont(size=12)
-        ).pack(side="left", padx=5)
-
-        ctk.CTkEntry(
-            port_frame, textvariable=self.setup_data["dashboard_port"], width=100
-        ).pack(side="left", padx=5)
-
-        self.on_search_toggle()
-
-    def show_screening_step(self):
-        """Step 5: Content Screening Configuration."""
-        title = ctk.CTkLabel(
-            self.content_frame,
-            text="Content Screening (Optional)",
-            font=ctk.CTkFont(size=20, weight="bold"),
-        )
-        title.pack(pady=15)
-
-        desc = ctk.CTkLabel(
-            self.content_frame,
-            text="Configure AI-powered content moderation to keep responses safe and appropriate.",
-            font=ctk.CTkFont(size=12),
-        )
-        desc.pack(pady=5)
-
-        # Enable screening checkbox
-        enable_frame = ctk.CTkFrame(self.content_frame)
-        enable_frame.pack(fill="x", padx=40, pady=15)
-
-        ctk.CTkCheckBox(
-            enable_frame,
-            text="Enable Content Screening",
-            variable=self.setup_data["enable_screening"],
-            font=ctk.CTkFont(size=14, weight="bold"),
-            command=self.on_screening_toggle,
-        ).pack(anchor="w", padx=10, pady=10)
-
-        ctk.CTkLabel(
-            enable_frame,
-            text="Uses AI to review bot responses before sending them to Discord.",
-            font=ctk.CTkFont(size=11),
-            text_color="gray",
-        ).pack(anchor="w", padx=30, pady=2)
-
-        # Screening configuration (shown when enabled)
-        self.screening_config_frame = ctk.CTkFrame(self.content_frame)
-        self.screening_config_frame.pack(fill="both", expand=True, padx=40, pady=10)
-
-        # Model selection
-        model_frame = ctk.CTkFrame(self.screening_config_frame)
-        model_frame.pack(fill="x", padx=10, pady=10)
-
-        ctk.CTkLabel(
-            model_frame,
-            text="Screening Model:",
-            font=ctk.CTkFont(size=13, weight="bold"),
-        ).pack(anchor="w", padx=10, pady=5)
-
-        ctk.CTkLabel(
-            model_frame,
-            text="Choose a fast, cost-effective model for screening (e.g., gemini-flash, gpt-4o-mini).",
-            font=ctk.CTkFont(size=11),
-            text_color="gray",
-        ).pack(anchor="w", padx=10, pady=2)
-
-        # Use the same provider's models
-        self.screening_model_combo = ctk.CTkComboBox(
-            model_frame,
-            variable=self.setup_data["screening_model"],
-            values=self.get_models_for_provider(self.setup_data["llm_provider"].get()),
-            width=500,
-        )
-        self.screening_model_combo.pack(padx=10, pady=5)
-
-        # Action on flagged content
-        action_frame = ctk.CTkFrame(self.screening_config_frame)
-        action_frame.pack(fill="x", padx=10, pady=10)
-
-        ctk.CTkLabel(
-            action_frame,
-            text="Action on Flagged Content:",
-            font=ctk.CTkFont(size=13, weight="bold"),
-        ).pack(anchor="w", padx=10, pady=5)
-
-        actions = [
-            ("Block and notify user", "block"),
-            ("Log but allow", "log"),
-            ("Replace with safe message", "replace"),
-            ("Escalate to moderators", "escalate"),
-        ]
-
-        for label, value in actions:
-            ctk.CTkRadioButton(
-                action_frame,
-                text=label,
-                variable=self.setup_data["screening_action"],
-                value=value,
-                command=self.on_screening_action_change,
-            ).pack(anchor="w", padx=20, pady=3)
-
-        # Moderation channel (shown only for escalate action)
-        self.mod_channel_frame = ctk.CTkFrame(action_frame)
-        self.mod_channel_frame.pack(fill="x", padx=20, pady=10)
-
-        ctk.CTkLabel(
-            self.mod_channel_frame,
-            text="Moderation Channel ID:",
-            font=ctk.CTkFont(size=12),
-        ).pack(anchor="w", padx=10, pady=2)
-
-        ctk.CTkEntry(
-            self.mod_channel_frame,
-            textvariable=self.setup_data["screening_channel_id"],
-            placeholder_text="Right-click channel → Copy Channel ID",
-            width=400,
-        ).pack(anchor="w", padx=10, pady=5)
-
-        ctk.CTkLabel(
-            self.mod_channel_frame,
-            text="Flagged messages will be sent here for manual review.",
-            font=ctk.CTkFont(size=11),
-            text_color="gray",
-        ).pack(anchor="w", padx=10, pady=2)
-
-        # Screening policy
-        policy_frame = ctk.CTkFrame(self.screening_config_frame)
-        policy_frame.pack(fill="both", expand=True, padx=10, pady=10)
-
-        ctk.CTkLabel(
-            policy_frame,
-            text="Screening Policy:",
-            font=ctk.CTkFont(size=13, weight="bold"),
-        ).pack(anchor="w", padx=10, pady=5)
-
-        ctk.CTkLabel(
-            policy_frame,
-            text="Define what content should be flagged (e.g., harmful, inappropriate, offensive).",
-            font=ctk.CTkFont(size=11),
-            text_color="gray",
-        ).pack(anchor="w", padx=10, pady=2)
-
-        self.screening_policy_text = ctk.CTkTextbox(
-            policy_frame, height=120, width=700, wrap="word"
-        )
-        self.screening_policy_text.pack(padx=10, pady=10)
-        self.screening_policy_text.insert(
-            "1.0", self.setup_data["screening_policy"].get()
-        )
-
-        self.on_screening_toggle()
-        self.on_screening_action_change()  # Initialize channel visibility
-
     def on_screening_toggle(self):
         """Show/hide screening configuration based on checkbox."""
         if self.setup_data["enable_screening"].get():
@@ -840,27 +959,26 @@ Respond with ONLY the system prompt text, nothing else."""
         else:
             self.mod_channel_frame.pack_forget()
 
-    def show_final_step(self):
+    def show_final_step(self, parent):
         """Step 6: Summary and finish."""
         title = ctk.CTkLabel(
-            self.content_frame,
+            parent,
             text="Setup Complete! 🎉",
-            font=ctk.CTkFont(size=24, weight="bold"),
+            font=self._fonts()["hero"],
         )
         title.pack(pady=30)
 
         desc = ctk.CTkLabel(
-            self.content_frame,
+            parent,
             text="Review your configuration below:",
-            font=ctk.CTkFont(size=14),
+            font=self._fonts()["label"],
         )
         desc.pack(pady=10)
 
         # Summary frame
         summary_frame = ctk.CTkScrollableFrame(
-            self.content_frame, width=600, height=300
+            parent, width=600, height=300
         )
-        summary_frame.pack(padx=40, pady=20)
 
         summary_items = [
             ("Discord Bot", "Configured ✓"),
@@ -888,24 +1006,27 @@ Respond with ONLY the system prompt text, nothing else."""
 
         for key, value in summary_items:
             item_frame = ctk.CTkFrame(summary_frame)
-            item_frame.pack(fill="x", pady=5, padx=10)
 
             ctk.CTkLabel(
                 item_frame,
                 text=key + ":",
-                font=ctk.CTkFont(size=13, weight="bold"),
+                font=self._fonts()["subheader"],
                 width=150,
                 anchor="w",
             ).pack(side="left", padx=10)
 
             ctk.CTkLabel(
-                item_frame, text=value, font=ctk.CTkFont(size=13), anchor="w"
+                item_frame, text=value, font=self._fonts()["value"], anchor="w"
             ).pack(side="left", padx=10)
+            # Pack each row once its labels exist, so it is laid out in one pass
+            item_frame.pack(fill="x", pady=5, padx=10)
+
+        summary_frame.pack(padx=40, pady=20)
 
         info = ctk.CTkLabel(
-            self.content_frame,
+            parent,
             text="Click 'Finish' to save your configuration and start using the bot!",
-            font=ctk.CTkFont(size=12),
+            font=self._fonts()["body"],
             text_color="gray",
         )
         info.pack(pady=20)
@@ -936,6 +1057,10 @@ Respond with ONLY the system prompt text, nothing else."""
             if models:
                 self.setup_data["llm_model"].set(models[0])  # Set first as default
 
+            # The screening step may already be built with the old provider's models
+            if hasattr(self, "screening_model_combo"):
+                self.screening_model_combo.configure(values=models)
+
     def on_search_toggle(self):
         """Handle search toggle."""
         if self.setup_data["enable_search"].get():
@@ -1188,9 +1313,27 @@ Note: Requires payment method for usage.""",
 
     def _set_env(self, key: str, value: str):
         """Set environment variable in .env file."""
+        from dotenv import set_key
+
         set_key(str(self.env_file), key, str(value))
         os.environ[key] = str(value)
 
+    def destroy(self):
+        """Close cached LLM providers and stop the generation loop with the window."""
+        if getattr(self, "_llm_loop", None) is not None:
+            from src.llm.factory import LLMProviderFactory
+
+            closing = asyncio.run_coroutine_threadsafe(
+                LLMProviderFactory.close_providers(), self._llm_loop
+            )
+            try:
+                closing.result(timeout=5)
+            except Exception as e:
+                logger.warning(f"Error closing LLM providers: {e}")
+            self._llm_loop.call_soon_threadsafe(self._llm_loop.stop)
+            self._llm_loop = None
+        super().destroy()
+
 
 def run_gui_setup():
     """Run the GUI setup wizard."""
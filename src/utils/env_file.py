@@ -0,0 +1,95 @@
+"""
+Batched updates to .env files.
+"""
+import os
+import re
+import shutil
+import tempfile
+from pathlib import Path
+from typing import List, Mapping, Union
+
+# KEY=... assignment, optionally prefixed with "export"
+_ENV_ASSIGNMENT_RE = re.compile(r'^\s*(?:export\s+)?([A-Za-z_][A-Za-z0-9_.]*)\s*=')
+
+
+def _format_env_line(key: str, value: str) -> str:
+    """Format an assignment the way python-dotenv's set_key writes it."""
+    escaped = value.replace("'", "\\'")
+    return f"{key}='{escaped}'"
+
+
+def create_env_file(env_path: Union[str, Path], example_path: Union[str, Path]):
+    """
+    Create a .env file from an example file unless it already exists.
+
+    Uses an exclusive open rather than checking for the file first, so
+    an existing file is never overwritten.
+
+    Args:
+        env_path: Path of the .env file to create
+        example_path: Template to copy; the new file is left empty if it is missing
+    """
+    try:
+        with open(env_path, 'xb') as env_file:
+            try:
+                env_file.write(Path(example_path).read_bytes())
+            except FileNotFoundError:
+                pass
+    except FileExistsError:
+        pass
+
+
+def set_env_values(env_path: Union[str, Path], updates: Mapping[str, str]):
+    """
+    Write several variables to a .env file in one pass and export them to os.environ.
+
+    Existing assignments are rewritten in place, keeping comments and
+    ordering; keys not yet in the file are appended. The new contents are
+    written to a uniquely named temporary file and swapped in with
+    os.replace, so a crash never leaves a half-written .env behind.
+
+    Args:
+        env_path: Path to the .env file (created if missing)
+        updates: Variable names mapped to their new values
+    """
+    if not updates:
+        return
+
+    path = Path(env_path)
+    try:
+        lines = path.read_text(encoding='utf-8').splitlines()
+    except FileNotFoundError:
+        lines = []
+
+    output: List[str] = []
+    written = set()
+    for line in lines:
+        match = _ENV_ASSIGNMENT_RE.match(line)
+        if match and match.group(1) in updates:
+            key = match.group(1)
+            output.append(_format_env_line(key, updates[key]))
+            written.add(key)
+        else:
+            output.append(line)
+
+    for key, value in updates.items():
+        if key not in written:
+            output.append(_format_env_line(key, value))
+
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as tmp_file:
+            tmp_file.write('\n'.join(output) + '\n')
+        try:
+            # Keep the original permissions; .env files often hold secrets
+            shutil.copymode(path, tmp_path)
+        except FileNotFoundError:
+            pass
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    os.environ.update(updates)
@@ -0,0 +1,202 @@
+"""
+Tests for ConfigManager settings updates and per-server configuration.
+"""
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import yaml
+
+from src.config.manager import ConfigManager
+
+
+class ConfigManagerTestCase(unittest.TestCase):
+    """Runs each test against a fresh config file and database."""
+
+    def setUp(self):
+        """Create a ConfigManager in a temporary working directory."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+        # The database lives at data/bot.db relative to the working directory
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        self.addCleanup(os.chdir, cwd)
+
+        self.config_path = Path(self.tmp.name).resolve() / "config.yaml"
+        self.manager = ConfigManager(str(self.config_path))
+        self.addCleanup(self.manager.close)
+
+
+class TestUpdate(ConfigManagerTestCase):
+    """Test suite for ConfigManager.update."""
+
+    def test_sets_nested_keys(self):
+        """Dot-notation keys create nested sections as needed."""
+        self.manager.update({
+            'llm.default_provider': 'gemini',
+            'setup.completed': True,
+        })
+
+        self.assertEqual(self.manager.get('llm.default_provider'), 'gemini')
+        self.assertEqual(self.manager.get('setup'), {'completed': True})
+        self.assertTrue(self.manager.get('setup.completed'))
+
+    def test_saves_once(self):
+        """A batch of changes is written to disk in a single save."""
+        with mock.patch.object(self.manager, 'save', wraps=self.manager.save) as save:
+            self.manager.update({
+                'llm.default_provider': 'gemini',
+                'llm.default_model': 'gemini-pro',
+                'llm.temperature': 0.2,
+            })
+
+        save.assert_called_once()
+
+    def test_unchanged_values_skip_save(self):
+        """Values equal to the current ones do not rewrite the file."""
+        with mock.patch.object(self.manager, 'save') as save:
+            self.manager.update({'llm.default_provider': 'openai'})
+
+        save.assert_not_called()
+
+    def test_round_trips_through_file(self):
+        """Updated values are on disk and survive a reload."""
+        self.manager.update({'llm.default_model': 'gpt-4', 'bot.prefix': '?'})
+
+        with open(self.config_path, encoding='utf-8') as f:
+            on_disk = yaml.safe_load(f)
+        self.assertEqual(on_disk['llm']['default_model'], 'gpt-4')
+        self.assertEqual(on_disk['bot']['prefix'], '?')
+
+        reloaded = ConfigManager(str(self.config_path))
+        self.addCleanup(reloaded.close)
+        self.assertEqual(reloaded.get('llm.default_model'), 'gpt-4')
+        self.assertEqual(reloaded.get('bot.prefix'), '?')
+
+    def test_refreshes_server_defaults(self):
+        """Servers without their own settings pick up new global defaults."""
+        self.assertEqual(self.manager.get_server_config('1')['llm_model'], 'gpt-4-turbo-preview')
+
+        self.manager.update({'llm.default_model': 'gpt-4'})
+
+        self.assertEqual(self.manager.get_server_config('1')['llm_model'], 'gpt-4')
+
+
+class TestGetServerConfig(ConfigManagerTestCase):
+    """Test suite for ConfigManager.get_server_config."""
+
+    def _insert_row(self, server_id, config_json=None, **columns):
+        """Insert a server_config row directly, bypassing set_server_config."""
+        names = ['server_id', *columns, 'config_json']
+        placeholders = ', '.join('?' * len(names))
+        self.manager._conn.execute(
+            f"INSERT INTO server_config ({', '.join(names)}) VALUES ({placeholders})",
+            (server_id, *columns.values(), config_json),
+        )
+        self.manager.invalidate_server_config(server_id)
+
+    def test_unknown_server_uses_defaults(self):
+        """A server without a row gets the global defaults."""
+        config = self.manager.get_server_config('missing')
+
+        self.assertEqual(config, {
+            'llm_provider': 'openai',
+            'llm_model': 'gpt-4-turbo-preview',
+            'temperature': 0.7,
+            'max_tokens': 2048,
+            'system_prompt': '',
+            'enabled_tools': [],
+            'mention_users': False,
+        })
+
+    def test_round_trip(self):
+        """Stored settings come back with the same values and types."""
+        stored = {
+            'llm_provider': 'gemini',
+            'llm_model': 'gemini-pro',
+            'temperature': 0.3,
+            'max_tokens': 512,
+            'system_prompt': 'Be brief.',
+            'enabled_tools': ['web_search', 'calculator'],
+            'enforce_char_limit': True,
+            'mention_users': True,
+            'custom_setting': {'nested': [1, 2]},
+        }
+        self.manager.set_server_config('1', stored)
+
+        self.assertEqual(self.manager.get_server_config('1'), stored)
+
+    def test_mention_users_is_bool(self):
+        """Booleans stored in config_json come back as bool, not 0/1."""
+        self.manager.set_server_config('1', {'mention_users': True})
+        self.manager.set_server_config('2', {'mention_users': False})
+
+        self.assertIs(self.manager.get_server_config('1')['mention_users'], True)
+        self.assertIs(self.manager.get_server_config('2')['mention_users'], False)
+
+    def test_present_keys_override_columns(self):
+        """Keys present in config_json are used as stored, even when empty."""
+        self.manager.set_server_config('1', {'llm_provider': '', 'system_prompt': '', 'enabled_tools': []})
+
+        config = self.manager.get_server_config('1')
+
+        self.assertEqual(config['llm_provider'], '')
+        self.assertEqual(config['system_prompt'], '')
+        self.assertEqual(config['enabled_tools'], [])
+
+    def test_missing_keys_fall_back_to_defaults(self):
+        """Keys absent from config_json fall back to the global defaults."""
+        self.manager.set_server_config('1', {'llm_model': 'gpt-4'})
+
+        config = self.manager.get_server_config('1')
+
+        self.assertEqual(config['llm_model'], 'gpt-4')
+        self.assertEqual(config['llm_provider'], 'openai')
+        self.assertEqual(config['temperature'], 0.7)
+        self.assertEqual(config['enabled_tools'], [])
+        self.assertIs(config['enforce_char_limit'], False)
+        self.assertNotIn('mention_users', config)
+
+    def test_row_without_config_json_uses_columns(self):
+        """Rows without config_json are read from their columns."""
+        self._insert_row(
+            '1',
+            llm_provider='ollama',
+            temperature=0.0,
+            enabled_tools='web_search,calculator',
+            enforce_char_limit=1,
+        )
+
+        config = self.manager.get_server_config('1')
+
+        self.assertEqual(config['llm_provider'], 'ollama')
+        self.assertEqual(config['llm_model'], 'gpt-4-turbo-preview')
+        self.assertEqual(config['temperature'], 0.0)
+        self.assertEqual(config['max_tokens'], 2048)
+        self.assertEqual(config['enabled_tools'], ['web_search', 'calculator'])
+        self.assertIs(config['enforce_char_limit'], True)
+
+    def test_set_server_config_invalidates_cache(self):
+        """A cached configuration is replaced when the server is updated."""
+        self.manager.set_server_config('1', {'llm_model': 'gpt-4'})
+        self.assertEqual(self.manager.get_server_config('1')['llm_model'], 'gpt-4')
+
+        self.manager.set_server_config('1', {'llm_model': 'gpt-3.5-turbo'})
+
+        self.assertEqual(self.manager.get_server_config('1')['llm_model'], 'gpt-3.5-turbo')
+
+    def test_get_server_configs_matches_single_lookup(self):
+        """The batched lookup returns the same configurations."""
+        self.manager.set_server_config('1', {'llm_model': 'gpt-4', 'mention_users': True})
+
+        configs = self.manager.get_server_configs(['1', 'missing'])
+
+        self.assertEqual(configs['1'], self.manager.get_server_config('1'))
+        self.assertEqual(configs['missing'], self.manager.get_server_config('missing'))
+
+
+if __name__ == "__main__":
+    unittest.main()
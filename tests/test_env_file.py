@@ -0,0 +1,123 @@
+"""
+Tests for the batched .env file helpers.
+"""
+import os
+import stat
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from src.utils.env_file import create_env_file, set_env_values
+
+
+class TestSetEnvValues(unittest.TestCase):
+    """Test suite for set_env_values."""
+
+    def setUp(self):
+        """Work in a fresh directory and keep os.environ untouched."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.env_path = Path(self.tmp.name) / ".env"
+
+        patcher = mock.patch.dict(os.environ)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_rewrites_in_place_and_appends(self):
+        """Existing keys are rewritten where they are; new keys go at the end."""
+        self.env_path.write_text(
+            "# Discord\nDISCORD_TOKEN=old\n\nexport DEFAULT_MODEL=gpt\nOTHER=keep\n",
+            encoding="utf-8",
+        )
+
+        set_env_values(self.env_path, {"DEFAULT_MODEL": "gemini", "DISCORD_TOKEN": "new", "NEW_KEY": "1"})
+
+        self.assertEqual(
+            self.env_path.read_text(encoding="utf-8"),
+            "# Discord\nDISCORD_TOKEN='new'\n\nDEFAULT_MODEL='gemini'\nOTHER=keep\nNEW_KEY='1'\n",
+        )
+
+    def test_quotes_values(self):
+        """Values are single-quoted with embedded quotes escaped."""
+        set_env_values(self.env_path, {"PROMPT": "it's # not a comment"})
+
+        self.assertEqual(
+            self.env_path.read_text(encoding="utf-8"),
+            "PROMPT='it\\'s # not a comment'\n",
+        )
+
+    def test_exports_to_environ(self):
+        """Written values are exported to os.environ."""
+        set_env_values(self.env_path, {"OPENLLM_TEST_KEY": "value"})
+
+        self.assertEqual(os.environ["OPENLLM_TEST_KEY"], "value")
+
+    def test_creates_missing_file(self):
+        """A missing .env file is created."""
+        set_env_values(self.env_path, {"KEY": "value"})
+
+        self.assertEqual(self.env_path.read_text(encoding="utf-8"), "KEY='value'\n")
+
+    def test_empty_updates_leave_file_alone(self):
+        """No updates means no write."""
+        set_env_values(self.env_path, {})
+
+        self.assertFalse(self.env_path.exists())
+
+    @unittest.skipIf(os.name == "nt", "POSIX permissions")
+    def test_preserves_permissions(self):
+        """The rewritten file keeps the original mode."""
+        self.env_path.write_text("KEY=old\n", encoding="utf-8")
+        self.env_path.chmod(0o640)
+
+        set_env_values(self.env_path, {"KEY": "new"})
+
+        self.assertEqual(stat.S_IMODE(self.env_path.stat().st_mode), 0o640)
+
+    def test_leaves_no_temp_files(self):
+        """The temporary file is swapped in, not left beside the .env."""
+        set_env_values(self.env_path, {"KEY": "value"})
+
+        self.assertEqual(os.listdir(self.tmp.name), [".env"])
+
+
+class TestCreateEnvFile(unittest.TestCase):
+    """Test suite for create_env_file."""
+
+    def setUp(self):
+        """Work in a fresh directory."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.env_path = Path(self.tmp.name) / ".env"
+        self.example_path = Path(self.tmp.name) / ".env.example"
+
+    def test_copies_example(self):
+        """A new .env starts as a copy of the example file."""
+        self.example_path.write_text("DISCORD_TOKEN=your_discord_bot_token_here\n", encoding="utf-8")
+
+        create_env_file(self.env_path, self.example_path)
+
+        self.assertEqual(
+            self.env_path.read_text(encoding="utf-8"),
+            "DISCORD_TOKEN=your_discord_bot_token_here\n",
+        )
+
+    def test_empty_without_example(self):
+        """Without an example file the new .env is empty."""
+        create_env_file(self.env_path, self.example_path)
+
+        self.assertEqual(self.env_path.read_text(encoding="utf-8"), "")
+
+    def test_never_overwrites(self):
+        """An existing .env is left untouched."""
+        self.env_path.write_text("KEY=mine\n", encoding="utf-8")
+        self.example_path.write_text("KEY=example\n", encoding="utf-8")
+
+        create_env_file(self.env_path, self.example_path)
+
+        self.assertEqual(self.env_path.read_text(encoding="utf-8"), "KEY=mine\n")
+
+
+if __name__ == "__main__":
+    unittest.main()